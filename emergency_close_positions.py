@@ -21,6 +21,15 @@ from dotenv import load_dotenv
 load_dotenv(PROJECT_DIR / 'config' / '.env')
 
 DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+WALLET_STATE_PATH = PROJECT_DIR / 'data' / 'wallet_state.json'
+
+def load_wallet_snapshot():
+    """Soldes du wallet écrits par le Trader (instantané cohérent, sans RPC)"""
+    try:
+        with open(WALLET_STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 def get_open_positions():
     """Récupère les positions ouvertes de la DB"""
@@ -80,6 +89,12 @@ def emergency_close_all():
 
     print(f"⚠️  {len(positions)} position(s) ouverte(s) détectée(s):\n")
 
+    wallet = load_wallet_snapshot()
+    if wallet:
+        age = datetime.now().timestamp() - (wallet.get('updated_at') or 0)
+        print(f"👛 Wallet {wallet['address']} (bloc {wallet['block']}, il y a {age:.0f}s): "
+              f"{(wallet['eth_balance'] or 0) / 10**18:.6f} ETH\n")
+
     for pos in positions:
         pos_id, token_addr, symbol, price, amount, entry_time = pos
         entry_dt = datetime.fromisoformat(entry_time) if entry_time else None
@@ -88,6 +103,9 @@ def emergency_close_all():
         print(f"  [{pos_id}] {symbol}")
         print(f"      Token: {token_addr}")
         print(f"      Amount: {amount} ETH")
+        if wallet:
+            held = wallet['tokens'].get(token_addr.lower())
+            print(f"      Wallet: {held if held is not None else 'inconnu'} tokens")
         print(f"      Entry: {entry_time}")
         print(f"      Durée: {duration:.1f}h")
         print()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Migration: Compression de analysis_data (approved_tokens / rejected_tokens)
+
+Entraine un dictionnaire zstd sur les lignes existantes puis réécrit chaque
+ligne JSON au format compact (msgpack + zstd), par lots, sans bloquer la DB.
+Les lignes déjà compactes sont ignorées: la migration peut être relancée.
+
+Usage:
+    python migrate_compress_analysis_data.py [--batch-size 500] [--no-train]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from analysis_codec import (
+    compact_available, decode_analysis_data, encode_analysis_data,
+    ensure_dictionary_table, get_latest_dictionary_id, train_dictionary
+)
+
+DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+TABLES = ['approved_tokens', 'rejected_tokens']
+TRAINING_SAMPLE_LIMIT = 5000
+
+
+def collect_samples(conn: sqlite3.Connection) -> list:
+    """Récupère des échantillons JSON pour l'entraînement du dictionnaire"""
+    samples = []
+    per_table = TRAINING_SAMPLE_LIMIT // len(TABLES)
+    for table in TABLES:
+        rows = conn.execute(f"""
+            SELECT analysis_data FROM {table}
+            WHERE typeof(analysis_data) = 'text'
+            ORDER BY id DESC
+            LIMIT ?
+        """, (per_table,)).fetchall()
+        for (value,) in rows:
+            try:
+                samples.append(json.loads(value))
+            except (TypeError, ValueError):
+                continue
+    return samples
+
+
+def compress_table(conn: sqlite3.Connection, table: str, batch_size: int) -> tuple:
+    """Compresse une table par lots, retourne (lignes, octets avant, octets après)"""
+    converted = 0
+    bytes_before = 0
+    bytes_after = 0
+    last_id = 0
+
+    while True:
+        rows = conn.execute(f"""
+            SELECT id, analysis_data FROM {table}
+            WHERE id > ? AND typeof(analysis_data) = 'text'
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+
+        if not rows:
+            break
+
+        updates = []
+        for row_id, value in rows:
+            last_id = row_id
+            try:
+                data = decode_analysis_data(value, conn)
+            except (TypeError, ValueError):
+                print(f"  ⚠️  {table}#{row_id}: JSON invalide, ligne ignorée")
+                continue
+
+            encoded = encode_analysis_data(data, conn, mode='compact')
+            # Vérification aller-retour avant d'écraser la ligne
+            if decode_analysis_data(encoded, conn) != data:
+                print(f"  ⚠️  {table}#{row_id}: aller-retour non identique, ligne ignorée")
+                continue
+
+            updates.append((encoded, row_id))
+            bytes_before += len(value.encode('utf-8'))
+            bytes_after += len(encoded)
+
+        conn.executemany(f"UPDATE {table} SET analysis_data = ? WHERE id = ?", updates)
+        conn.commit()
+        converted += len(updates)
+        print(f"  {table}: {converted} lignes compressées (id <= {last_id})")
+
+    return converted, bytes_before, bytes_after
+
+
+def migrate(batch_size: int = 500, train: bool = True):
+    """Compresse toutes les lignes analysis_data encore en JSON"""
+    print("🔄 Migration: compression de analysis_data...")
+
+    if not compact_available():
+        print("❌ msgpack et zstandard requis: pip install -r requirements.txt")
+        return
+
+    if not DB_PATH.exists():
+        print(f"❌ Base de données non trouvée: {DB_PATH}")
+        return
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    ensure_dictionary_table(conn)
+    conn.commit()
+
+    if train:
+        samples = collect_samples(conn)
+        dict_id = train_dictionary(conn, samples)
+        if dict_id:
+            print(f"✅ Dictionnaire zstd #{dict_id} entraîné sur {len(samples)} lignes")
+        else:
+            print(f"ℹ️  Pas de nouveau dictionnaire ({len(samples)} échantillons)")
+
+    print(f"📖 Dictionnaire utilisé: #{get_latest_dictionary_id(conn)}")
+
+    total_rows = 0
+    total_before = 0
+    total_after = 0
+    for table in TABLES:
+        rows, before, after = compress_table(conn, table, batch_size)
+        total_rows += rows
+        total_before += before
+        total_after += after
+
+    conn.close()
+
+    if total_rows:
+        ratio = total_before / total_after if total_after else 0
+        print(f"\n✅ {total_rows} lignes compressées: "
+              f"{total_before / 1024:.1f} KB → {total_after / 1024:.1f} KB (x{ratio:.1f})")
+        print("ℹ️  Lancer VACUUM (maintenance_safe.sh) pour récupérer l'espace disque")
+    else:
+        print("\n✅ Aucune ligne JSON à compresser")
+    print("\n💡 Activer ANALYSIS_DATA_STORAGE=compact dans config/.env pour les nouvelles lignes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compression de analysis_data")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--no-train', action='store_true',
+                        help="Réutiliser le dernier dictionnaire sans en entraîner un nouveau")
+    args = parser.parse_args()
+    migrate(batch_size=args.batch_size, train=not args.no_train)
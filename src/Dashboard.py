@@ -15,6 +15,7 @@ import json
 import time
 import os
 from dotenv import load_dotenv
+from analysis_codec import decode_analysis_data, register_sqlite_functions
 
 # Charger .env pour récupérer les frais configurés
 load_dotenv(Path(__file__).parent.parent / 'config' / '.env')
@@ -34,7 +35,10 @@ CONFIG_PATH = PROJECT_DIR / 'config' / 'trading_mode.json'
 
 def get_connection():
     """Crée une connexion DB"""
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # decode_analysis() utilisable en SQL (analysis_data JSON ou compact)
+    register_sqlite_functions(conn)
+    return conn
 
 def get_trading_mode():
     """Récupère le mode de trading actuel"""
@@ -420,6 +424,26 @@ with tab3:
         approved_df['score'] = approved_df['score'].apply(lambda x: f"{x:.1f}")
         approved_df.columns = ['Adresse', 'Symbol', 'Nom', 'Score', 'Approuvé le']
         st.dataframe(approved_df, use_container_width=True)
+
+        # Détail de l'analyse (décodage transparent JSON/compact)
+        selected_address = st.selectbox(
+            "Détail de l'analyse",
+            approved_df['Adresse'].tolist(),
+            format_func=lambda addr: f"{approved_df.set_index('Adresse').loc[addr, 'Symbol']} ({addr[:10]}...)"
+        )
+        if selected_address:
+            row = conn.execute(
+                "SELECT analysis_data FROM approved_tokens WHERE token_address = ?",
+                (selected_address,)
+            ).fetchone()
+            try:
+                analysis = decode_analysis_data(row[0], conn) if row else None
+            except Exception as e:
+                analysis = None
+                st.warning(f"Analyse illisible: {e}")
+            if analysis:
+                with st.expander("Raisons et données brutes"):
+                    st.json(analysis)
     else:
         st.info("Aucun token en attente")
 
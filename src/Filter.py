@@ -22,6 +22,8 @@ from web3_utils import (
     BaseWeb3Manager, UniswapV3Manager,
     DexScreenerAPI, BaseScanAPI, CoinGeckoAPI
 )
+from honeypot_checker import HoneypotVerdictCache
+from analysis_codec import encode_analysis_data, ensure_dictionary_table, get_storage_mode
 
 load_dotenv(PROJECT_DIR / 'config' / '.env')
 
@@ -52,6 +54,9 @@ class AdvancedFilter:
         self.basescan = BaseScanAPI(os.getenv('ETHERSCAN_API_KEY')) # Utilise la clé Etherscan
         self.coingecko = CoinGeckoAPI(os.getenv('COINGECKO_API_KEY'))
 
+        # Verdicts honeypot partagés avec le Trader (table honeypot_cache)
+        self.honeypot_cache = HoneypotVerdictCache(self.db_path)
+
         # Système de blacklist
         self.blacklist_file = PROJECT_DIR / 'config' / 'blacklist.json'
         self.load_blacklist()
@@ -126,6 +131,9 @@ class AdvancedFilter:
             )
         ''')
 
+        # Dictionnaires zstd pour analysis_data en mode compact
+        ensure_dictionary_table(conn)
+
         # Table des règles de filtrage (optionnel, pour suivi)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS filter_rules (
@@ -209,10 +217,13 @@ class AdvancedFilter:
         """Vérifie si un token est sur la liste noire"""
         return token_address.lower() in [addr.lower() for addr in self.blacklist]
 
-    def calculate_score(self, token_data: Dict) -> Tuple[float, List[str]]:
+    def calculate_score(self, token_data: Dict, honeypot_check: Optional[Dict] = None) -> Tuple[float, List[str]]:
         """
         Calcule un score de qualité basé sur les critères de filtrage.
         Retourne (score, liste_raisons_positive)
+
+        honeypot_check: résultat déjà calculé (simulation par lot du cycle),
+        sinon le token est vérifié individuellement.
         """
         score = 0.0
         reasons = []
@@ -294,9 +305,12 @@ class AdvancedFilter:
             score += 7  # Bonus partiel par défaut
             reasons.append(f"Owner % non disponible (API Base)")
 
-        # Taxes (si disponibles via BaseScan ou analyse du contrat)
-        buy_tax = token_data.get('buy_tax', 0.0) # Cette donnée doit être récupérée ailleurs
-        sell_tax = token_data.get('sell_tax', 0.0) # Cette donnée doit être récupérée ailleurs
+        # Taxes: mesurées par la simulation achat/vente si disponible
+        buy_tax = token_data.get('buy_tax', 0.0)
+        sell_tax = token_data.get('sell_tax', 0.0)
+        if honeypot_check and honeypot_check.get('can_sell') and not honeypot_check.get('error'):
+            buy_tax = float(honeypot_check.get('buy_tax', buy_tax))
+            sell_tax = float(honeypot_check.get('sell_tax', sell_tax))
         if buy_tax <= self.max_buy_tax and sell_tax <= self.max_sell_tax:
             score += 15
             reasons.append(f"Taxes (B:{buy_tax:.2f}%, S:{sell_tax:.2f}%) OK")
@@ -306,7 +320,12 @@ class AdvancedFilter:
         # Données on-chain (détails du contrat, honeypot, etc.) - via web3_utils
         try:
             token_address = token_data['token_address']
-            honeypot_check = self.web3_manager.check_honeypot(token_address)
+            cached = self.honeypot_cache.get(token_address)
+            if cached and cached['outcome'] == 'unsafe':
+                # Verdict honeypot.is déjà connu (Trader): token dangereux
+                honeypot_check = {'is_honeypot': True}
+            elif honeypot_check is None:
+                honeypot_check = self.web3_manager.check_honeypot(token_address)
             if not honeypot_check.get('is_honeypot', True): # Si ce n'est PAS un honeypot
                 score += 15
                 reasons.append("Passed honeypot check")
@@ -326,11 +345,11 @@ class AdvancedFilter:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        analysis_json = json.dumps({
+        analysis_json = encode_analysis_data({
             'score': score,
             'reasons': reasons,
             'details': token_data # Inclure les détails bruts pour référence
-        })
+        }, conn)
 
         cursor.execute('''
             INSERT OR REPLACE INTO approved_tokens
@@ -355,10 +374,10 @@ class AdvancedFilter:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        analysis_json = json.dumps({
+        analysis_json = encode_analysis_data({
             'reasons': reasons,
             'details': token_data
-        })
+        }, conn)
 
         cursor.execute('''
             INSERT OR REPLACE INTO rejected_tokens
@@ -401,6 +420,18 @@ class AdvancedFilter:
 
             self.logger.info(f"{len(new_tokens)} nouveau(x) token(s) à analyser")
 
+            # Pré-filtrage bytecode de tout le lot en une passe (process pool)
+            address_idx = col_names.index('token_address')
+            addresses = [row[address_idx] for row in new_tokens]
+            self.web3_manager.bytecode_screener.screen_many(addresses)
+
+            # Simulation achat/vente de tous les candidats en un seul multicall
+            try:
+                honeypot_results = self.web3_manager.check_honeypot_batch(addresses)
+            except Exception as e:
+                self.logger.warning(f"Simulation honeypot par lot impossible: {e}")
+                honeypot_results = {}
+
             for row in new_tokens:
                 token_dict = dict(zip(col_names, row))
                 self.stats['total_analyzed'] += 1
@@ -408,7 +439,9 @@ class AdvancedFilter:
                 self.logger.info(f"Analyse du token: {token_dict.get('symbol', 'N/A')} ({token_dict['token_address']})")
 
                 # Calculer le score
-                score, reasons = self.calculate_score(token_dict)
+                score, reasons = self.calculate_score(
+                    token_dict, honeypot_results.get(token_dict['token_address'].lower())
+                )
 
                 if score >= self.score_threshold:
                     self.approve_token(token_dict, score, reasons)
@@ -427,6 +460,7 @@ class AdvancedFilter:
         self.logger.info("Filter démarré...")
         self.logger.info(f"Mode: {self.trading_mode}")
         self.logger.info(f"Seuil de score: {self.score_threshold}")
+        self.logger.info(f"Stockage analysis_data: {get_storage_mode()}")
 
         while True:
             try:
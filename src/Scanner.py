@@ -167,10 +167,13 @@ class EnhancedScanner:
             col_names = [description[0] for description in cursor.description]
             recent_tokens = [dict(zip(col_names, row)) for row in rows]
 
+            # Données DexScreener de tous les tokens en une requête
+            infos = self.dexscreener.get_tokens_info([row['token_address'] for row in recent_tokens])
+
             # Convertir au format attendu
             formatted_tokens = []
             for token_row in recent_tokens:
-                token_info = self.dexscreener.get_token_info(token_row['token_address'])
+                token_info = infos.get(token_row['token_address'].lower())
                 if token_info:
                     formatted_tokens.append({
                         'tokenAddress': token_row['token_address'],
@@ -203,6 +206,21 @@ class EnhancedScanner:
         skipped_no_details = 0
         added = 0
 
+        # Données DexScreener des tokens encore inconnus: une requête par lot de 30
+        candidates = [
+            t.get('tokenAddress') or t.get('baseToken', {}).get('address') for t in tokens
+        ]
+        candidates = [a for a in candidates if a]
+        known = set()
+        if candidates:
+            placeholders = ','.join('?' * len(candidates))
+            cursor.execute(
+                f"SELECT token_address FROM discovered_tokens WHERE token_address IN ({placeholders})",
+                candidates
+            )
+            known = {row[0] for row in cursor.fetchall()}
+        pair_data_by_token = self.dexscreener.get_tokens_info([a for a in candidates if a not in known])
+
         for token_data in tokens:
             try:
                 # Extraire les données du token
@@ -224,7 +242,7 @@ class EnhancedScanner:
                     continue
 
                 # Récupérer les données de DexScreener
-                pair_data = self.dexscreener.get_token_info(token_address) # Utilise la méthode existante
+                pair_data = pair_data_by_token.get(token_address.lower())
 
                 # Extraire les infos pertinentes
                 symbol = token_details.get('symbol', 'UNKNOWN')
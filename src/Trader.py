@@ -4,12 +4,16 @@
 Trader - Trading reel avec strategie unique optimisee
 """
 
+import asyncio
 import sqlite3
 import json
 import time
 import os
 import sys
 import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List, Tuple
 from pathlib import Path
@@ -19,16 +23,29 @@ PROJECT_DIR = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_DIR))
 
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
 from dotenv import load_dotenv
 from web3_utils import (
     BaseWeb3Manager, UniswapV3Manager,
     DexScreenerAPI, CoinGeckoAPI
 )
-from honeypot_checker import HoneypotChecker
+from honeypot_checker import HoneypotChecker, HoneypotVerdictCache, HoneypotPrefetcher
+from onchain_pricing import OnchainPricer
+from price_stream import PriceStream
+from pool_registry import PoolRegistry
+from v3_quoter import V3LocalQuoter
+from entry_planner import EntryPlanner
+from exit_standby import ExitStandby
+from fee_oracle import FeeOracle
+from gas_estimator import GasEstimator
+from tx_manager import MAX_UINT256, AllowanceCache, NonceManager, replacement_fees, replacement_txn
 
 load_dotenv(PROJECT_DIR / 'config' / '.env')
 
+# Prefixes des raisons de sortie renvoyees par check_time_exit
+TIME_EXIT_REASONS = ('Stagnation', 'Low momentum', 'Max time', 'Emergency')
+
 class Position:
     """Represente une position ouverte avec gestion avancee"""
     def __init__(self, token_address: str, symbol: str, entry_price: float,
@@ -53,6 +70,16 @@ class Position:
         self.normal_stop_loss_percent = 5  # -5% après grace period
         self.grace_period_active = True
 
+        # Paire DexScreener epinglee (source de prix stable pour le trailing)
+        self.pair_address = None
+        self.pair_liquidity_usd = 0.0
+
+    def pin_pair(self, dex_data: Optional[Dict]):
+        """Epingle la paire d'une reponse DexScreener comme source de prix"""
+        if dex_data and dex_data.get('pair_address'):
+            self.pair_address = dex_data['pair_address']
+            self.pair_liquidity_usd = dex_data.get('liquidity_usd', 0)
+
     def get_active_stop_loss_percent(self):
         """Retourne le stop loss actif selon le grace period"""
         time_since_entry = (datetime.now() - self.entry_time).total_seconds() / 60  # en minutes
@@ -72,6 +99,15 @@ class Position:
         time_since_entry = (datetime.now() - self.entry_time).total_seconds() / 60
         return time_since_entry < self.grace_period_minutes
 
+    def get_stop_price(self):
+        """Prix de declenchement du stop: stop fixe ou trailing, le plus haut"""
+        stop_percent = (self.grace_period_stop_loss_percent if self.is_in_grace_period()
+                        else self.normal_stop_loss_percent)
+        stop_price = self.entry_price * (1 - stop_percent / 100)
+        if self.trailing_active:
+            stop_price = max(stop_price, self.stop_loss)
+        return stop_price
+
 class RealTrader:
     def __init__(self):
         # Creer les dossiers necessaires
@@ -90,9 +126,58 @@ class RealTrader:
             )
             
             self.uniswap = UniswapV3Manager(self.web3_manager)
+            # Pools V3 (adresses CREATE2) et fee tier le plus liquide par token
+            self.pool_registry = PoolRegistry(self.web3_manager.w3, self.db_path)
+            # Gas limits appris par token, sens et fee tier (recus + estimations)
+            self.gas_estimator = GasEstimator(self.db_path)
+            # Cotations locales (etat des pools en cache + tick math)
+            self.local_quoter = V3LocalQuoter(self.web3_manager.w3)
+            # Plans d'entree (taille plafonnee par l'impact) precalcules
+            self.entry_planner = EntryPlanner(self.pool_registry, self.local_quoter)
+            # Nonces distribues localement (approve + swap dans le meme bloc)
+            self.nonce_manager = (
+                NonceManager(self.web3_manager.w3, self.web3_manager.account.address)
+                if self.web3_manager.account else None
+            )
+            # Allowances envers le router: approve apres l'achat, vente en une transaction
+            self.allowances = (
+                AllowanceCache(self.web3_manager.w3, self.web3_manager.account.address,
+                               self.uniswap.router)
+                if self.web3_manager.account else None
+            )
+            # Soldes ETH et tokens du wallet en memoire (recus, logs Transfer, releve periodique)
+            self.wallet_state = self.web3_manager.wallet_state
+            # Frais EIP-1559 (base fee + percentiles de tip) releves a chaque bloc
+            self.fee_oracle = FeeOracle(self.web3_manager.w3)
+            # Swap de sortie signe a l'avance pour chaque position
+            self.exit_standby = (
+                ExitStandby(self.web3_manager.account, self.nonce_manager, self.build_sell_swap_txn)
+                if self.web3_manager.account else None
+            )
             self.dexscreener = DexScreenerAPI()
+            # Prix on-chain (slot0 des pools V3 en un multicall par bloc)
+            self.onchain_pricer = OnchainPricer(self.web3_manager.w3)
+            # Flux de prix: un prix par swap sur les pools detenues
+            self.price_stream = PriceStream(self.web3_manager.w3, self.onchain_pricer)
+            # Client dedie au monitor: pas de retry HTTP bloquant (backoff gere par tick)
+            self.price_dexscreener = DexScreenerAPI(
+                max_retries=0,
+                timeout=float(os.getenv('PRICE_FETCH_TIMEOUT_SECONDS', 5))
+            )
             self.coingecko = CoinGeckoAPI(os.getenv('COINGECKO_API_KEY'))
-            self.honeypot_checker = HoneypotChecker()
+            # Verdicts honeypot partagés (SQLite) avec le Filter et entre redémarrages
+            self.honeypot_cache = HoneypotVerdictCache(self.db_path)
+            self.honeypot_checker = HoneypotChecker(
+                cache=self.honeypot_cache,
+                screener=self.web3_manager.bytecode_screener
+            )
+            # Préchargement des verdicts pour les meilleurs candidats (thread de fond)
+            self.honeypot_prefetcher = HoneypotPrefetcher(
+                self.honeypot_cache,
+                lambda limit: [row[0] for row in self.get_candidate_rows(limit)],
+                logger=self.logger,
+                screener=self.web3_manager.bytecode_screener
+            )
         except Exception as e:
             self.logger.error(f"Erreur initialisation Web3: {e}")
             raise
@@ -107,6 +192,25 @@ class RealTrader:
         # Cooldown pour tokens rejetés (éviter boucles infinies)
         self.rejected_tokens_cooldown = {}  # {token_address: timestamp}
         self.cooldown_minutes = int(os.getenv('REJECTED_TOKEN_COOLDOWN_MINUTES', 30))
+
+        # Etat partage entre les taches asyncio (monitor, sorties, entrees, confirmations).
+        # Les appels bloquants tournent dans des threads (asyncio.to_thread): toute
+        # modification de positions / pending_txs passe par state_lock.
+        self.state_lock = threading.RLock()
+        self.pending_txs = {}  # {tx_hash: contexte achat/vente en attente de confirmation}
+        self.exits_in_flight = set()  # Adresses dont la vente est en cours
+        self.exit_queue = None  # asyncio.Queue creee dans run()
+        self.emergency_exits = set()  # Taches de vente d'urgence (rug) en cours
+        self.rug_exit_latencies = {}  # {etape: [latences ms]} detection -> sortie
+
+        # Rafraichissement des prix hors boucle (monitor_task uniquement):
+        # une requete DexScreener par lot pour toutes les positions
+        self.price_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='price')
+        self.price_batch = None  # Future de la requete en vol
+        self.price_batch_addresses = []  # Adresses couvertes par price_batch
+        self.price_retry = {}  # {token_address: (echecs consecutifs, prochain essai monotonic)}
+        self.price_retry_base_delay = float(os.getenv('PRICE_RETRY_BASE_SECONDS', 1))
+        self.price_retry_max_delay = float(os.getenv('PRICE_RETRY_MAX_SECONDS', 15))
         
         # Router ABI pour Uniswap V3
         self.router_abi = json.loads('''[
@@ -182,6 +286,37 @@ class RealTrader:
         self.max_trades_per_day = int(os.getenv('MAX_TRADES_PER_DAY', 3))
         self.stop_loss_percent = float(os.getenv('STOP_LOSS_PERCENT', 5))
         self.monitoring_interval = int(os.getenv('MONITORING_INTERVAL', 1))
+        # Budget de latence d'un tick du monitor (rafraichissement des prix)
+        self.monitor_tick_budget = float(os.getenv('MONITOR_TICK_BUDGET_SECONDS', self.monitoring_interval * 0.8))
+        self.entry_interval = float(os.getenv('ENTRY_INTERVAL_SECONDS', self.monitoring_interval))
+        self.tx_poll_interval = float(os.getenv('TX_POLL_INTERVAL_SECONDS', 1))
+        self.tx_confirmation_timeout = int(os.getenv('TX_CONFIRMATION_TIMEOUT_SECONDS', 120))
+        # Transaction non minee apres N blocs: remplacee (meme nonce) avec des frais releves
+        self.tx_bump_after_blocks = int(os.getenv('TX_BUMP_AFTER_BLOCKS', 3))
+        self.tx_bump_multiplier = float(os.getenv('TX_BUMP_MULTIPLIER', 1.25))
+        self.tx_max_bumps = int(os.getenv('TX_MAX_BUMPS', 5))
+        self.tx_bump_max_fee_wei = int(float(os.getenv('TX_BUMP_MAX_FEE_GWEI', 100)) * 10**9)
+        self.fee_oracle_interval = float(os.getenv('FEE_ORACLE_POLL_SECONDS', 1))
+        # Logs Transfer du wallet lus a cet intervalle (releve complet: WALLET_RECONCILE_SECONDS)
+        self.wallet_poll_interval = float(os.getenv('WALLET_POLL_SECONDS', 2))
+        # Prix ETH/USD on-chain servi tel quel en deca de cet age (minimum de sortie)
+        self.eth_usd_max_age = float(os.getenv('ETH_USD_MAX_AGE_SECONDS', 30))
+        # Sources de prix du monitor: principale puis secours (dexscreener | onchain | none)
+        primary = os.getenv('PRICE_SOURCE', 'dexscreener').lower()
+        fallback = os.getenv('PRICE_SOURCE_FALLBACK', 'onchain').lower()
+        self.price_sources = [primary] + ([fallback] if fallback not in ('none', primary) else [])
+        # Plans d'entree des meilleurs candidats, recalcules a cet intervalle
+        self.entry_plan_interval = float(os.getenv('ENTRY_PLAN_INTERVAL_SECONDS', 15))
+        self.entry_plan_top_n = int(os.getenv('ENTRY_PLAN_TOP_N', 5))
+        # Sorties pre-signees, re-verifiees a cet intervalle
+        self.exit_standby_enabled = os.getenv('EXIT_STANDBY_ENABLED', 'true').lower() == 'true'
+        self.exit_standby_interval = float(os.getenv('EXIT_STANDBY_INTERVAL_SECONDS', 2))
+        # Evaluation des stops a chaque swap des pools detenues (en plus du monitor)
+        self.price_stream_enabled = os.getenv('PRICE_STREAM_ENABLED', 'true').lower() == 'true'
+        # Approve illimite apres l'achat (sinon: la quantite recue seulement)
+        self.approve_unlimited = os.getenv('APPROVE_UNLIMITED', 'true').lower() == 'true'
+        # Variation de liquidite de la paire epinglee declenchant une re-selection
+        self.pair_repin_liquidity_change = float(os.getenv('PAIR_REPIN_LIQUIDITY_CHANGE_PERCENT', 50))
         self.token_max_age_hours = int(os.getenv('TOKEN_APPROVAL_MAX_AGE_HOURS', 12))
         
         # Configuration trailing stop unique
@@ -225,7 +360,8 @@ class RealTrader:
             'worst_trade': 0,
             'time_exits': 0,
             'trailing_exits': 0,
-            'stoploss_exits': 0
+            'stoploss_exits': 0,
+            'rug_exits': 0
         }
     
     def save_position_state(self, position):
@@ -246,7 +382,9 @@ class RealTrader:
                     'max_price': position.max_price,
                     'highest_price': position.highest_price,
                     'trailing_active': position.trailing_active,
-                    'trailing_config': position.trailing_config
+                    'trailing_config': position.trailing_config,
+                    'pair_address': position.pair_address,
+                    'pair_liquidity_usd': position.pair_liquidity_usd
                 }, f)
         except Exception as e:
             self.logger.error(f"Erreur sauvegarde position {position.symbol}: {e}")
@@ -278,6 +416,8 @@ class RealTrader:
                 position.highest_price = data.get('highest_price', data['entry_price'])
                 position.trailing_active = data.get('trailing_active', False)
                 position.trailing_config = data.get('trailing_config')
+                position.pair_address = data.get('pair_address')
+                position.pair_liquidity_usd = data.get('pair_liquidity_usd', 0.0)
                 
                 if data.get('entry_time'):
                     position.entry_time = datetime.fromisoformat(data['entry_time'])
@@ -327,16 +467,69 @@ class RealTrader:
         if expired:
             self.logger.info(f"🧹 {len(expired)} cooldowns expirés nettoyés")
 
-    def get_next_token(self) -> Optional[Dict]:
-        """
-        Recupere le prochain token a trader avec priorisation par momentum
-        Récupère les 5 meilleurs candidats et choisit celui avec le meilleur momentum actuel
-        """
+    def add_position(self, position: Position):
+        """Enregistre une nouvelle position (thread-safe)"""
+        with self.state_lock:
+            self.positions[position.token_address] = position
+        self.save_position_state(position)
+
+    def remove_position(self, token_address: str):
+        """Retire une position fermee et son fichier de sauvegarde (thread-safe)"""
+        with self.state_lock:
+            self.positions.pop(token_address, None)
+            self.exits_in_flight.discard(token_address)
+        state_file = PROJECT_DIR / 'data' / f'position_{token_address}.json'
+        if state_file.exists():
+            state_file.unlink()
+        if self.wallet_state:
+            self.wallet_state.untrack(token_address)
+
+    def get_positions_snapshot(self) -> List[Tuple[str, Position]]:
+        """Copie de la liste des positions pour iteration hors verrou"""
+        with self.state_lock:
+            return list(self.positions.items())
+
+    def register_pending_tx(self, tx_hash: str, context: Dict):
+        """Confie une transaction envoyee a la tache de confirmation"""
+        context['tx_hash'] = tx_hash
+        context['hashes'] = [tx_hash]  # remplacements successifs (meme nonce)
+        context['bumps'] = 0
+        context['submitted_at'] = time.time()
+        with self.state_lock:
+            self.pending_txs[tx_hash] = context
+
+    def has_pending_tx(self, token_address: str, kind: str) -> bool:
+        """Vrai si une transaction (buy/sell) est en attente pour ce token"""
+        with self.state_lock:
+            return any(
+                ctx['kind'] == kind and ctx['token_address'] == token_address
+                for ctx in self.pending_txs.values()
+            )
+
+    def pending_buys(self) -> int:
+        """Achats envoyes, pas encore confirmes"""
+        with self.state_lock:
+            return sum(1 for ctx in self.pending_txs.values() if ctx['kind'] == 'buy')
+
+    def open_slots(self) -> int:
+        """Places libres pour une nouvelle position (achats en attente inclus)"""
+        pending_buys = self.pending_buys()
+        with self.state_lock:
+            return self.max_positions - len(self.positions) - pending_buys
+
+    def count_daily_trade(self):
+        """Achat effectif (confirme on-chain, ou simule): compte dans la limite quotidienne"""
+        self.daily_trades += 1
+        self.logger.info(
+            f"📈 Position {self.max_positions - self.open_slots()}/{self.max_positions} | "
+            f"Trades aujourd'hui: {self.daily_trades}/{self.max_trades_per_day}"
+        )
+
+    def get_candidate_rows(self, limit: int = 5) -> List[tuple]:
+        """Recupere les meilleurs tokens approuves frais (ordre score puis fraicheur)"""
+        conn = sqlite3.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-
-            # Recuperer TOP 5 tokens frais (pas expirés)
             cursor.execute("""
                 SELECT at.token_address, at.symbol, at.name, at.score,
                        dt.liquidity, dt.market_cap, dt.price_usd, dt.volume_24h,
@@ -348,12 +541,21 @@ class RealTrader:
                 )
                 AND datetime(at.created_at) > datetime('now', '-' || ? || ' hours')
                 ORDER BY at.score DESC, at.created_at DESC
-                LIMIT 5
-            """, (self.token_max_age_hours,))
-
-            rows = cursor.fetchall()
+                LIMIT ?
+            """, (self.token_max_age_hours, limit))
+            return cursor.fetchall()
+        finally:
             conn.close()
 
+    def get_next_token(self) -> Optional[Dict]:
+        """
+        Recupere le prochain token a trader avec priorisation par momentum
+        Récupère les 5 meilleurs candidats et choisit celui avec le meilleur momentum actuel
+        """
+        try:
+            # Recuperer TOP 5 tokens frais (pas expirés)
+            rows = self.get_candidate_rows(5)
+
             if not rows:
                 # Vérifier tokens expirés
                 conn = sqlite3.connect(self.db_path)
@@ -375,6 +577,11 @@ class RealTrader:
                     )
                 return None
 
+            # Données fraîches de tous les candidats en une requête
+            dex_by_token = self.dexscreener.get_tokens_info([
+                row[0] for row in rows if not self.is_token_in_cooldown(row[0])
+            ])
+
             # Calculer le momentum score pour chaque candidat
             candidates = []
             for row in rows:
@@ -398,7 +605,7 @@ class RealTrader:
                     continue
 
                 # Obtenir données fraîches pour momentum
-                dex_data = self.dexscreener.get_token_info(token_data['address'])
+                dex_data = dex_by_token.get(token_data['address'].lower())
                 if dex_data:
                     momentum_score = self.calculate_momentum_score(token_data, dex_data)
                     token_data['momentum_score'] = momentum_score
@@ -447,6 +654,8 @@ class RealTrader:
             if not dex_data:
                 return False, "Impossible d'obtenir données DexScreener", 0
 
+            token['dex_data'] = dex_data  # Paire a epingler sur la position
+
             # Récupérer le prix frais (CRITICAL pour éviter faux gains)
             fresh_price = dex_data.get('price_usd', 0)
             if fresh_price <= 0:
@@ -466,6 +675,8 @@ class RealTrader:
             self.logger.info(f"🍯 Vérification honeypot pour {token['symbol']}...")
             honeypot_result = self.honeypot_checker.check_token(token['address'], chain_id=8453)
 
+            cache_info = " (cache)" if honeypot_result.get('from_cache') else ""
+
             if honeypot_result.get('error'):
                 # Si l'API est down, logger mais ne pas bloquer (mode dégradé)
                 self.logger.warning(
@@ -479,14 +690,14 @@ class RealTrader:
                     f"Token dangereux: {flags} | "
                     f"Risk={honeypot_result['risk_level']} | "
                     f"Taxes: Buy={honeypot_result['buy_tax']:.1f}% Sell={honeypot_result['sell_tax']:.1f}% | "
-                    f"Can_Sell={honeypot_result['can_sell']}"
+                    f"Can_Sell={honeypot_result['can_sell']}{cache_info}"
                 ), 0
             else:
                 # Token safe
                 self.logger.info(
                     f"🛡️  Honeypot check PASSED: {token['symbol']} | "
                     f"Taxes: Buy={honeypot_result['buy_tax']:.1f}% Sell={honeypot_result['sell_tax']:.1f}% | "
-                    f"Risk={honeypot_result['risk_level']}"
+                    f"Risk={honeypot_result['risk_level']}{cache_info}"
                 )
 
             self.logger.info(
@@ -585,9 +796,11 @@ class RealTrader:
             return 50.0  # Score neutre par défaut
 
     def get_eth_balance(self) -> float:
-        """Recupere le balance ETH du wallet"""
+        """Recupere le balance ETH du wallet (memoire, RPC si inconnu)"""
         try:
-            balance_wei = self.web3_manager.w3.eth.get_balance(self.web3_manager.account.address)
+            balance_wei = self.wallet_state.get_eth_balance() if self.wallet_state else None
+            if balance_wei is None:
+                balance_wei = self.web3_manager.w3.eth.get_balance(self.web3_manager.account.address)
             return balance_wei / 10**18
         except Exception as e:
             self.logger.error(f"Erreur recuperation balance ETH: {e}")
@@ -603,12 +816,16 @@ class RealTrader:
         # 15% du capital disponible
         position_size = available * (self.position_size_percent / 100)
         
-        # Limiter entre 0.05 et 2 ETH
-        return max(0.05, min(2.0, position_size))
+        # Limiter entre 0.05 (MIN_POSITION_SIZE_ETH, aussi plancher des plans d'entree) et 2 ETH
+        return max(float(os.getenv('MIN_POSITION_SIZE_ETH', 0.05)), min(2.0, position_size))
         
     def get_token_balance(self, token_address: str) -> int:
-        """Recupere le balance exact d'un token"""
+        """Recupere le balance exact d'un token (memoire, RPC si inconnu)"""
         try:
+            balance = self.wallet_state.get_token_balance(token_address) if self.wallet_state else None
+            if balance is not None:
+                return balance
+
             token_contract = self.web3_manager.w3.eth.contract(
                 address=Web3.to_checksum_address(token_address),
                 abi=self.web3_manager.erc20_abi
@@ -682,7 +899,12 @@ class RealTrader:
                 self.save_position_state(position)
     
     def check_time_exit(self, position: Position) -> Tuple[bool, str]:
-        """Verifie si une position doit être fermee selon le temps ecoule"""
+        """
+        Verifie si une position doit être fermee selon le temps ecoule
+
+        Sans effet de bord (evaluee a chaque tick et a chaque swap): la sortie
+        est comptee dans close_position, une fois la vente confirmee.
+        """
         if not position.entry_time or position.entry_price == 0:
             return False, ""
         
@@ -693,23 +915,19 @@ class RealTrader:
         # Stagnation: 24h avec profit entre 0% et 5% (ne pas vendre si négatif!)
         if hours_held >= self.time_exit_config['stagnation']['hours']:
             if 0 < profit_percent < self.time_exit_config['stagnation']['min_profit']:
-                self.performance_metrics['time_exits'] += 1
                 return True, f"Stagnation ({hours_held:.0f}h, +{profit_percent:.1f}%)"
 
         # Low momentum: 48h avec profit entre 0% et 20% (ne pas vendre si négatif!)
         if hours_held >= self.time_exit_config['low_momentum']['hours']:
             if 0 < profit_percent < self.time_exit_config['low_momentum']['min_profit']:
-                self.performance_metrics['time_exits'] += 1
                 return True, f"Low momentum ({hours_held:.0f}h, +{profit_percent:.1f}%)"
         
         # Maximum: 72h force exit
         if hours_held >= self.time_exit_config['maximum']['hours']:
-            self.performance_metrics['time_exits'] += 1
             return True, f"Max time ({hours_held:.0f}h, +{profit_percent:.1f}%)"
         
         # Emergency: 120h force exit
         if hours_held >= self.time_exit_config['emergency']['hours']:
-            self.performance_metrics['time_exits'] += 1
             return True, f"Emergency ({hours_held:.0f}h)"
         
         return False, ""
@@ -739,8 +957,6 @@ class RealTrader:
         entry_price = fresh_price
             
         try:
-            weth_address = "0x4200000000000000000000000000000000000006"
-            
             if self.trading_mode == 'paper':
                 # Mode simulation
                 self.logger.info(
@@ -756,6 +972,7 @@ class RealTrader:
                     0.15  # 0.15 ETH simule (15%)
                 )
                 position.trailing_config = self.trailing_config
+                position.pin_pair(token.get('dex_data'))
 
                 # Log du grace period activé
                 self.logger.info(
@@ -763,11 +980,11 @@ class RealTrader:
                     f"3 minutes avec stop loss à -35% (puis -5%)"
                 )
 
-                self.positions[token['address']] = position
-                self.save_position_state(position)
+                self.add_position(position)
 
                 # Enregistrer dans la DB avec le prix frais
                 self.save_trade_to_db(token, 'BUY', entry_price, 0.15, 'paper')
+                self.count_daily_trade()
 
                 return True
                 
@@ -775,16 +992,28 @@ class RealTrader:
                 # Mode reel
                 self.logger.info(f"[REAL] Preparation achat: {token['symbol']}")
 
-                # Calculer la taille de position (15%)
-                position_size_eth = self.calculate_position_size()
-                position_size_wei = int(position_size_eth * 10**18)
+                # Plan d'entree precalcule: taille plafonnee par l'impact, fee tier, min-out
+                plan = self.entry_planner.get_plan(token['address'])
+                if plan is None:
+                    plan = self.entry_planner.plan(
+                        token['address'], Web3.to_wei(self.calculate_position_size(), 'ether')
+                    )
+                if plan is None:
+                    self.logger.warning(f"Pas de pool V3 cotable pour {token['symbol']} - achat annule")
+                    return False
+                if not plan['viable']:
+                    self.logger.warning(f"❌ {token['symbol']}: {plan['reason']}")
+                    self.add_token_to_cooldown(token['address'], token['symbol'], plan['reason'])
+                    return False
 
-                # Lire slippage depuis .env
-                slippage_percent = float(os.getenv('MAX_SLIPPAGE_PERCENT', 3))
-                slippage = slippage_percent / 100
+                position_size_wei = plan['amount_in']
+                position_size_eth = position_size_wei / 10**18
+                min_tokens_out = plan['min_amount_out']
+                fee_tier = plan['fee']
 
-                # Verifier le gas price avant d'executer
-                current_gas_price = self.web3_manager.w3.eth.gas_price
+                # Verifier le gas price avant d'executer (oracle en cache, sans RPC)
+                current_gas_price = self.fee_oracle.gas_price()
+                fees = self.fee_oracle.fee_params()
                 max_gas_price_gwei = float(os.getenv('MAX_GAS_PRICE_GWEI', 50))
                 max_gas_price_wei = int(max_gas_price_gwei * 10**9)
 
@@ -795,114 +1024,200 @@ class RealTrader:
                     )
                     return False
 
-                self.logger.info(f"⛽ Gas price: {current_gas_price/10**9:.1f} Gwei")
+                self.logger.info(f"⛽ Gas price: {current_gas_price/10**9:.3f} Gwei")
 
-                # CORRECTION: Calculer le nombre de tokens attendus pour position_size_wei ETH
-                # On achete des tokens avec de l'ETH, donc on envoie token['address'] pour obtenir son prix
-                # La fonction get_token_price retourne le prix en ETH pour 1 token
-                # On doit calculer combien de tokens on recevra pour position_size_wei ETH
+                self.logger.info(
+                    f"💰 Achat {position_size_eth:.4f} ETH "
+                    f"(budget {plan['budget'] / 10**18:.4f}) -> ~{plan['amount_out']} unites "
+                    f"{token['symbol']} | Pool {fee_tier / 10000:.2f}% | "
+                    f"Impact {plan['price_impact'] * 100:.2f}% | min: {min_tokens_out}"
+                )
 
-                # Methode correcte: utiliser le prix USD du token
-                eth_price_usd = self.coingecko.get_eth_price()
-                if eth_price_usd == 0:
-                    eth_price_usd = 3000  # Fallback
+                # Preparer la transaction (gas limit appris, GAS_LIMIT_BUY si route inconnue)
+                params = self.build_buy_swap_params(token['address'], plan)
+                gas_limit_buy = self.gas_estimator.gas_limit(
+                    token['address'], 'buy', fee_tier, int(os.getenv('GAS_LIMIT_BUY', 250000))
+                )
 
-                # Valeur de notre achat en USD
-                buy_value_usd = position_size_eth * eth_price_usd
+                # Construire, signer et envoyer (nonce distribue localement)
+                with self.nonce_manager.allocate() as (nonce,):
+                    swap_txn = self.router.functions.exactInputSingle(params).build_transaction({
+                        'from': self.web3_manager.account.address,
+                        'value': position_size_wei,
+                        'gas': gas_limit_buy,
+                        'nonce': nonce,
+                        **fees
+                    })
+
+                    signed_txn = self.web3_manager.account.sign_transaction(swap_txn)
+                    tx_hash = self.web3_manager.send_raw_transaction(signed_txn.rawTransaction)
+                self.nonce_manager.track(nonce, tx_hash.hex())
+
+                self.logger.info(f"Transaction envoyee: {tx_hash.hex()} (nonce {nonce})")
+
+                # La confirmation est suivie par la tache de confirmation (finalize_buy)
+                self.register_pending_tx(tx_hash.hex(), {
+                    'kind': 'buy',
+                    'token_address': token['address'],
+                    'token': token,
+                    'entry_price': entry_price,  # Prix frais de la re-validation
+                    'amount_eth': position_size_eth,
+                    'expected_tokens': plan['amount_out'],
+                    'gas_route': (token['address'], 'buy', fee_tier),
+                    'txn': swap_txn,
+                    'nonces': [nonce]
+                })
+                return True
 
-                # Nombre de tokens qu'on devrait recevoir
-                token_price_usd = token['price_usd']
-                if token_price_usd <= 0:
-                    self.logger.error(f"Prix token invalide: ${token_price_usd}")
-                    return False
+        except Exception as e:
+            self.logger.error(f"Erreur execution achat: {e}")
+            return False
 
-                expected_tokens = buy_value_usd / token_price_usd
+    def build_buy_swap_params(self, token_address: str, plan: Dict) -> Dict:
+        """Parametres exactInputSingle d'un achat selon son plan d'entree"""
+        weth_address = "0x4200000000000000000000000000000000000006"
+        return {
+            'tokenIn': Web3.to_checksum_address(weth_address),
+            'tokenOut': Web3.to_checksum_address(token_address),
+            'fee': plan['fee'],
+            'recipient': self.web3_manager.account.address,
+            'deadline': int(time.time()) + 300,  # 5 minutes
+            'amountIn': plan['amount_in'],
+            'amountOutMinimum': plan['min_amount_out'],
+            'sqrtPriceLimitX96': 0
+        }
 
-                # Appliquer slippage
-                min_tokens_out = int(expected_tokens * (1 - slippage))
+    def estimate_route_gas(self, token_address: str, direction: str, fee: int,
+                           params: Dict, value: int = 0) -> Optional[int]:
+        """
+        estimate_gas d'un swap hors du chemin critique (planification, apres
+        l'approve), enregistre comme echantillon de la route
+        """
+        try:
+            gas = self.router.functions.exactInputSingle(params).estimate_gas({
+                'from': self.web3_manager.account.address,
+                'value': value
+            })
+        except Exception as e:
+            self.logger.debug(f"Estimation gas {direction} {token_address} impossible: {e}")
+            return None
+        self.gas_estimator.record(token_address, direction, fee, gas, source='estimate')
+        return gas
+
+    def finalize_buy(self, context: Dict):
+        """Achat confirme on-chain: cree la position"""
+        token = context['token']
+        self.logger.info(f"✅ Achat reussi: {token['symbol']}")
+
+        # Quantite reellement recue (taxes incluses), estimation en secours
+        amount = self.get_token_balance(token['address']) or context['expected_tokens']
+
+        position = Position(
+            token['address'],
+            token['symbol'],
+            context['entry_price'],
+            amount,
+            context['amount_eth']
+        )
+        position.trailing_config = self.trailing_config
+        position.pin_pair(token.get('dex_data'))
 
-                self.logger.info(
-                    f"💰 Achat {position_size_eth:.4f} ETH (${buy_value_usd:.2f}) "
-                    f"-> ~{expected_tokens:.0f} {token['symbol']} "
-                    f"(min: {min_tokens_out:.0f} avec {slippage_percent}% slippage)"
-                )
+        # Log du grace period activé
+        self.logger.info(
+            f"🛡️ Grace period activé pour {token['symbol']}: "
+            f"3 minutes avec stop loss à -35% (puis -5%)"
+        )
 
-                # Preparer la transaction
-                deadline = int(time.time()) + 300  # 5 minutes
-
-                # Lire gas limit depuis .env
-                gas_limit_buy = int(os.getenv('GAS_LIMIT_BUY', 250000))
-
-                params = {
-                    'tokenIn': Web3.to_checksum_address(weth_address),
-                    'tokenOut': Web3.to_checksum_address(token['address']),
-                    'fee': 3000,  # 0.3%
-                    'recipient': self.web3_manager.account.address,
-                    'deadline': deadline,
-                    'amountIn': position_size_wei,
-                    'amountOutMinimum': min_tokens_out,
-                    'sqrtPriceLimitX96': 0
-                }
+        self.add_position(position)
 
-                # Construire la transaction
-                swap_txn = self.router.functions.exactInputSingle(params).build_transaction({
-                    'from': self.web3_manager.account.address,
-                    'value': position_size_wei,
-                    'gas': gas_limit_buy,
-                    'gasPrice': current_gas_price,
-                    'nonce': self.web3_manager.w3.eth.get_transaction_count(
-                        self.web3_manager.account.address
-                    )
-                })
-                
-                # Signer et envoyer
-                signed_txn = self.web3_manager.account.sign_transaction(swap_txn)
-                tx_hash = self.web3_manager.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-                
-                self.logger.info(f"Transaction envoyee: {tx_hash.hex()}")
-                
-                # Attendre confirmation
-                receipt = self.web3_manager.w3.eth.wait_for_transaction_receipt(tx_hash)
-                
-                if receipt['status'] == 1:
-                    self.logger.info(f"✅ Achat reussi: {token['symbol']}")
-
-                    # Creer la position avec le prix FRAIS
-                    position = Position(
-                        token['address'],
-                        token['symbol'],
-                        entry_price,  # Prix frais de la re-validation
-                        expected_amount,
-                        position_size_eth
-                    )
-                    position.trailing_config = self.trailing_config
+        # Enregistrer avec le prix frais
+        self.save_trade_to_db(
+            token, 'BUY', context['entry_price'],
+            context['amount_eth'], 'real', context['tx_hash']
+        )
+        # Un achat reverte ou abandonne ne consomme pas la limite quotidienne
+        self.count_daily_trade()
 
-                    # Log du grace period activé
-                    self.logger.info(
-                        f"🛡️ Grace period activé pour {token['symbol']}: "
-                        f"3 minutes avec stop loss à -35% (puis -5%)"
-                    )
+        # Approve du router des maintenant, hors du chemin critique de la sortie
+        self.send_approval(token['address'], int(amount))
+
+    def build_approve_txn(self, token_address: str, amount: int, nonce: int, fees: Dict) -> Dict:
+        """Transaction approve(router, amount) d'un token"""
+        approve_abi = json.loads('''[
+            {
+                "inputs": [
+                    {"name": "_spender", "type": "address"},
+                    {"name": "_value", "type": "uint256"}
+                ],
+                "name": "approve",
+                "outputs": [{"name": "", "type": "bool"}],
+                "type": "function"
+            }
+        ]''')
+
+        token_contract = self.web3_manager.w3.eth.contract(
+            address=Web3.to_checksum_address(token_address),
+            abi=approve_abi
+        )
+        return token_contract.functions.approve(
+            Web3.to_checksum_address(self.uniswap.router),
+            amount
+        ).build_transaction({
+            'from': self.web3_manager.account.address,
+            'gas': self.gas_estimator.gas_limit(token_address, 'approve', 0, 100000),
+            'nonce': nonce,
+            **fees
+        })
+
+    def send_approval(self, token_address: str, amount: int) -> bool:
+        """
+        Approve le router pour un token detenu, juste apres l'achat
+
+        L'allowance est notee dans le cache des l'envoi: une vente declenchee
+        avant la confirmation recoit un nonce superieur et passe donc apres
+        l'approve. Si l'approve echoue, le cache est oublie et la vente
+        repasse par approve + swap.
+        """
+        if self.allowances.sufficient(token_address, amount):
+            return True
+
+        approve_amount = MAX_UINT256 if self.approve_unlimited else amount
+        try:
+            fees = self.fee_oracle.fee_params()
+            with self.nonce_manager.allocate() as (nonce,):
+                approve_txn = self.build_approve_txn(token_address, approve_amount, nonce, fees)
+                signed_approve = self.web3_manager.account.sign_transaction(approve_txn)
+                approve_hash = self.web3_manager.send_raw_transaction(
+                    signed_approve.rawTransaction
+                )
+            self.nonce_manager.track(nonce, approve_hash.hex())
+            self.allowances.set(token_address, approve_amount)
+
+            self.logger.info(f"🔓 Approval anticipee envoyee: {approve_hash.hex()} (nonce {nonce})")
+            self.register_pending_tx(approve_hash.hex(), {
+                'kind': 'approve',
+                'token_address': token_address,
+                'gas_route': (token_address, 'approve', 0),
+                'txn': approve_txn,
+                'nonces': [nonce]
+            })
+            return True
 
-                    self.positions[token['address']] = position
-                    self.save_position_state(position)
-                    
-                    # Enregistrer avec le prix frais
-                    self.save_trade_to_db(
-                        token, 'BUY', entry_price,
-                        position_size_eth, 'real', tx_hash.hex()
-                    )
-                    
-                    return True
-                else:
-                    self.logger.error("Transaction echouee")
-                    return False
-                    
         except Exception as e:
-            self.logger.error(f"Erreur execution achat: {e}")
+            self.logger.error(f"Erreur approval anticipee {token_address}: {e}")
             return False
-            
-    def execute_sell(self, position: Position, reason: str) -> bool:
-        """Execute une vente complete avec approval et swap"""
+
+    def execute_sell(self, position: Position, reason: str, detected_at: float = None) -> bool:
+        """
+        Execute une vente complete (swap, precede d'un approval si necessaire)
+
+        En mode reel, retourne True des que le swap est envoye: la position
+        est fermee par finalize_sell() une fois la transaction confirmee.
+
+        Args:
+            detected_at: time.monotonic() de la detection d'un rug (sortie
+                d'urgence), pour mesurer la latence detection -> sortie
+        """
         if position.entry_price == 0:
             self.logger.error(f"Prix d'entree invalide pour {position.symbol}")
             return False
@@ -912,26 +1227,6 @@ class RealTrader:
             profit_percent = ((position.current_price - position.entry_price) / 
                             position.entry_price) * 100
             
-            # Mettre a jour les metriques
-            self.performance_metrics['total_trades'] += 1
-            if profit_percent > 0:
-                self.performance_metrics['winning_trades'] += 1
-            else:
-                self.performance_metrics['losing_trades'] += 1
-            
-            self.performance_metrics['total_profit_percent'] += profit_percent
-            
-            if profit_percent > self.performance_metrics['best_trade']:
-                self.performance_metrics['best_trade'] = profit_percent
-            if profit_percent < self.performance_metrics['worst_trade']:
-                self.performance_metrics['worst_trade'] = profit_percent
-            
-            # Compter le type de sortie
-            if "Trailing" in reason:
-                self.performance_metrics['trailing_exits'] += 1
-            elif "Stop Loss" in reason:
-                self.performance_metrics['stoploss_exits'] += 1
-            
             if self.trading_mode == 'paper':
                 # Mode simulation
                 self.logger.info(
@@ -940,25 +1235,24 @@ class RealTrader:
                     f"Raison: {reason}"
                 )
                 
-                self.save_sell_to_db(position, profit_percent, reason, 'paper')
-                del self.positions[position.token_address]
-                
-                # Supprimer le fichier de sauvegarde
-                state_file = PROJECT_DIR / 'data' / f'position_{position.token_address}.json'
-                if state_file.exists():
-                    state_file.unlink()
-
+                self.close_position(position, profit_percent, reason, 'paper')
+                if detected_at is not None:
+                    self.record_rug_latency(position, 'sortie', detected_at)
                 return True
                 
             else:
                 # Mode reel - Vente complete
+                if self.send_standby_exit(position, profit_percent, reason, detected_at):
+                    return True
+
                 self.logger.info(f"[REAL] Execution vente reelle: {position.symbol}")
-                
-                weth_address = "0x4200000000000000000000000000000000000006"
-                router_address = self.uniswap.router
-                
-                # Verifier le gas price avant d'executer
-                current_gas_price = self.web3_manager.w3.eth.gas_price
+
+                # Stop loss et rug: percentile de tip haut pour passer au prochain bloc
+                urgency = 'urgent' if "Stop Loss" in reason or detected_at is not None else 'normal'
+
+                # Verifier le gas price avant d'executer (oracle en cache, sans RPC)
+                current_gas_price = self.fee_oracle.gas_price(urgency)
+                fees = self.fee_oracle.fee_params(urgency)
                 max_gas_price_gwei = float(os.getenv('MAX_GAS_PRICE_GWEI', 50))
                 max_gas_price_wei = int(max_gas_price_gwei * 10**9)
 
@@ -967,244 +1261,531 @@ class RealTrader:
                         f"⛽ Gas price trop eleve: {current_gas_price/10**9:.1f} Gwei > "
                         f"{max_gas_price_gwei:.1f} Gwei - Vente reportee"
                     )
-                    # Ne pas vendre si gas trop cher, sauf si c'est une urgence (stop loss)
-                    if "Stop Loss" not in reason:
+                    # Ne pas vendre si gas trop cher, sauf si c'est une urgence (stop loss, rug)
+                    if "Stop Loss" not in reason and detected_at is None:
                         return False
 
-                self.logger.info(f"⛽ Gas price: {current_gas_price/10**9:.1f} Gwei")
-
-                # 1. APPROVE TOKEN POUR LE ROUTER
-                self.logger.info("etape 1: Approval du token pour le router")
-
-                approve_abi = json.loads('''[
-                    {
-                        "inputs": [
-                            {"name": "_spender", "type": "address"},
-                            {"name": "_value", "type": "uint256"}
-                        ],
-                        "name": "approve",
-                        "outputs": [{"name": "", "type": "bool"}],
-                        "type": "function"
-                    }
-                ]''')
-
-                token_contract = self.web3_manager.w3.eth.contract(
-                    address=Web3.to_checksum_address(position.token_address),
-                    abi=approve_abi
-                )
+                self.logger.info(f"⛽ Gas price: {current_gas_price/10**9:.3f} Gwei ({urgency})")
 
                 amount_to_sell = int(position.amount)
-
-                approve_txn = token_contract.functions.approve(
-                    Web3.to_checksum_address(router_address),
-                    amount_to_sell
-                ).build_transaction({
-                    'from': self.web3_manager.account.address,
-                    'gas': 100000,
-                    'gasPrice': current_gas_price,
-                    'nonce': self.web3_manager.w3.eth.get_transaction_count(
-                        self.web3_manager.account.address
-                    )
-                })
-                
-                signed_approve = self.web3_manager.account.sign_transaction(approve_txn)
-                approve_hash = self.web3_manager.w3.eth.send_raw_transaction(
-                    signed_approve.rawTransaction
-                )
-                
-                self.logger.info(f"Approval envoyee: {approve_hash.hex()}")
-                
-                approve_receipt = self.web3_manager.w3.eth.wait_for_transaction_receipt(
-                    approve_hash, timeout=120
-                )
-                
-                if approve_receipt['status'] != 1:
-                    self.logger.error("echec de l'approval")
-                    return False
-                    
-                self.logger.info("✅ Token approuve pour la vente")
-                
-                # 2. EXeCUTER LE SWAP TOKEN -> WETH
-                self.logger.info("etape 2: Swap token vers WETH")
-
-                # Lire slippage depuis .env
-                slippage_percent = float(os.getenv('MAX_SLIPPAGE_PERCENT', 3))
-                slippage = slippage_percent / 100
-
-                # Calculer le minimum acceptable
-                eth_price = self.coingecko.get_eth_price()
-                if eth_price == 0:
-                    eth_price = 3000  # Valeur par defaut si erreur API
-
-                expected_weth = (position.current_price * position.amount) / eth_price
-                min_weth_out = int(expected_weth * (1 - slippage) * 10**18)
+                swap_params, meta = self.build_sell_swap_params(position)
 
                 self.logger.info(
                     f"💰 Vente ~{position.amount:.0f} {position.symbol} "
-                    f"-> ~{expected_weth:.4f} ETH "
-                    f"(min: {min_weth_out/10**18:.4f} avec {slippage_percent}% slippage)"
+                    f"-> ~{meta['expected_weth']:.4f} ETH "
+                    f"(min: {meta['min_out']/10**18:.4f} avec {meta['slippage_percent']}% slippage)"
                 )
+                self.logger.info(f"🏊 Pool fee tier: {meta['fee'] / 10000:.2f}%")
+
+                # Allowance deja accordee (approve envoye apres l'achat): swap seul.
+                # Sinon approval puis swap a la suite (nonces n et n+1, sans appel
+                # RPC): le swap est mine juste apres l'approval, dans le meme bloc
+                needs_approval = not self.allowances.sufficient(position.token_address, amount_to_sell)
+                with self.nonce_manager.allocate(2 if needs_approval else 1) as nonces:
+                    swap_nonce = nonces[-1]
+                    if needs_approval:
+                        # 1. APPROVE TOKEN POUR LE ROUTER
+                        self.logger.info("etape 1: Approval du token pour le router")
+
+                        approve_txn = self.build_approve_txn(
+                            position.token_address, amount_to_sell, nonces[0], fees
+                        )
+                        signed_approve = self.web3_manager.account.sign_transaction(approve_txn)
+                        approve_hash = self.web3_manager.send_raw_transaction(
+                            signed_approve.rawTransaction
+                        )
 
-                deadline = int(time.time()) + 300  # 5 minutes
+                        self.logger.info(f"Approval envoyee: {approve_hash.hex()}")
+
+                        # Enregistree tout de suite: si le swap echoue, la prochaine
+                        # tentative ne renvoie pas d'approve (allowance connue)
+                        self.nonce_manager.track(nonces[0], approve_hash.hex())
+                        self.allowances.set(position.token_address, amount_to_sell)
+                        # Suivi (et remplacement si bloquee) comme toute transaction
+                        self.register_pending_tx(approve_hash.hex(), {
+                            'kind': 'approve',
+                            'token_address': position.token_address,
+                            'gas_route': (position.token_address, 'approve', 0),
+                            'txn': approve_txn,
+                            'nonces': [nonces[0]]
+                        })
+                    else:
+                        self.logger.info("Allowance deja accordee: swap seul")
+
+                    # 2. EXeCUTER LE SWAP TOKEN -> WETH
+                    self.logger.info("etape 2: Swap token vers WETH")
+
+                    swap_txn = self.router.functions.exactInputSingle(
+                        swap_params
+                    ).build_transaction({
+                        'from': self.web3_manager.account.address,
+                        'gas': meta['gas_limit'],
+                        'nonce': swap_nonce,
+                        **fees
+                    })
+
+                    signed_swap = self.web3_manager.account.sign_transaction(swap_txn)
+                    swap_hash = self.web3_manager.send_raw_transaction(
+                        signed_swap.rawTransaction
+                    )
 
-                # Lire gas limit depuis .env
-                gas_limit_sell = int(os.getenv('GAS_LIMIT_SELL', 300000))
+                self.nonce_manager.track(swap_nonce, swap_hash.hex())
 
-                swap_params = {
-                    'tokenIn': Web3.to_checksum_address(position.token_address),
-                    'tokenOut': Web3.to_checksum_address(weth_address),
-                    'fee': 3000,
-                    'recipient': self.web3_manager.account.address,
-                    'deadline': deadline,
-                    'amountIn': amount_to_sell,
-                    'amountOutMinimum': min_weth_out,
-                    'sqrtPriceLimitX96': 0
-                }
+                self.logger.info(
+                    f"Swap envoye: {swap_hash.hex()} (nonces {'/'.join(map(str, nonces))})"
+                )
+                if detected_at is not None:
+                    self.record_rug_latency(position, 'envoi', detected_at)
 
-                swap_txn = self.router.functions.exactInputSingle(
-                    swap_params
-                ).build_transaction({
-                    'from': self.web3_manager.account.address,
-                    'gas': gas_limit_sell,
-                    'gasPrice': current_gas_price,
-                    'nonce': self.web3_manager.w3.eth.get_transaction_count(
-                        self.web3_manager.account.address
-                    )
+                # La confirmation est suivie par la tache de confirmation (finalize_sell)
+                self.register_pending_tx(swap_hash.hex(), {
+                    'kind': 'sell',
+                    'token_address': position.token_address,
+                    'position': position,
+                    'profit_percent': profit_percent,
+                    'reason': reason,
+                    'detected_at': detected_at,
+                    'amount_in': amount_to_sell,
+                    'gas_route': (position.token_address, 'sell', meta['fee']),
+                    'txn': swap_txn,
+                    'nonces': [swap_nonce]
                 })
-                
-                signed_swap = self.web3_manager.account.sign_transaction(swap_txn)
-                swap_hash = self.web3_manager.w3.eth.send_raw_transaction(
-                    signed_swap.rawTransaction
-                )
-                
-                self.logger.info(f"Swap envoye: {swap_hash.hex()}")
-                
-                swap_receipt = self.web3_manager.w3.eth.wait_for_transaction_receipt(
-                    swap_hash, timeout=120
-                )
-                
-                if swap_receipt['status'] == 1:
-                    self.logger.info(
-                        f"✅ Vente reussie: {position.symbol} | "
-                        f"Profit: {profit_percent:.2f}% | "
-                        f"TX: {swap_hash.hex()}"
-                    )
-                    
-                    self.save_sell_to_db(position, profit_percent, reason, 'real', swap_hash.hex())
-                    
-                    del self.positions[position.token_address]
-                    
-                    # Supprimer le fichier de sauvegarde
-                    state_file = PROJECT_DIR / 'data' / f'position_{position.token_address}.json'
-                    if state_file.exists():
-                        state_file.unlink()
-                        
-                    return True
-                else:
-                    self.logger.error(f"echec du swap: {swap_receipt}")
-                    return False
-                    
+                return True
+
         except Exception as e:
             self.logger.error(f"Erreur vente: {e}")
             if 'position' in locals():
                 self.save_position_state(position)
             return False
-                       
-    def update_positions(self):
-        """Met a jour toutes les positions avec checks complets et retry"""
-        for address, position in list(self.positions.items()):
-            try:
-                # Recuperer le prix actuel avec retry
-                dex_data = None
-                max_retries = 3
-                
-                for attempt in range(max_retries):
-                    try:
-                        dex_data = self.dexscreener.get_token_info(address)
-                        if dex_data:
-                            break
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            self.logger.error(f"Impossible de recuperer le prix apres {max_retries} tentatives: {e}")
-                        else:
-                            self.logger.warning(f"Tentative {attempt + 1}/{max_retries} echouee, retry dans 2s")
-                            time.sleep(2)
-                
-                if dex_data:
-                    new_price = dex_data.get('price_usd', position.current_price)
-
-                    # Validation du prix: ne peut pas varier de plus de 1000x par rapport au prix d'entrée
-                    if new_price > 0 and position.entry_price > 0:
-                        price_change_ratio = new_price / position.entry_price
-                        if price_change_ratio > 1000 or price_change_ratio < 0.001:
-                            self.logger.warning(
-                                f"⚠️ Prix aberrant pour {position.symbol}: "
-                                f"Entry=${position.entry_price:.8f}, New=${new_price:.8f} "
-                                f"(ratio: {price_change_ratio:.1f}x) - Prix ignoré"
-                            )
-                            # Garder le dernier prix connu
-                        else:
-                            position.current_price = new_price
-                    else:
-                        position.current_price = new_price
 
-                    # Protection contre division par zero
-                    if position.entry_price == 0:
-                        self.logger.error(f"Prix d'entree invalide pour {position.symbol}")
-                        continue
-                        
-                    # Calculer le profit actuel
-                    profit_percent = ((position.current_price - position.entry_price) /
-                                    position.entry_price) * 100
-
-                    # 1. Verifier TIME EXIT
-                    should_exit, exit_reason = self.check_time_exit(position)
-                    if should_exit:
-                        self.logger.info(f"⏱️ Time exit: {exit_reason}")
-                        self.execute_sell(position, exit_reason)
-                        continue
+    def get_eth_usd(self) -> float:
+        """
+        Prix ETH/USD de la pool de reference on-chain (deja tenu par le monitor et
+        le flux de swaps, sinon un slot0), CoinGecko en dernier recours
+        """
+        try:
+            return self.onchain_pricer.get_eth_usd(self.eth_usd_max_age)
+        except Exception as e:
+            if self.onchain_pricer.eth_usd:
+                self.logger.warning(f"Prix ETH on-chain non rafraichi ({e}) - derniere valeur")
+                return self.onchain_pricer.eth_usd
+            self.logger.warning(f"Prix ETH on-chain indisponible ({e}) - CoinGecko")
+        eth_price = self.coingecko.get_eth_price()
+        if not eth_price:
+            raise RuntimeError("Prix ETH/USD indisponible")
+        return eth_price
+
+    def build_sell_swap_params(self, position: Position, price: float = None) -> Tuple[Dict, Dict]:
+        """
+        Parametres exactInputSingle de la vente complete d'une position
 
-                    # 2. Verifier STOP LOSS avec GRACE PERIOD
-                    active_stop_loss = position.get_active_stop_loss_percent()
-
-                    # Log si transition du grace period
-                    if hasattr(position, 'grace_period_active') and position.grace_period_active:
-                        time_in_position = (datetime.now() - position.entry_time).total_seconds() / 60
-                        if time_in_position >= position.grace_period_minutes:
-                            self.logger.info(
-                                f"⏰ {position.symbol} - Grace period terminé "
-                                f"(3 min écoulées) - Stop loss activé à -5%"
-                            )
-                            position.grace_period_active = False
-
-                    if profit_percent <= -active_stop_loss:
-                        in_grace = position.is_in_grace_period() if hasattr(position, 'is_in_grace_period') else False
-                        grace_status = " (Grace Period)" if in_grace else ""
-                        self.logger.info(
-                            f"🛑 Stop Loss{grace_status}: {profit_percent:.1f}% "
-                            f"(seuil: -{active_stop_loss:.0f}%)"
-                        )
-                        self.execute_sell(position, f"Stop Loss ({profit_percent:.1f}%){grace_status}")
-                        continue
-                    
-                    # 3. Mettre a jour TRAILING STOP
-                    self.update_trailing_stop(position)
-                    
-                    # 4. Verifier TRAILING STOP
-                    if position.trailing_active and position.current_price <= position.stop_loss:
-                        self.logger.info(
-                            f"📉 Trailing Stop: {position.symbol} | "
-                            f"Niveau {position.current_level} | "
-                            f"Profit final: {profit_percent:.1f}%"
-                        )
-                        self.execute_sell(position, f"Trailing Stop L{position.current_level}")
+        Args:
+            price: prix du minimum de sortie (defaut: prix courant)
+        """
+        price = price or position.current_price
+        weth_address = "0x4200000000000000000000000000000000000006"
+        amount_to_sell = int(position.amount)
+
+        # Lire slippage depuis .env
+        slippage_percent = float(os.getenv('MAX_SLIPPAGE_PERCENT', 3))
+        slippage = slippage_percent / 100
+
+        # Calculer le minimum acceptable
+        eth_price = self.get_eth_usd()
+
+        expected_weth = (price * position.amount) / eth_price
+        min_weth_out = int(expected_weth * (1 - slippage) * 10**18)
+
+        # Fee tier deja releve (pas d'appel reseau sur le chemin de sortie)
+        fee_tier = self.pool_registry.best_fee_tier(position.token_address, max_age=None)
+
+        swap_params = {
+            'tokenIn': Web3.to_checksum_address(position.token_address),
+            'tokenOut': Web3.to_checksum_address(weth_address),
+            'fee': fee_tier,
+            'recipient': self.web3_manager.account.address,
+            'deadline': int(time.time()) + 300,  # 5 minutes
+            'amountIn': amount_to_sell,
+            'amountOutMinimum': min_weth_out,
+            'sqrtPriceLimitX96': 0
+        }
+        return swap_params, {
+            'amount_in': amount_to_sell,
+            'min_out': min_weth_out,
+            'expected_weth': expected_weth,
+            'slippage_percent': slippage_percent,
+            'fee': fee_tier,
+            # Gas limit appris, GAS_LIMIT_SELL si route inconnue
+            'gas_limit': self.gas_estimator.gas_limit(
+                position.token_address, 'sell', fee_tier, int(os.getenv('GAS_LIMIT_SELL', 300000))
+            ),
+            'price': price
+        }
+
+    def estimate_exit_gas(self, token_address: str):
+        """Premier echantillon de gas de la sortie d'une position (apres l'approve)"""
+        with self.state_lock:
+            position = self.positions.get(token_address)
+        if position is None:
+            return
+        swap_params, meta = self.build_sell_swap_params(position)
+        if not self.gas_estimator.known(token_address, 'sell', meta['fee']):
+            self.estimate_route_gas(token_address, 'sell', meta['fee'], swap_params)
+
+    def build_sell_swap_txn(self, token_address: str, nonce: int, fees: Dict,
+                            floor_price: float) -> Tuple[Dict, Dict]:
+        """Transaction de vente complete d'une position, minimum au prix plancher (pour ExitStandby)"""
+        with self.state_lock:
+            position = self.positions[token_address]
+        swap_params, meta = self.build_sell_swap_params(position, floor_price)
+        swap_txn = self.router.functions.exactInputSingle(swap_params).build_transaction({
+            'from': self.web3_manager.account.address,
+            'gas': meta['gas_limit'],
+            'nonce': nonce,
+            **fees
+        })
+        return swap_txn, meta
+
+    def refresh_exit_standby(self) -> int:
+        """Re-signe les sorties des positions dont stop, gas ou nonce ont bouge"""
+        with self.state_lock:
+            held = [
+                (address, position.get_stop_price(), int(position.amount))
+                for address, position in self.positions.items()
+                if address not in self.exits_in_flight
+                and self.allowances.sufficient(address, int(position.amount))
+            ]
+        # Les sorties pre-signees servent aux stops: frais urgents
+        return self.exit_standby.refresh(held, self.fee_oracle.fee_params('urgent'))
+
+    def send_standby_exit(self, position: Position, profit_percent: float, reason: str,
+                          detected_at: float = None) -> bool:
+        """
+        Diffuse la sortie pre-signee d'une position, si elle est encore valable
+
+        Returns:
+            False si aucune sortie pre-signee n'est utilisable (chemin normal)
+        """
+        if not self.exit_standby_enabled or self.exit_standby is None:
+            return False
+        max_gas_price_wei = int(float(os.getenv('MAX_GAS_PRICE_GWEI', 50)) * 10**9)
+        if ("Stop Loss" not in reason and detected_at is None
+                and self.fee_oracle.gas_price() > max_gas_price_wei):
+            return False  # le chemin normal reporte la vente
+
+        started_at = time.perf_counter()
+        # Alerte de rug: le prix n'a pas encore bouge, seul le plancher compte
+        entry = self.exit_standby.take(
+            position.token_address, position.current_price, int(position.amount), started_at,
+            urgent=detected_at is not None
+        )
+        if entry is None:
+            return False
+
+        try:
+            swap_hash = self.web3_manager.send_raw_transaction(entry['raw'])
+        except Exception as e:
+            self.nonce_manager.invalidate()
+            self.logger.warning(f"Sortie pre-signee refusee ({e}) - envoi classique")
+            return False
+        broadcast_ms = (time.perf_counter() - started_at) * 1000
+
+        self.nonce_manager.track(entry['nonce'], swap_hash.hex())
+        self.logger.info(
+            f"⚡ Sortie pre-signee envoyee: {position.symbol} | {swap_hash.hex()} "
+            f"(nonce {entry['nonce']}) | pret en {self.exit_standby.latencies[-1]:.2f}ms, "
+            f"diffuse en {broadcast_ms:.1f}ms"
+        )
+        if detected_at is not None:
+            self.record_rug_latency(position, 'envoi', detected_at)
+
+        self.register_pending_tx(swap_hash.hex(), {
+            'kind': 'sell',
+            'token_address': position.token_address,
+            'position': position,
+            'profit_percent': profit_percent,
+            'reason': reason,
+            'detected_at': detected_at,
+            'amount_in': entry['amount_in'],
+            'gas_route': (position.token_address, 'sell', entry['fee']),
+            'txn': entry['txn'],
+            'nonces': [entry['nonce']]
+        })
+        return True
+
+    def finalize_sell(self, context: Dict):
+        """Vente confirmee on-chain: ferme la position"""
+        position = context['position']
+        self.logger.info(
+            f"✅ Vente reussie: {position.symbol} | "
+            f"Profit: {context['profit_percent']:.2f}% | "
+            f"TX: {context['tx_hash']}"
+        )
+        self.close_position(position, context['profit_percent'], context['reason'],
+                            'real', context['tx_hash'])
+        self.allowances.consume(position.token_address, context.get('amount_in', 0))
+        if context.get('detected_at') is not None:
+            self.record_rug_latency(position, 'confirmation', context['detected_at'])
+
+    def record_rug_latency(self, position: Position, stage: str, detected_at: float):
+        """Latence detection du retrait de liquidite -> etape de la sortie d'urgence"""
+        latency_ms = (time.monotonic() - detected_at) * 1000
+        samples = self.rug_exit_latencies.setdefault(stage, [])
+        samples.append(latency_ms)
+        del samples[:-100]
+        ordered = sorted(samples)
+        self.logger.warning(
+            f"🚨 {position.symbol}: detection → {stage} en {latency_ms:.0f} ms | "
+            f"mediane {ordered[len(ordered) // 2]:.0f} ms, max {ordered[-1]:.0f} ms "
+            f"({len(ordered)} sorties)"
+        )
+
+    def close_position(self, position: Position, profit_percent: float, reason: str,
+                       mode: str, tx_hash: str = ''):
+        """Enregistre la sortie (metriques + DB) et retire la position"""
+        # Mettre a jour les metriques
+        self.performance_metrics['total_trades'] += 1
+        if profit_percent > 0:
+            self.performance_metrics['winning_trades'] += 1
+        else:
+            self.performance_metrics['losing_trades'] += 1
+
+        self.performance_metrics['total_profit_percent'] += profit_percent
+
+        if profit_percent > self.performance_metrics['best_trade']:
+            self.performance_metrics['best_trade'] = profit_percent
+        if profit_percent < self.performance_metrics['worst_trade']:
+            self.performance_metrics['worst_trade'] = profit_percent
+
+        # Compter le type de sortie
+        if "Trailing" in reason:
+            self.performance_metrics['trailing_exits'] += 1
+        elif "Stop Loss" in reason:
+            self.performance_metrics['stoploss_exits'] += 1
+        elif "Rug" in reason:
+            self.performance_metrics['rug_exits'] += 1
+        elif reason.startswith(TIME_EXIT_REASONS):
+            self.performance_metrics['time_exits'] += 1
+
+        self.save_sell_to_db(position, profit_percent, reason, mode, tx_hash)
+        self.remove_position(position.token_address)
+
+    def apply_price_data(self, position: Position, dex_data: Dict):
+        """Applique un prix DexScreener a une position (prix aberrants ignores)"""
+        new_price = dex_data.get('price_usd', position.current_price)
+
+        # Validation du prix: ne peut pas varier de plus de 1000x par rapport au prix d'entrée
+        if new_price > 0 and position.entry_price > 0:
+            price_change_ratio = new_price / position.entry_price
+            if price_change_ratio > 1000 or price_change_ratio < 0.001:
+                self.logger.warning(
+                    f"⚠️ Prix aberrant pour {position.symbol}: "
+                    f"Entry=${position.entry_price:.8f}, New=${new_price:.8f} "
+                    f"(ratio: {price_change_ratio:.1f}x) - Prix ignoré"
+                )
+                # Garder le dernier prix connu
+            else:
+                position.current_price = new_price
+        else:
+            position.current_price = new_price
+
+    def schedule_price_retry(self, address: str, symbol: str, error: str):
+        """Backoff exponentiel avec jitter: la position est simplement sautee jusque-la"""
+        failures = self.price_retry.get(address, (0, 0))[0] + 1
+        delay = min(self.price_retry_max_delay, self.price_retry_base_delay * 2 ** (failures - 1))
+        delay *= random.uniform(0.5, 1.5)
+        self.price_retry[address] = (failures, time.monotonic() + delay)
+        self.logger.warning(
+            f"Prix indisponible pour {symbol} (echec {failures}: {error}) - "
+            f"nouvel essai dans {delay:.1f}s, dernier prix connu conserve"
+        )
+
+    def harvest_price_batch(self, positions: Dict[str, Position]):
+        """Applique la requete de prix terminee (y compris celle d'un tick precedent)"""
+        if self.price_batch is None or not self.price_batch.done():
+            return
+        future, requested = self.price_batch, self.price_batch_addresses
+        self.price_batch = None
+
+        try:
+            results = future.result()
+            error = "pas de donnees"
+        except Exception as e:
+            results = {}
+            error = str(e)
+
+        for address in requested:
+            position = positions.get(address)
+            if position is None:
+                # Position fermee entre-temps
+                self.price_retry.pop(address, None)
+                continue
+
+            dex_data = results.get(address.lower())
+            if not dex_data:
+                self.schedule_price_retry(address, position.symbol, error)
+                continue
+
+            self.price_retry.pop(address, None)
+            self.apply_price_data(position, dex_data)
+            self.update_pair_pin(position, dex_data)
+
+    def update_pair_pin(self, position: Position, dex_data: Dict):
+        """Epingle la paire resolue, ou la libere si sa liquidite a bouge fortement"""
+        pair_address = dex_data.get('pair_address')
+        if not pair_address:
+            return
+
+        if position.pair_address is None or pair_address.lower() != position.pair_address.lower():
+            # Resolution par token (entree ou re-selection): epingler la meilleure paire
+            if position.pair_address:
+                self.logger.info(f"📌 {position.symbol}: nouvelle paire {pair_address}")
+            position.pin_pair(dex_data)
+            self.save_position_state(position)
+            return
+
+        liquidity = dex_data.get('liquidity_usd', 0)
+        pinned = position.pair_liquidity_usd
+        if pinned > 0 and abs(liquidity - pinned) / pinned * 100 >= self.pair_repin_liquidity_change:
+            # Re-selection de la meilleure paire au prochain tick (endpoint /tokens/)
+            self.logger.info(
+                f"📌 {position.symbol}: liquidite de la paire ${pinned:,.0f} → ${liquidity:,.0f} - "
+                f"re-selection de la meilleure paire"
+            )
+            position.pair_address = None
+            self.save_position_state(position)
+
+    def fetch_prices(self, requested: Dict[str, Optional[str]]) -> Dict[str, Dict]:
+        """
+        Donnees de prix des positions (bloquant, appele hors boucle)
+
+        Source principale PRICE_SOURCE, puis PRICE_SOURCE_FALLBACK pour les
+        tokens que la premiere n'a pas su prixer.
+
+        Args:
+            requested: {token_address: paire epinglee ou None}
+
+        Returns:
+            {token_address (minuscules): donnees de prix}
+        """
+        results = {}
+        for source in self.price_sources:
+            missing = {t: p for t, p in requested.items() if t.lower() not in results}
+            if not missing:
+                break
+            try:
+                if source == 'onchain':
+                    results.update(self.onchain_pricer.get_prices(missing))
                 else:
-                    self.logger.warning(f"Pas de donnees de prix pour {position.symbol}, utilisation du dernier prix connu")
-                        
+                    results.update(self.fetch_dexscreener_prices(missing))
             except Exception as e:
-                self.logger.error(f"Erreur update position {address}: {e}")
-                # Sauvegarder l'etat en cas d'erreur
-                self.save_position_state(position)
+                self.logger.warning(f"Source de prix {source} indisponible: {e}")
+        return results
+
+    def fetch_dexscreener_prices(self, requested: Dict[str, Optional[str]]) -> Dict[str, Dict]:
+        """Prix DexScreener: /pairs pour les paires epinglees, /tokens/ sinon"""
+        results = {}
+        pinned = {pair.lower(): token for token, pair in requested.items() if pair}
+        if pinned:
+            for pair_address, data in self.price_dexscreener.get_pairs_info(list(pinned)).items():
+                results[pinned[pair_address].lower()] = data
+
+        # Paires non epinglees (ou absentes de la reponse): meilleure paire du token
+        unresolved = [token for token in requested if token.lower() not in results]
+        if unresolved:
+            results.update(self.price_dexscreener.get_tokens_info(unresolved))
+        return results
+
+    async def refresh_prices(self, positions: Dict[str, Position]):
+        """
+        Rafraichit toutes les positions en un seul lot, dans le budget du tick
+
+        DexScreener: les paires epinglees passent par /pairs (reponse limitee a
+        ces paires), les autres par /tokens/ qui resout la meilleure.
+        On-chain: slot0() de toutes les pools en un multicall.
+
+        Les positions en attente de retry sont exclues du lot. Une reponse
+        arrivee apres l'echeance reste en vol et est appliquee au tick suivant.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.price_batch is None:
+            now = time.monotonic()
+            due = [a for a in positions if self.price_retry.get(a, (0, 0))[1] <= now]
+            if due:
+                self.price_batch_addresses = due
+                self.price_batch = loop.run_in_executor(
+                    self.price_executor, self.fetch_prices,
+                    {address: positions[address].pair_address for address in due}
+                )
+
+        if self.price_batch is not None:
+            done, _ = await asyncio.wait({self.price_batch}, timeout=self.monitor_tick_budget)
+            if not done:
+                self.logger.warning(
+                    f"⏱️ Prix en retard (> {self.monitor_tick_budget:.1f}s) - "
+                    f"derniers prix connus utilises, reponse appliquee au prochain tick"
+                )
+
+        self.harvest_price_batch(positions)
+
+    def evaluate_position(self, position: Position) -> Optional[str]:
+        """
+        Applique time exit, stop loss et trailing stop au dernier prix connu
+
+        Returns:
+            Raison de sortie si la position doit etre vendue, sinon None
+        """
+        # Protection contre division par zero
+        if position.entry_price == 0:
+            self.logger.error(f"Prix d'entree invalide pour {position.symbol}")
+            return None
+
+        # Calculer le profit actuel
+        profit_percent = ((position.current_price - position.entry_price) /
+                        position.entry_price) * 100
+
+        # 1. Verifier TIME EXIT
+        should_exit, exit_reason = self.check_time_exit(position)
+        if should_exit:
+            self.logger.info(f"⏱️ Time exit: {exit_reason}")
+            return exit_reason
+
+        # 2. Verifier STOP LOSS avec GRACE PERIOD
+        active_stop_loss = position.get_active_stop_loss_percent()
+
+        # Log si transition du grace period
+        if hasattr(position, 'grace_period_active') and position.grace_period_active:
+            time_in_position = (datetime.now() - position.entry_time).total_seconds() / 60
+            if time_in_position >= position.grace_period_minutes:
+                self.logger.info(
+                    f"⏰ {position.symbol} - Grace period terminé "
+                    f"(3 min écoulées) - Stop loss activé à -5%"
+                )
+                position.grace_period_active = False
+
+        if profit_percent <= -active_stop_loss:
+            in_grace = position.is_in_grace_period() if hasattr(position, 'is_in_grace_period') else False
+            grace_status = " (Grace Period)" if in_grace else ""
+            self.logger.info(
+                f"🛑 Stop Loss{grace_status}: {profit_percent:.1f}% "
+                f"(seuil: -{active_stop_loss:.0f}%)"
+            )
+            return f"Stop Loss ({profit_percent:.1f}%){grace_status}"
+
+        # 3. Mettre a jour TRAILING STOP
+        self.update_trailing_stop(position)
+
+        # 4. Verifier TRAILING STOP
+        if position.trailing_active and position.current_price <= position.stop_loss:
+            self.logger.info(
+                f"📉 Trailing Stop: {position.symbol} | "
+                f"Niveau {position.current_level} | "
+                f"Profit final: {profit_percent:.1f}%"
+            )
+            return f"Trailing Stop L{position.current_level}"
+
+        return None
 
     def save_trade_to_db(self, token: Dict, action: str, price: float,
                          amount_eth: float, mode: str, tx_hash: str = ''):
@@ -1302,20 +1883,524 @@ class RealTrader:
             f"Worst: {self.performance_metrics['worst_trade']:.1f}% | "
             f"Time Exits: {self.performance_metrics['time_exits']} | "
             f"Trailing: {self.performance_metrics['trailing_exits']} | "
-            f"Stop Loss: {self.performance_metrics['stoploss_exits']}"
+            f"Stop Loss: {self.performance_metrics['stoploss_exits']} | "
+            f"Rug: {self.performance_metrics['rug_exits']}"
         )
     
     def cleanup(self):
         """Nettoie les ressources"""
+        if hasattr(self, 'honeypot_prefetcher'):
+            self.honeypot_prefetcher.stop()
+        if hasattr(self, 'price_executor'):
+            self.price_executor.shutdown(wait=False, cancel_futures=True)
         if hasattr(self, 'dexscreener'):
             self.dexscreener.close()
+        if hasattr(self, 'web3_manager'):
+            for stat in self.web3_manager.broadcaster.stats():
+                if stat['sent']:
+                    self.logger.info(
+                        f"📡 {stat['endpoint']}{' (prive)' if stat['private'] else ''}: "
+                        f"{stat['sent']} envois, {stat['errors']} erreurs, {stat['delivered']} livrees | "
+                        f"accuse {stat['ack_median_ms'] or 0:.0f}ms | "
+                        f"inclusion {stat['inclusion_median_ms'] or 0:.0f}ms"
+                        f"{'' if stat['active'] else ' | retire'}"
+                    )
+            self.web3_manager.broadcaster.shutdown()
+        if hasattr(self, 'price_dexscreener'):
+            self.price_dexscreener.close()
         if hasattr(self, 'coingecko'):
             self.coingecko.close()
         if hasattr(self, 'honeypot_checker'):
             self.honeypot_checker.close()
+        if hasattr(self, 'web3_manager'):
+            self.web3_manager.bytecode_screener.close()
        
-    def run(self):
-        """Boucle principale avec monitoring 1 seconde"""
+    def reload_trading_mode(self):
+        """Relit le mode de trading (bascule paper/real a chaud)"""
+        mode_file = PROJECT_DIR / 'config' / 'trading_mode.json'
+        if mode_file.exists():
+            try:
+                with open(mode_file, 'r') as f:
+                    data = json.load(f)
+                    new_mode = data.get('mode', 'paper')
+                    if new_mode != self.trading_mode:
+                        self.logger.info(f"🔄 Mode change: {self.trading_mode} → {new_mode}")
+                        self.trading_mode = new_mode
+            except Exception as e:
+                self.logger.error(f"Erreur lecture mode: {e}")
+
+    def log_positions_status(self):
+        """Log rapide de l'etat des positions"""
+        for addr, pos in self.get_positions_snapshot():
+            if pos.entry_price > 0:
+                profit = ((pos.current_price - pos.entry_price) /
+                        pos.entry_price) * 100
+                hours = (datetime.now() - pos.entry_time).total_seconds() / 3600
+                minutes = hours * 60
+
+                # Déterminer le statut avec grace period
+                if hasattr(pos, 'is_in_grace_period') and pos.is_in_grace_period():
+                    time_left = pos.grace_period_minutes - minutes
+                    status = f"🛡️ Grace ({time_left:.1f}min)"
+                    stop_info = f"SL: -35%"
+                elif pos.trailing_active:
+                    status = "📈 Trailing"
+                    stop_info = f"Stop: ${pos.stop_loss:.8f}"
+                else:
+                    status = "⏳ Attente"
+                    stop_info = f"SL: -5%"
+
+                self.logger.info(
+                    f"{status} {pos.symbol}: "
+                    f"{profit:+.1f}% | "
+                    f"{hours:.1f}h | "
+                    f"{stop_info}"
+                )
+
+    def dispatch_exit(self, position: Position, reason: str):
+        """Confie une vente a exit_task (une seule vente en vol par position)"""
+        with self.state_lock:
+            if position.token_address in self.exits_in_flight:
+                return
+            self.exits_in_flight.add(position.token_address)
+        self.exit_queue.put_nowait((position, reason))
+
+    def dispatch_emergency_exit(self, position: Position, reason: str, detected_at: float):
+        """Vente d'urgence immediate, sans passer par la file de exit_task"""
+        with self.state_lock:
+            if position.token_address in self.exits_in_flight:
+                return
+            self.exits_in_flight.add(position.token_address)
+        task = asyncio.create_task(self.run_exit(position, reason, detected_at))
+        self.emergency_exits.add(task)
+        task.add_done_callback(self.emergency_exits.discard)
+
+    def get_receipt(self, tx_hash: str) -> Optional[Dict]:
+        """Recu d'une transaction, None si pas encore minee"""
+        try:
+            return self.web3_manager.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def track_pending_tx(self, context: Dict, block_number: int):
+        """Nouveau bloc: recu de la transaction, remplacement si bloquee, abandon au delai"""
+        for tx_hash in reversed(context['hashes']):
+            receipt = self.get_receipt(tx_hash)
+            if receipt is not None:
+                context['tx_hash'] = tx_hash
+                self.resolve_pending_tx(context, receipt)
+                return
+
+        if time.time() - context['submitted_at'] >= self.tx_confirmation_timeout:
+            self.resolve_pending_tx(context, None)
+            return
+
+        context.setdefault('sent_block', block_number)
+        if block_number - context['sent_block'] >= self.tx_bump_after_blocks:
+            self.bump_pending_tx(context, block_number)
+
+    def bump_pending_tx(self, context: Dict, block_number: int):
+        """Remplace une transaction bloquee: meme nonce, frais EIP-1559 releves"""
+        if 'txn' not in context or context['bumps'] >= self.tx_max_bumps:
+            return
+
+        market_tip = self.fee_oracle.tip('urgent')
+        fees = replacement_fees(context['txn'], self.fee_oracle.base_fee, market_tip,
+                                self.tx_bump_multiplier)
+        if fees['maxFeePerGas'] > self.tx_bump_max_fee_wei:
+            self.logger.warning(
+                f"⛽ Remplacement {context['kind']} abandonne: "
+                f"{fees['maxFeePerGas'] / 10**9:.2f} Gwei > plafond TX_BUMP_MAX_FEE_GWEI"
+            )
+            context['bumps'] = self.tx_max_bumps
+            return
+
+        txn = replacement_txn(context['txn'], fees)
+        signed = self.web3_manager.account.sign_transaction(txn)
+        try:
+            tx_hash = self.web3_manager.send_raw_transaction(signed.rawTransaction).hex()
+        except Exception as e:
+            # 'nonce too low': une version precedente vient d'etre minee
+            self.logger.warning(f"Remplacement {context['kind']} refuse: {e}")
+            context['sent_block'] = block_number
+            return
+
+        context['txn'] = txn
+        context['hashes'].append(tx_hash)
+        context['tx_hash'] = tx_hash
+        context['bumps'] += 1
+        context['sent_block'] = block_number
+        self.nonce_manager.track(txn['nonce'], tx_hash)
+        self.logger.info(
+            f"⛽ Transaction {context['kind']} bloquee - remplacement #{context['bumps']} "
+            f"(nonce {txn['nonce']}): tip {fees['maxPriorityFeePerGas'] / 10**9:.3f} Gwei, "
+            f"max {fees['maxFeePerGas'] / 10**9:.3f} Gwei | {tx_hash}"
+        )
+
+    def resolve_pending_tx(self, context: Dict, receipt: Optional[Dict]):
+        """Finalise (ou abandonne) une transaction suivie par confirmation_task"""
+        with self.state_lock:
+            self.pending_txs.pop(context['hashes'][0], None)
+        for replaced in context['hashes']:
+            if replaced != context['tx_hash']:
+                self.web3_manager.broadcaster.forget(replaced)
+
+        if receipt is not None:
+            for nonce in context.get('nonces', []):
+                self.nonce_manager.settle(nonce)
+            # Latence d'inclusion par endpoint de diffusion
+            self.web3_manager.broadcaster.record_inclusion(context['tx_hash'])
+            # Soldes en memoire: gas paye, ETH envoye, tokens recus/envoyes
+            if self.wallet_state:
+                self.wallet_state.apply_receipt(receipt, context['txn'].get('value', 0))
+            if 'gas_route' in context:
+                self.gas_estimator.record(
+                    *context['gas_route'], receipt['gasUsed'],
+                    gas_limit=context['txn']['gas'], success=receipt['status'] == 1
+                )
+        else:
+            self.web3_manager.broadcaster.forget(context['tx_hash'])
+            # Transaction perdue: resynchroniser pour combler le trou de nonce
+            try:
+                self.nonce_manager.recover()
+            except Exception as e:
+                self.logger.error(f"Resynchronisation des nonces impossible: {e}")
+                self.nonce_manager.invalidate()
+
+        if receipt is not None and receipt['status'] == 1:
+            if context['kind'] == 'buy':
+                self.finalize_buy(context)
+            elif context['kind'] == 'approve':
+                self.logger.info(f"🔓 Approval confirmee: {context['token_address']}")
+                self.estimate_exit_gas(context['token_address'])
+            else:
+                self.finalize_sell(context)
+            return
+
+        if receipt is None:
+            self.logger.error(
+                f"Transaction {context['kind']} non confirmee apres "
+                f"{self.tx_confirmation_timeout}s: {context['tx_hash']}"
+            )
+        else:
+            self.logger.error(f"Transaction echouee ({context['kind']}): {context['tx_hash']}")
+
+        if context['kind'] == 'approve':
+            # La prochaine vente repassera par approve + swap
+            self.allowances.forget(context['token_address'])
+
+        if context['kind'] == 'sell':
+            # Le monitor re-declenchera la vente au prochain tick
+            position = context['position']
+            with self.state_lock:
+                self.exits_in_flight.discard(position.token_address)
+            self.save_position_state(position)
+
+    async def monitor_task(self):
+        """
+        Surveillance des positions: prix, time exit, stop loss, trailing stop
+
+        Les prix de toutes les positions sont demandes en un seul appel avec
+        une echeance de monitor_tick_budget secondes. Echeance depassee: les stops
+        sont evalues sur les derniers prix connus. Les ventes sont deleguees a
+        exit_task, le tick n'attend jamais un envoi: la cadence reste
+        MONITORING_INTERVAL quel que soit le nombre de positions.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            tick_start = loop.time()
+            try:
+                with self.state_lock:
+                    positions = [
+                        (address, position) for address, position in self.positions.items()
+                        if address not in self.exits_in_flight
+                    ]
+
+                if positions:
+                    await self.refresh_prices(dict(positions))
+
+                    for address, position in positions:
+                        reason = self.evaluate_position(position)
+                        if reason:
+                            self.dispatch_exit(position, reason)
+
+            except Exception as e:
+                self.logger.error(f"Erreur monitor: {e}")
+
+            elapsed = loop.time() - tick_start
+            await asyncio.sleep(max(0, self.monitoring_interval - elapsed))
+
+    def refresh_entry_plans(self) -> int:
+        """Recalcule les plans d'entree des meilleurs candidats (bloquant)"""
+        addresses = [
+            row[0] for row in self.get_candidate_rows(self.entry_plan_top_n)
+            if not self.is_token_in_cooldown(row[0])
+        ]
+        if not addresses:
+            return 0
+        budget_wei = Web3.to_wei(self.calculate_position_size(), 'ether')
+        plans = self.entry_planner.plan_many(addresses, budget_wei)
+        viable = [plan for plan in plans.values() if plan and plan['viable']]
+
+        # Gas de l'achat mesure a l'avance pour les routes encore inconnues
+        for plan in viable:
+            if not self.gas_estimator.known(plan['token'], 'buy', plan['fee']):
+                self.estimate_route_gas(
+                    plan['token'], 'buy', plan['fee'],
+                    self.build_buy_swap_params(plan['token'], plan), value=plan['amount_in']
+                )
+        return len(viable)
+
+    async def entry_planning_task(self):
+        """Plans d'entree calcules a l'avance: l'achat n'attend aucune cotation"""
+        while True:
+            try:
+                if self.trading_mode != 'paper' and self.open_slots() > 0:
+                    viable = await asyncio.to_thread(self.refresh_entry_plans)
+                    self.logger.debug(f"🧮 Plans d'entree: {viable} candidat(s) achetable(s)")
+            except Exception as e:
+                self.logger.error(f"Erreur plans d'entree: {e}")
+            await asyncio.sleep(self.entry_plan_interval)
+
+    async def fee_oracle_task(self):
+        """Releve base fee et tips a chaque bloc: les envois lisent le cache"""
+        while True:
+            try:
+                if await asyncio.to_thread(self.fee_oracle.refresh):
+                    self.logger.debug(
+                        f"⛽ Bloc {self.fee_oracle.block}: base fee "
+                        f"{self.fee_oracle.base_fee / 10**9:.4f} Gwei"
+                    )
+            except Exception as e:
+                self.logger.error(f"Erreur oracle de frais: {e}")
+            await asyncio.sleep(self.fee_oracle_interval)
+
+    async def wallet_state_task(self):
+        """Tient les soldes du wallet a jour: logs Transfer a chaque bloc, releve periodique"""
+        while True:
+            try:
+                if self.trading_mode == 'paper':
+                    pass  # mode relu a chaud: releve complet au passage en real
+                elif self.wallet_state.needs_reconcile():
+                    tokens = [address for address, _ in self.get_positions_snapshot()]
+                    snapshot = await asyncio.to_thread(self.wallet_state.reconcile, tokens)
+                    self.logger.debug(
+                        f"👛 Wallet releve au bloc {snapshot['block']}: "
+                        f"{(snapshot['eth_balance'] or 0) / 10**18:.6f} ETH, "
+                        f"{len(snapshot['tokens'])} token(s)"
+                    )
+                else:
+                    await asyncio.to_thread(self.wallet_state.poll_transfers)
+            except Exception as e:
+                self.logger.error(f"Erreur suivi du wallet: {e}")
+            await asyncio.sleep(self.wallet_poll_interval)
+
+    async def exit_standby_task(self):
+        """Garde une sortie signee prete pour chaque position ouverte (mode real, relu a chaud)"""
+        while True:
+            try:
+                if self.trading_mode != 'paper' and self.positions:
+                    ready = await asyncio.to_thread(self.refresh_exit_standby)
+                    self.logger.debug(f"⚡ Sorties pre-signees: {ready}/{len(self.positions)}")
+            except Exception as e:
+                self.logger.error(f"Erreur sorties pre-signees: {e}")
+            await asyncio.sleep(self.exit_standby_interval)
+
+    async def price_stream_task(self):
+        """
+        Evalue les stops sur chaque swap des pools detenues, vend d'urgence sur rug
+
+        Chaque nouveau bloc, les logs Swap des pools des positions sont lus en un
+        eth_getLogs; le prix de chaque swap est applique dans l'ordre et les stops
+        sont evalues aussitot: la sortie part sur le trade qui a franchi le stop,
+        sans attendre le tick du monitor (qui reste le filet de securite).
+        Des Burn retirant plus de RUG_LIQUIDITY_DROP_PERCENT de la reserve WETH
+        de la pool declenchent une vente immediate, hors file, avec mesure de latence.
+        """
+        while True:
+            try:
+                with self.state_lock:
+                    positions = {
+                        address.lower(): position for address, position in self.positions.items()
+                        if address not in self.exits_in_flight
+                    }
+
+                await asyncio.to_thread(self.price_stream.watch, positions.keys())
+                updates = await asyncio.to_thread(self.price_stream.poll)
+
+                # Retraits de liquidite d'abord: sortie d'urgence sans attendre les stops
+                for alert in [u for u in updates if u['kind'] == 'liquidity_drop']:
+                    position = positions.get(alert['token'])
+                    if position is None:
+                        continue
+                    self.logger.warning(
+                        f"🚨 RUG {position.symbol}: liquidite -{alert['drop_percent']:.0f}% "
+                        f"(tx {alert['tx_hash']}, bloc {alert['block']}) - vente d'urgence"
+                    )
+                    self.dispatch_emergency_exit(
+                        position, f"Rug: liquidite -{alert['drop_percent']:.0f}%", alert['detected_at']
+                    )
+
+                for update in updates:
+                    if update['kind'] == 'swap':
+                        self.local_quoter.apply_swap(
+                            update['pool'], update['sqrt_price_x96'], update['liquidity'], update['tick']
+                        )
+                    else:
+                        self.local_quoter.invalidate(update['pool'])
+
+                    position = positions.get(update['token'])
+                    if (update['kind'] != 'swap' or position is None
+                            or position.token_address in self.exits_in_flight):
+                        continue
+                    self.apply_price_data(position, update)
+                    reason = self.evaluate_position(position)
+                    if reason:
+                        self.logger.info(
+                            f"⚡ {position.symbol}: sortie sur swap {update['tx_hash']} "
+                            f"(bloc {update['block']}, ${update['price_usd']:.8f})"
+                        )
+                        self.dispatch_exit(position, reason)
+
+            except Exception as e:
+                self.logger.error(f"Erreur flux de prix: {e}")
+
+            await asyncio.sleep(self.price_stream.poll_interval)
+
+    async def run_exit(self, position: Position, reason: str, detected_at: float = None):
+        """Execute une vente hors de la boucle"""
+        try:
+            await asyncio.to_thread(self.execute_sell, position, reason, detected_at)
+        except Exception as e:
+            self.logger.error(f"Erreur tache sortie {position.symbol}: {e}")
+        finally:
+            # Vente non envoyee (gas, erreur): le monitor pourra la redemander
+            if not self.has_pending_tx(position.token_address, 'sell'):
+                with self.state_lock:
+                    self.exits_in_flight.discard(position.token_address)
+
+    async def exit_task(self):
+        """Execute les ventes demandees par le monitor, une a la fois"""
+        while True:
+            position, reason = await self.exit_queue.get()
+            await self.run_exit(position, reason)
+
+    async def entry_task(self):
+        """Recherche de nouvelles opportunites et achats"""
+        while True:
+            try:
+                # Achats en attente reserves sur la limite quotidienne (comptes a la confirmation)
+                if (self.open_slots() > 0
+                        and self.daily_trades + self.pending_buys() < self.max_trades_per_day):
+                    token = await asyncio.to_thread(self.get_next_token)
+                    if token:
+                        await self.try_entry(token)
+            except Exception as e:
+                self.logger.error(f"Erreur tache entree: {e}")
+                await asyncio.sleep(10)
+
+            await asyncio.sleep(self.entry_interval)
+
+    async def try_entry(self, token: Dict):
+        """Validation finale puis achat d'un candidat"""
+        # Validation supplementaire
+        if token.get('price_usd', 0) <= 0:
+            self.logger.warning(f"Token {token.get('symbol')} avec prix invalide, ignore")
+            return
+
+        # Calculer l'âge du token
+        if token.get('created_at'):
+            created_dt = datetime.fromisoformat(token['created_at'].replace('Z', '+00:00'))
+            token_age_hours = (datetime.now(created_dt.tzinfo) - created_dt).total_seconds() / 3600
+            age_str = f"{token_age_hours:.1f}h"
+        else:
+            age_str = "N/A"
+
+        self.logger.info(
+            f"📊 Opportunite detectee: {token['symbol']} | "
+            f"Liq: ${token['liquidity']:,.0f} | "
+            f"Vol: ${token['volume_24h']:,.0f} | "
+            f"Score: {token['score']} | Age: {age_str}"
+        )
+
+        # Verification finale avant achat
+        if self.open_slots() <= 0:
+            self.logger.warning("Positions maximum atteintes")
+            return
+
+        # Limite quotidienne comptee a la confirmation (finalize_buy) ou en paper
+        await asyncio.to_thread(self.execute_buy, token)
+
+    async def confirmation_task(self):
+        """
+        Suit les transactions envoyees bloc par bloc jusqu'a leur confirmation
+
+        Les recus ne sont demandes qu'a chaque nouveau bloc, pour toutes les
+        transactions en parallele; une transaction bloquee est remplacee
+        (track_pending_tx). Rien ici n'attend une inclusion: le monitor et les
+        sorties ne sont jamais bloques.
+        """
+        last_block = None
+        while True:
+            with self.state_lock:
+                pending = list(self.pending_txs.values())
+
+            if pending:
+                try:
+                    block_number = await asyncio.to_thread(lambda: self.web3_manager.w3.eth.block_number)
+                except Exception as e:
+                    self.logger.error(f"Erreur lecture du bloc courant: {e}")
+                    block_number = last_block
+
+                if block_number is not None and block_number != last_block:
+                    last_block = block_number
+                    results = await asyncio.gather(*[
+                        asyncio.to_thread(self.track_pending_tx, context, block_number)
+                        for context in pending
+                    ], return_exceptions=True)
+                    for context, result in zip(pending, results):
+                        if isinstance(result, Exception):
+                            self.logger.error(f"Erreur confirmation {context['tx_hash']}: {result}")
+
+            await asyncio.sleep(self.tx_poll_interval)
+
+    async def housekeeping_task(self):
+        """Mode de trading, compteur quotidien, logs periodiques, nettoyages"""
+        last_status_log = time.time()
+        last_performance_log = time.time()
+
+        while True:
+            try:
+                # Verifier le mode de trading
+                self.reload_trading_mode()
+
+                # Verifier limite quotidienne
+                today = datetime.now().date()
+                if self.last_trade_day != today:
+                    self.daily_trades = 0
+                    self.last_trade_day = today
+                    self.logger.info(f"📅 Nouveau jour - Trades disponibles: {self.max_trades_per_day}")
+
+                # Log rapide toutes les 10 secondes
+                if time.time() - last_status_log >= 10:
+                    self.log_positions_status()
+                    last_status_log = time.time()
+
+                # Log performance toutes les heures
+                if time.time() - last_performance_log > 3600:
+                    self.log_performance_metrics()
+                    self.cleanup_expired_cooldowns()  # Nettoyer cooldowns expirés
+                    await asyncio.to_thread(self.honeypot_cache.purge_expired)  # Verdicts honeypot expirés
+                    last_performance_log = time.time()
+
+            except Exception as e:
+                self.logger.error(f"Erreur maintenance: {e}")
+
+            await asyncio.sleep(1)
+
+    async def run(self):
+        """Lance les taches independantes du Trader et attend leur arret"""
         self.logger.info(f"🚀 Trader - Strategie unique activee")
         self.logger.info(
             f"⚙️ Config: {self.position_size_percent}% positions | "
@@ -1330,140 +2415,90 @@ class RealTrader:
             f"{self.time_exit_config['maximum']['hours']}h force | "
             f"{self.time_exit_config['emergency']['hours']}h emergency"
         )
-        
-        # Compteurs pour logs periodiques
-        last_performance_log = time.time()
-        monitoring_counter = 0
-        
+        self.logger.info(
+            f"⏱️ Monitor: tick {self.monitoring_interval}s, budget prix {self.monitor_tick_budget:.1f}s | "
+            f"Sources: {' → '.join(self.price_sources)} | "
+            f"Flux swaps: {'actif' if self.price_stream_enabled else 'inactif'}"
+        )
+
+        # Préchauffer les verdicts honeypot des meilleurs candidats en continu
+        self.honeypot_prefetcher.start()
+
+        if self.nonce_manager:
+            try:
+                nonce = await asyncio.to_thread(self.nonce_manager.sync)
+                self.logger.info(f"🔢 Nonce synchronise: {nonce}")
+            except Exception as e:
+                self.logger.warning(f"Synchronisation du nonce impossible ({e}) - reessai au premier envoi")
+
+        if self.wallet_state:
+            try:
+                tokens = [address for address, _ in self.get_positions_snapshot()]
+                snapshot = await asyncio.to_thread(self.wallet_state.reconcile, tokens)
+                self.logger.info(
+                    f"👛 Wallet: {(snapshot['eth_balance'] or 0) / 10**18:.6f} ETH | "
+                    f"{len(snapshot['tokens'])} token(s) suivi(s) au bloc {snapshot['block']}"
+                )
+            except Exception as e:
+                self.logger.warning(f"Releve du wallet impossible ({e}) - soldes lus a la demande")
+
+        if self.allowances and self.positions:
+            try:
+                tokens = [address for address, _ in self.get_positions_snapshot()]
+                allowances = await asyncio.to_thread(self.allowances.refresh, tokens)
+                approved = sum(1 for a in allowances.values() if a > 0)
+                self.logger.info(f"🔓 Allowances relues: {approved}/{len(tokens)} positions approuvees")
+            except Exception as e:
+                self.logger.warning(f"Lecture des allowances impossible ({e}) - approve a la vente")
+
+        self.exit_queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self.monitor_task(), name='monitor'),
+            asyncio.create_task(self.exit_task(), name='exits'),
+            asyncio.create_task(self.entry_task(), name='entries'),
+            asyncio.create_task(self.confirmation_task(), name='confirmations'),
+            asyncio.create_task(self.housekeeping_task(), name='housekeeping'),
+            asyncio.create_task(self.entry_planning_task(), name='entry-plans'),
+        ]
+        if self.price_stream_enabled:
+            tasks.append(asyncio.create_task(self.price_stream_task(), name='price-stream'))
+        if self.trading_mode != 'paper':
+            tasks.append(asyncio.create_task(self.fee_oracle_task(), name='fee-oracle'))
+        if self.wallet_state:
+            tasks.append(asyncio.create_task(self.wallet_state_task(), name='wallet'))
+        if self.exit_standby_enabled and self.exit_standby:
+            tasks.append(asyncio.create_task(self.exit_standby_task(), name='exit-standby'))
+
         try:
-            while True:
-                try:
-                    # Verifier le mode de trading
-                    mode_file = PROJECT_DIR / 'config' / 'trading_mode.json'
-                    if mode_file.exists():
-                        try:
-                            with open(mode_file, 'r') as f:
-                                data = json.load(f)
-                                new_mode = data.get('mode', 'paper')
-                                if new_mode != self.trading_mode:
-                                    self.logger.info(f"🔄 Mode change: {self.trading_mode} → {new_mode}")
-                                    self.trading_mode = new_mode
-                        except Exception as e:
-                            self.logger.error(f"Erreur lecture mode: {e}")
-                            
-                    # Mettre a jour les positions existantes
-                    if self.positions:
-                        self.update_positions()
-                        
-                        # Log rapide toutes les 10 secondes
-                        monitoring_counter += 1
-                        if monitoring_counter >= 10:
-                            for addr, pos in self.positions.items():
-                                if pos.entry_price > 0:
-                                    profit = ((pos.current_price - pos.entry_price) /
-                                            pos.entry_price) * 100
-                                    hours = (datetime.now() - pos.entry_time).total_seconds() / 3600
-                                    minutes = hours * 60
-
-                                    # Déterminer le statut avec grace period
-                                    if hasattr(pos, 'is_in_grace_period') and pos.is_in_grace_period():
-                                        time_left = pos.grace_period_minutes - minutes
-                                        status = f"🛡️ Grace ({time_left:.1f}min)"
-                                        stop_info = f"SL: -35%"
-                                    elif pos.trailing_active:
-                                        status = "📈 Trailing"
-                                        stop_info = f"Stop: ${pos.stop_loss:.8f}"
-                                    else:
-                                        status = "⏳ Attente"
-                                        stop_info = f"SL: -5%"
-
-                                    self.logger.info(
-                                        f"{status} {pos.symbol}: "
-                                        f"{profit:+.1f}% | "
-                                        f"{hours:.1f}h | "
-                                        f"{stop_info}"
-                                    )
-                            monitoring_counter = 0
-                    
-                    # Verifier limite quotidienne
-                    today = datetime.now().date()
-                    if self.last_trade_day != today:
-                        self.daily_trades = 0
-                        self.last_trade_day = today
-                        self.logger.info(f"📅 Nouveau jour - Trades disponibles: {self.max_trades_per_day}")
-                        
-                    # Chercher nouvelle opportunite
-                    if (len(self.positions) < self.max_positions and 
-                        self.daily_trades < self.max_trades_per_day):
-                        
-                        token = self.get_next_token()
-                        if token:
-                            # Validation supplementaire
-                            if token.get('price_usd', 0) <= 0:
-                                self.logger.warning(f"Token {token.get('symbol')} avec prix invalide, ignore")
-                                continue
-
-                            # Calculer l'âge du token
-                            if token.get('created_at'):
-                                created_dt = datetime.fromisoformat(token['created_at'].replace('Z', '+00:00'))
-                                token_age_hours = (datetime.now(created_dt.tzinfo) - created_dt).total_seconds() / 3600
-                                age_str = f"{token_age_hours:.1f}h"
-                            else:
-                                age_str = "N/A"
-
-                            self.logger.info(
-                                f"📊 Opportunite detectee: {token['symbol']} | "
-                                f"Liq: ${token['liquidity']:,.0f} | "
-                                f"Vol: ${token['volume_24h']:,.0f} | "
-                                f"Score: {token['score']} | Age: {age_str}"
-                            )
-                            
-                            # Verification finale avant achat
-                            if len(self.positions) < self.max_positions:
-                                if self.execute_buy(token):
-                                    self.daily_trades += 1
-                                    self.logger.info(
-                                        f"📈 Position {len(self.positions)}/{self.max_positions} | "
-                                        f"Trades aujourd'hui: {self.daily_trades}/{self.max_trades_per_day}"
-                                    )
-                            else:
-                                self.logger.warning("Positions maximum atteintes")
-                                
-                    # Log performance toutes les heures
-                    if time.time() - last_performance_log > 3600:
-                        self.log_performance_metrics()
-                        self.cleanup_expired_cooldowns()  # Nettoyer cooldowns expirés
-                        last_performance_log = time.time()
-
-                    # Pause de 1 seconde (monitoring rapide)
-                    time.sleep(self.monitoring_interval)
-                    
-                except KeyboardInterrupt:
-                    self.logger.info("🛑 Arrêt demande par l'utilisateur")
-                    self.log_performance_metrics()
-                    
-                    # Sauvegarder l'etat final
-                    for position in self.positions.values():
-                        self.save_position_state(position)
-                        
-                    break
-                    
-                except Exception as e:
-                    self.logger.error(f"Erreur boucle principale: {e}")
-                    # En cas d'erreur critique, sauvegarder les positions
-                    for position in self.positions.values():
-                        try:
-                            self.save_position_state(position)
-                        except:
-                            pass
-                    time.sleep(10)
+            await asyncio.gather(*tasks)
         finally:
+            for task in tasks:
+                task.cancel()
+
+            self.log_performance_metrics()
+
+            # Sauvegarder l'etat final
+            for _, position in self.get_positions_snapshot():
+                try:
+                    self.save_position_state(position)
+                except Exception:
+                    pass
+
+            with self.state_lock:
+                if self.pending_txs:
+                    self.logger.warning(
+                        f"⚠️ {len(self.pending_txs)} transaction(s) non confirmee(s) a l'arret: "
+                        f"{', '.join(self.pending_txs)}"
+                    )
+
             self.cleanup()
 
 if __name__ == "__main__":
     trader = RealTrader()
     try:
-        trader.run()
+        asyncio.run(trader.run())
+    except KeyboardInterrupt:
+        trader.logger.info("🛑 Arrêt demande par l'utilisateur")
     except Exception as e:
         trader.logger.error(f"Erreur fatale: {e}")
         # Sauvegarder les positions en cas de crash
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Codec compact pour la colonne analysis_data (approved_tokens / rejected_tokens)
+
+Deux modes de stockage (variable ANALYSIS_DATA_STORAGE):
+    - 'json'    : JSON texte, comportement historique
+    - 'compact' : msgpack + zstd avec dictionnaire entraine (stocke en BLOB)
+
+Format compact v1:
+    b'BBA' | version (1 octet) | dict_id (4 octets big-endian) | zstd(msgpack(data))
+
+Les lignes JSON existantes restent lisibles: decode_analysis_data() detecte
+le format tout seul, l'appelant n'a pas a savoir comment la ligne a ete ecrite.
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+    import zstandard
+except ImportError:  # Mode compact indisponible, on reste en JSON
+    msgpack = None
+    zstandard = None
+
+MAGIC = b'BBA'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>3sBI')
+COMPRESSION_LEVEL = 9
+DEFAULT_DICT_SIZE = 16 * 1024
+MIN_TRAINING_SAMPLES = 100
+
+# Les dictionnaires sont immuables une fois ecrits: cache par dict_id
+_dictionary_cache: Dict[int, Any] = {}
+_cache_lock = threading.Lock()
+
+
+def compact_available() -> bool:
+    """Indique si msgpack et zstandard sont installes"""
+    return msgpack is not None and zstandard is not None
+
+
+def get_storage_mode() -> str:
+    """Mode de stockage configure ('json' ou 'compact')"""
+    mode = os.getenv('ANALYSIS_DATA_STORAGE', 'json').strip().lower()
+    return mode if mode in ('json', 'compact') else 'json'
+
+
+def ensure_dictionary_table(conn: sqlite3.Connection):
+    """Cree la table des dictionnaires zstd si necessaire"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_dictionaries (
+            dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            sample_count INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def get_latest_dictionary_id(conn: Optional[sqlite3.Connection]) -> int:
+    """Retourne l'id du dictionnaire le plus recent (0 = pas de dictionnaire)"""
+    if conn is None:
+        return 0
+    try:
+        row = conn.execute("SELECT MAX(dict_id) FROM analysis_dictionaries").fetchone()
+        return row[0] or 0
+    except sqlite3.OperationalError:
+        # Table absente: base pas encore migree
+        return 0
+
+
+def _load_dictionary(conn: Optional[sqlite3.Connection], dict_id: int):
+    """Charge (et met en cache) un dictionnaire zstd"""
+    if dict_id == 0:
+        return None
+
+    with _cache_lock:
+        if dict_id in _dictionary_cache:
+            return _dictionary_cache[dict_id]
+
+    if conn is None:
+        raise ValueError(f"Dictionnaire {dict_id} requis mais aucune connexion DB fournie")
+
+    row = conn.execute(
+        "SELECT data FROM analysis_dictionaries WHERE dict_id = ?", (dict_id,)
+    ).fetchone()
+    if not row:
+        raise ValueError(f"Dictionnaire analysis_data {dict_id} introuvable")
+
+    zdict = zstandard.ZstdCompressionDict(bytes(row[0]))
+    with _cache_lock:
+        _dictionary_cache[dict_id] = zdict
+    return zdict
+
+
+def _pack(data: Any) -> bytes:
+    """Serialise en msgpack (les types inconnus deviennent des chaines)"""
+    return msgpack.packb(data, default=str, use_bin_type=True)
+
+
+def train_dictionary(conn: sqlite3.Connection, samples: List[Any],
+                     dict_size: int = DEFAULT_DICT_SIZE) -> Optional[int]:
+    """
+    Entraine un dictionnaire zstd sur des echantillons analysis_data
+
+    Args:
+        conn: Connexion DB (le dictionnaire y est enregistre)
+        samples: Liste de dicts deja decodes
+        dict_size: Taille cible du dictionnaire en octets
+
+    Returns:
+        dict_id du nouveau dictionnaire, ou None si pas assez d'echantillons
+    """
+    if not compact_available() or len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+
+    packed = [_pack(sample) for sample in samples]
+    try:
+        zdict = zstandard.train_dictionary(dict_size, packed)
+    except zstandard.ZstdError as e:
+        print(f"Entrainement dictionnaire zstd impossible: {e}")
+        return None
+
+    ensure_dictionary_table(conn)
+    cursor = conn.execute(
+        "INSERT INTO analysis_dictionaries (data, sample_count) VALUES (?, ?)",
+        (zdict.as_bytes(), len(samples))
+    )
+    conn.commit()
+
+    dict_id = cursor.lastrowid
+    with _cache_lock:
+        _dictionary_cache[dict_id] = zdict
+    return dict_id
+
+
+def is_compact(value: Any) -> bool:
+    """Vrai si la valeur est deja au format compact"""
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:3]) == MAGIC
+
+
+def encode_analysis_data(data: Dict, conn: Optional[sqlite3.Connection] = None,
+                         mode: Optional[str] = None):
+    """
+    Encode un dict analysis_data selon le mode de stockage
+
+    Returns:
+        str (JSON) ou bytes (compact) a inserer tel quel dans SQLite
+    """
+    mode = mode or get_storage_mode()
+    if mode != 'compact' or not compact_available():
+        return json.dumps(data)
+
+    dict_id = get_latest_dictionary_id(conn)
+    zdict = _load_dictionary(conn, dict_id)
+    if zdict is not None:
+        compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=zdict)
+    else:
+        compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+
+    return HEADER.pack(MAGIC, FORMAT_VERSION, dict_id) + compressor.compress(_pack(data))
+
+
+def decode_analysis_data(value: Any, conn: Optional[sqlite3.Connection] = None) -> Optional[Dict]:
+    """
+    Decode une valeur analysis_data, quel que soit son format (JSON ou compact)
+
+    Args:
+        value: Valeur brute lue depuis SQLite (str, bytes ou None)
+        conn: Connexion DB, necessaire si la ligne utilise un dictionnaire
+    """
+    if value is None:
+        return None
+
+    if is_compact(value):
+        if not compact_available():
+            raise RuntimeError("analysis_data compact: installer msgpack et zstandard")
+
+        raw = bytes(value)
+        _, version, dict_id = HEADER.unpack_from(raw)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Version analysis_data inconnue: {version}")
+
+        zdict = _load_dictionary(conn, dict_id)
+        if zdict is not None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+        else:
+            decompressor = zstandard.ZstdDecompressor()
+
+        payload = decompressor.decompress(raw[HEADER.size:])
+        return msgpack.unpackb(payload, raw=False)
+
+    if isinstance(value, (bytes, memoryview)):
+        value = bytes(value).decode('utf-8')
+    return json.loads(value)
+
+
+def register_sqlite_functions(conn: sqlite3.Connection):
+    """
+    Enregistre decode_analysis() pour les requetes SQL (Dashboard, analytics)
+
+    Usage:
+        SELECT json_extract(decode_analysis(analysis_data), '$.score')
+        FROM approved_tokens
+    """
+    def _decode_to_json(value):
+        try:
+            decoded = decode_analysis_data(value, conn)
+        except Exception:
+            return None
+        return json.dumps(decoded) if decoded is not None else None
+
+    conn.create_function('decode_analysis', 1, _decode_to_json, deterministic=True)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Diffusion parallèle des transactions signées vers plusieurs endpoints RPC
+
+Une transaction signée est envoyée en même temps à tous les endpoints actifs
+(publics + privés): l'envoi rend la main dès le premier accusé de réception,
+les autres continuent en arrière-plan. Les réponses "already known" (un autre
+endpoint a déjà propagé la transaction) comptent comme une acceptation.
+
+Chaque endpoint est mesuré: latence d'accusé de réception, taux d'erreur, et
+latence d'inclusion (du début de la diffusion au bloc). L'inclusion n'est
+créditée qu'aux endpoints qui ont livré la transaction, c'est-à-dire qui l'ont
+acceptée eux-mêmes. Un "already known" veut dire qu'un autre endpoint l'avait
+déjà propagée. Un endpoint nettement plus lent que le meilleur (accusé ou
+inclusion), ou qui échoue trop souvent, est retiré de la diffusion pendant
+BROADCAST_READMIT_SECONDS puis réessayé.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+# Réponses d'un noeud qui connaît déjà la transaction (propagée par un autre endpoint)
+ALREADY_KNOWN_ERRORS = ('already known', 'known transaction', 'already imported', 'alreadyknown')
+
+
+def is_already_known(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in ALREADY_KNOWN_ERRORS)
+
+
+def _median(samples: Iterable[float]) -> Optional[float]:
+    samples = sorted(samples)
+    return samples[len(samples) // 2] if samples else None
+
+
+class TxBroadcaster:
+    """Envoie les transactions signées à tous les endpoints en parallèle"""
+
+    def __init__(self, rpc_urls: Iterable[str], private_urls: Iterable[str] = ()):
+        self.timeout = float(os.getenv('BROADCAST_TIMEOUT_SECONDS', 5))
+        # Endpoint retiré si sa latence médiane dépasse drop_factor x la meilleure
+        self.drop_factor = float(os.getenv('BROADCAST_DROP_FACTOR', 3))
+        # Idem sur la latence d'inclusion (plancher commun: le temps de bloc)
+        self.inclusion_drop_factor = float(os.getenv('BROADCAST_INCLUSION_DROP_FACTOR', 2))
+        self.max_error_rate = float(os.getenv('BROADCAST_MAX_ERROR_PERCENT', 50)) / 100
+        self.min_samples = int(os.getenv('BROADCAST_MIN_SAMPLES', 10))
+        self.readmit_after = float(os.getenv('BROADCAST_READMIT_SECONDS', 600))
+
+        self._lock = threading.Lock()
+        self.endpoints: List[Dict] = []
+        seen = set()
+        for url, private in [(u, False) for u in rpc_urls] + [(u, True) for u in private_urls]:
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            self.endpoints.append({
+                'url': url,
+                'name': urlparse(url).netloc or url,  # sans chemin (clé API des endpoints privés)
+                'private': private,
+                'w3': Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': self.timeout})),
+                'sent': 0,
+                'errors': 0,
+                'delivered': 0,  # transactions minées livrées par cet endpoint
+                'ack_ms': deque(maxlen=50),
+                'inclusion_ms': deque(maxlen=50),
+                'dropped_until': 0.0
+            })
+        if not self.endpoints:
+            raise ValueError("Aucun endpoint RPC pour la diffusion")
+
+        # Les envois lents continuent en arrière-plan: deux vagues en parallèle
+        self.executor = ThreadPoolExecutor(
+            max_workers=2 * len(self.endpoints), thread_name_prefix='broadcast'
+        )
+        # {tx_hash: {'started': début de diffusion (time.time), 'delivered': {endpoint}}}
+        self.accepted: Dict[str, Dict] = {}
+
+    def active_endpoints(self) -> List[Dict]:
+        now = time.time()
+        active = [ep for ep in self.endpoints if ep['dropped_until'] <= now]
+        return active or self.endpoints
+
+    def _send(self, endpoint: Dict, raw: bytes, tx_hash: str, started: float) -> Tuple[bool, Optional[Exception]]:
+        delivered = False
+        try:
+            endpoint['w3'].eth.send_raw_transaction(raw)
+            accepted = delivered = True
+            error = None
+        except Exception as e:
+            accepted = is_already_known(e)
+            error = None if accepted else e
+
+        with self._lock:
+            endpoint['sent'] += 1
+            if accepted:
+                endpoint['ack_ms'].append((time.perf_counter() - started) * 1000)
+                if delivered and tx_hash in self.accepted:
+                    self.accepted[tx_hash]['delivered'].add(endpoint['url'])
+            else:
+                endpoint['errors'] += 1
+        return accepted, error
+
+    def send_raw_transaction(self, raw: bytes) -> HexBytes:
+        """
+        Diffuse une transaction signée, rend la main au premier accusé
+
+        Raises:
+            La première erreur rencontrée si aucun endpoint n'a accepté la
+            transaction (nonce trop bas, fonds insuffisants, timeout...)
+        """
+        tx_hash = Web3.keccak(raw)
+        with self._lock:
+            # Rediffusion (gas bump, renvoi): l'inclusion se mesure depuis le premier envoi
+            self.accepted.setdefault(tx_hash.hex(), {'started': time.time(), 'delivered': set()})
+        started = time.perf_counter()
+        futures = [self.executor.submit(self._send, ep, raw, tx_hash.hex(), started)
+                   for ep in self.active_endpoints()]
+
+        errors = []
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                accepted, error = future.result()
+                if accepted:
+                    return tx_hash
+                errors.append(error)
+        except TimeoutError:
+            pass
+        if errors:
+            raise errors[0]
+        raise TimeoutError(f"Aucun accusé de réception en {self.timeout}s pour {tx_hash.hex()}")
+
+    def record_inclusion(self, tx_hash: str, included_at: float = None):
+        """Transaction minée: latence diffusion -> inclusion, créditée aux endpoints qui l'ont livrée"""
+        included_at = included_at or time.time()
+        with self._lock:
+            broadcast = self.accepted.pop(tx_hash, None)
+            if broadcast:
+                latency_ms = (included_at - broadcast['started']) * 1000
+                for endpoint in self.endpoints:
+                    if endpoint['url'] in broadcast['delivered']:
+                        endpoint['delivered'] += 1
+                        endpoint['inclusion_ms'].append(latency_ms)
+            # Transactions jamais résolues (abandonnées): oubliées après une heure
+            for stale in [h for h, b in self.accepted.items() if included_at - b['started'] > 3600]:
+                del self.accepted[stale]
+        self.prune()
+
+    def forget(self, tx_hash: str):
+        """Transaction abandonnée (jamais minée)"""
+        with self._lock:
+            self.accepted.pop(tx_hash, None)
+
+    def prune(self) -> List[str]:
+        """Retire temporairement les endpoints lents ou peu fiables"""
+        now = time.time()
+        dropped = []
+        with self._lock:
+            active = [ep for ep in self.endpoints if ep['dropped_until'] <= now]
+            ack_medians = {
+                ep['url']: _median(ep['ack_ms']) for ep in active
+                if len(ep['ack_ms']) >= self.min_samples
+            }
+            inclusion_medians = {
+                ep['url']: _median(ep['inclusion_ms']) for ep in active
+                if len(ep['inclusion_ms']) >= self.min_samples
+            }
+            best_ack = min(ack_medians.values()) if ack_medians else None
+            best_inclusion = min(inclusion_medians.values()) if inclusion_medians else None
+            for ep in active:
+                if ep['sent'] < self.min_samples:
+                    continue
+                too_slow = (
+                    (ep['url'] in ack_medians and ack_medians[ep['url']] > self.drop_factor * best_ack)
+                    or (ep['url'] in inclusion_medians
+                        and inclusion_medians[ep['url']] > self.inclusion_drop_factor * best_inclusion)
+                )
+                unreliable = ep['errors'] / ep['sent'] > self.max_error_rate
+                remaining = sum(1 for e in self.endpoints if e['dropped_until'] <= now) - 1
+                if (too_slow or unreliable) and remaining >= 1:
+                    ep['dropped_until'] = now + self.readmit_after
+                    # Repartir de zéro à la réadmission
+                    ep['sent'] = ep['errors'] = ep['delivered'] = 0
+                    ep['ack_ms'].clear()
+                    ep['inclusion_ms'].clear()
+                    dropped.append(ep['name'])
+                    print(f"Endpoint retiré de la diffusion pour {self.readmit_after:.0f}s: {ep['name']} "
+                          f"({'lent' if too_slow else 'erreurs'})")
+        return dropped
+
+    def stats(self) -> List[Dict]:
+        """Statistiques par endpoint"""
+        now = time.time()
+        with self._lock:
+            return [{
+                'endpoint': ep['name'],
+                'private': ep['private'],
+                'active': ep['dropped_until'] <= now,
+                'sent': ep['sent'],
+                'errors': ep['errors'],
+                'delivered': ep['delivered'],
+                'ack_median_ms': _median(ep['ack_ms']),
+                'inclusion_median_ms': _median(ep['inclusion_ms'])
+            } for ep in self.endpoints]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
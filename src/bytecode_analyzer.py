@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Pré-filtrage local du bytecode des tokens (analyse statique)
+
+Récupère une seule fois le runtime bytecode (eth_getCode) et recherche
+les sélecteurs de fonctions dangereuses (blacklist, max-tx, pause, mint,
+setters de taxes) ainsi que les opcodes SELFDESTRUCT / DELEGATECALL.
+Le résultat est un vecteur de risque calculé en quelques millisecondes:
+les tokens manifestement malveillants n'ont pas besoin d'appel API.
+
+Les verdicts sont aussi indexés par empreinte du bytecode: un clone d'un
+honeypot déjà vérifié est rejeté localement. Seuls les verdicts qui tiennent
+au code sont indexés (honeypot confirmé, vente impossible, signaux bytecode);
+taxes, concentration des holders et liquidité dépendent de chaque token et
+sont revérifiées à chaque fois.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from cachetools import LRUCache
+from web3 import Web3
+
+PROJECT_DIR = Path(__file__).parent.parent
+DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+
+# Opcodes EVM
+OP_PUSH1 = 0x60
+OP_PUSH3 = 0x62
+OP_PUSH4 = 0x63
+OP_PUSH32 = 0x7f
+OP_DELEGATECALL = 0xf4
+OP_SELFDESTRUCT = 0xff
+
+# Proxy minimal EIP-1167 (clone)
+EIP1167_PREFIX = bytes.fromhex('363d3d373d3d3d363d73')
+
+# Signatures de fonctions dangereuses par catégorie
+DANGEROUS_SIGNATURES = {
+    'blacklist': [
+        'blacklist(address)',
+        'blacklistAddress(address,bool)',
+        'addToBlacklist(address)',
+        'addBlackList(address)',
+        'setBlacklist(address,bool)',
+        'updateBlacklist(address,bool)',
+        'setBots(address[])',
+        'addBots(address[])',
+        'setBot(address,bool)',
+        'setSniperList(address[],bool)',
+    ],
+    'max_tx': [
+        'setMaxTxAmount(uint256)',
+        'setMaxTxPercent(uint256)',
+        'setMaxTransactionAmount(uint256)',
+        'updateMaxTxnAmount(uint256)',
+        'setMaxWallet(uint256)',
+        'setMaxWalletSize(uint256)',
+        'updateMaxWalletAmount(uint256)',
+    ],
+    'pause': [
+        'pause()',
+        'unpause()',
+        'setPaused(bool)',
+        'setTradingEnabled(bool)',
+        'setTrading(bool)',
+        'tradingStatus(bool)',
+    ],
+    'owner_mint': [
+        'mint(address,uint256)',
+        'mint(uint256)',
+        'mintTo(address,uint256)',
+    ],
+    'fee_setter': [
+        'setFee(uint256)',
+        'setFees(uint256,uint256)',
+        'setTaxes(uint256,uint256)',
+        'setTaxFee(uint256)',
+        'setTaxFeePercent(uint256)',
+        'setBuyFee(uint256)',
+        'setSellFee(uint256)',
+        'setBuyTax(uint256)',
+        'setSellTax(uint256)',
+        'updateFees(uint256,uint256)',
+        'updateBuyFees(uint256,uint256,uint256)',
+        'updateSellFees(uint256,uint256,uint256)',
+    ],
+}
+
+# Poids de chaque signal dans le score de risque (0-100)
+RISK_WEIGHTS = {
+    'blacklist': 35,
+    'owner_mint': 30,
+    'pause': 25,
+    'fee_setter': 20,
+    'max_tx': 10,
+    'delegatecall': 15,
+    'selfdestruct': 50,
+}
+
+# Sélecteur (4 octets) -> (catégorie, signature)
+SELECTOR_INDEX = {
+    Web3.keccak(text=signature)[:4]: (category, signature)
+    for category, signatures in DANGEROUS_SIGNATURES.items()
+    for signature in signatures
+}
+
+# Simulation incomplète: un CANNOT_SELL ne prouve alors rien sur le code
+SIMULATION_FAILURE_FLAGS = ('SIMULATION_FAILED', 'SIMULATION_ERROR', 'BUY_FAILED')
+
+
+def strip_metadata(code: bytes) -> bytes:
+    """Retire le trailer de métadonnées CBOR ajouté par solc/vyper"""
+    if len(code) < 2:
+        return code
+    metadata_length = int.from_bytes(code[-2:], 'big')
+    start = len(code) - 2 - metadata_length
+    # Le trailer commence par une map CBOR (0xa1-0xa5)
+    if 0 < start < len(code) and 0xa1 <= code[start] <= 0xa5:
+        return code[:start]
+    return code
+
+
+def iter_instructions(code: bytes):
+    """Désassemble le bytecode: yield (offset, opcode, donnees_push)"""
+    i = 0
+    length = len(code)
+    while i < length:
+        opcode = code[i]
+        if OP_PUSH1 <= opcode <= OP_PUSH32:
+            size = opcode - OP_PUSH1 + 1
+            yield i, opcode, code[i + 1:i + 1 + size]
+            i += 1 + size
+        else:
+            yield i, opcode, b''
+            i += 1
+
+
+def code_fingerprint(code: bytes) -> str:
+    """
+    Empreinte keccak du runtime bytecode, indépendante du déploiement
+
+    Les immutables (écrits par le constructeur dans des PUSH32) sont mis à
+    zéro et le trailer de métadonnées est retiré: deux clones du même
+    contrat ont la même empreinte même avec un owner ou un router différent.
+    """
+    stripped = strip_metadata(bytes(code))
+    masked = bytearray(stripped)
+    for offset, opcode, data in iter_instructions(stripped):
+        if opcode == OP_PUSH32:
+            masked[offset + 1:offset + 1 + len(data)] = bytes(len(data))
+    return Web3.keccak(bytes(masked)).hex()
+
+
+def analyze_bytecode(code: bytes) -> Dict:
+    """
+    Analyse statique d'un runtime bytecode
+
+    Fonction pure (picklable) pour pouvoir tourner dans un ProcessPoolExecutor.
+
+    Returns:
+        Vecteur de risque: {
+            'has_code', 'code_size', 'blacklist', 'max_tx', 'pause',
+            'owner_mint', 'fee_setter', 'selfdestruct', 'delegatecall',
+            'proxy', 'matched_functions', 'flags', 'risk_score',
+            'risk_level', 'is_malicious'
+        }
+    """
+    code = bytes(code or b'')
+    vector = {
+        'has_code': len(code) > 0,
+        'code_size': len(code),
+        'blacklist': False,
+        'max_tx': False,
+        'pause': False,
+        'owner_mint': False,
+        'fee_setter': False,
+        'selfdestruct': False,
+        'delegatecall': False,
+        'proxy': False,
+        'matched_functions': [],
+        'flags': [],
+        'risk_score': 0,
+        'risk_level': 'LOW',
+        'is_malicious': False
+    }
+
+    if not code:
+        # Pas de contrat à cette adresse (EOA ou contrat détruit)
+        vector['flags'].append('NO_CODE')
+        vector['risk_score'] = 100
+        vector['risk_level'] = 'CRITICAL'
+        vector['is_malicious'] = True
+        return vector
+
+    if code.startswith(EIP1167_PREFIX):
+        vector['proxy'] = True
+
+    matched = set()
+    for _, opcode, data in iter_instructions(strip_metadata(code)):
+        if opcode == OP_SELFDESTRUCT:
+            vector['selfdestruct'] = True
+        elif opcode == OP_DELEGATECALL:
+            vector['delegatecall'] = True
+        elif opcode in (OP_PUSH3, OP_PUSH4):
+            # L'optimiseur solc encode les sélecteurs à octet de tête nul en PUSH3
+            hit = SELECTOR_INDEX.get(data.rjust(4, b'\x00'))
+            if hit:
+                vector[hit[0]] = True
+                matched.add(hit[1])
+
+    vector['matched_functions'] = sorted(matched)
+    if vector['delegatecall']:
+        # Logique déléguée ailleurs: l'analyse ne voit pas tout le contrat
+        vector['proxy'] = True
+
+    score = 0
+    for signal, weight in RISK_WEIGHTS.items():
+        if vector[signal]:
+            score += weight
+            vector['flags'].append(f"BYTECODE_{signal.upper()}")
+    if vector['proxy']:
+        vector['flags'].append('BYTECODE_PROXY')
+
+    score = min(score, 100)
+    vector['risk_score'] = score
+
+    if vector['selfdestruct'] or score >= 70:
+        vector['risk_level'] = 'CRITICAL'
+    elif score >= 35:
+        vector['risk_level'] = 'HIGH'
+    elif score >= 15:
+        vector['risk_level'] = 'MEDIUM'
+
+    vector['is_malicious'] = vector['risk_level'] == 'CRITICAL'
+    return vector
+
+
+def code_verdict_flags(result: Dict) -> List[str]:
+    """
+    Signaux d'un verdict qui tiennent au code du token (valables pour ses clones)
+
+    HONEYPOT_CONFIRMED, CANNOT_SELL après un achat simulé réussi, BYTECODE_*.
+    Les autres signaux (taxes réglables par l'owner, CONCENTRATED_OWNERSHIP,
+    liquidité, simulation échouée) dépendent de l'état propre au token.
+    """
+    flags = result.get('flags') or []
+    simulated = result.get('can_buy', False) and not any(f in flags for f in SIMULATION_FAILURE_FLAGS)
+    return [
+        flag for flag in flags
+        if flag == 'HONEYPOT_CONFIRMED'
+        or flag.startswith('BYTECODE_')
+        or (flag == 'CANNOT_SELL' and simulated)
+    ]
+
+
+def code_verdict(result: Dict) -> Optional[Dict]:
+    """Verdict transmissible aux clones (signaux du code seuls), None si aucun"""
+    flags = code_verdict_flags(result)
+    if not flags:
+        return None
+    return {
+        'is_honeypot': True,
+        'is_safe': False,
+        'buy_tax': 0,
+        'sell_tax': 0,
+        'transfer_tax': 0,
+        'can_buy': result.get('can_buy', False),
+        'can_sell': False,
+        'liquidity_amount': 0,
+        'flags': flags,
+        'risk_level': 'CRITICAL',
+        'error': None
+    }
+
+
+class BytecodeVerdictIndex:
+    """
+    Index local des verdicts honeypot par empreinte de bytecode (SQLite)
+
+    Seuls les rejets dus au code sont indexés (un clone de honeypot reste un
+    honeypot): pas de raccourci "safe", chaque token passe sa propre
+    vérification pour tout ce qui dépend de son état.
+    """
+
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path) if db_path else DB_PATH
+        self.ttl_seconds = {
+            'unsafe': float(os.getenv('BYTECODE_VERDICT_TTL_UNSAFE_HOURS', 720)) * 3600
+        }
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_table(self):
+        """Crée la table de l'index si nécessaire"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS bytecode_verdicts (
+                    code_hash TEXT PRIMARY KEY,
+                    outcome TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    sample_token TEXT,
+                    hits INTEGER DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lookup(self, code_hash: str) -> Optional[Dict]:
+        """Verdict connu pour cette empreinte (None si absent ou expiré)"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute('''
+                    SELECT outcome, result, sample_token, updated_at
+                    FROM bytecode_verdicts WHERE code_hash = ?
+                ''', (code_hash,)).fetchone()
+                if not row:
+                    return None
+                outcome, result_json, sample_token, updated_at = row
+                if time.time() - updated_at >= self.ttl_seconds.get(outcome, 0):
+                    return None
+                # Entrées indexées sur un signal propre au token: ignorées
+                result = code_verdict(json.loads(result_json))
+                if result is None:
+                    return None
+                conn.execute(
+                    "UPDATE bytecode_verdicts SET hits = hits + 1 WHERE code_hash = ?",
+                    (code_hash,)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+        result['source'] = 'bytecode_index'
+        result['template_token'] = sample_token
+        return result
+
+    def record(self, code_hash: str, token_address: str, result: Dict):
+        """
+        Enregistre un verdict dû au code (les erreurs API ne sont jamais indexées)
+
+        Le verdict indexé ne garde que les signaux du code: taxes et flags de
+        l'échantillon ne sont pas transmis aux clones.
+        """
+        if result.get('error'):
+            return
+        result = code_verdict(result)
+        if result is None:
+            return
+        outcome = 'unsafe'
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT INTO bytecode_verdicts
+                    (code_hash, outcome, result, sample_token, hits, updated_at)
+                    VALUES (?, ?, ?, ?, 0, ?)
+                    ON CONFLICT(code_hash) DO UPDATE SET
+                        outcome = excluded.outcome,
+                        result = excluded.result,
+                        sample_token = excluded.sample_token,
+                        updated_at = excluded.updated_at
+                ''', (code_hash, outcome, json.dumps(result), token_address.lower(), time.time()))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Erreur écriture index bytecode: {e}")
+
+
+class BytecodeScreener:
+    """Récupère et analyse le bytecode des tokens avec cache en mémoire"""
+
+    def __init__(self, w3: Web3, max_workers: int = None,
+                 index: Optional[BytecodeVerdictIndex] = None):
+        self.w3 = w3
+        self.index = index
+        self.max_workers = max_workers or int(os.getenv('BYTECODE_SCREEN_WORKERS', 2))
+        # En dessous de ce nombre de tokens, l'analyse reste dans le process courant
+        self.pool_threshold = int(os.getenv('BYTECODE_SCREEN_POOL_THRESHOLD', 8))
+
+        self._code_cache = LRUCache(maxsize=2048)
+        self._vector_cache = LRUCache(maxsize=2048)
+        self._fingerprint_cache = LRUCache(maxsize=2048)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def fetch_code(self, token_address: str) -> Optional[bytes]:
+        """
+        Récupère le runtime bytecode (un seul eth_getCode par adresse)
+
+        Un code vide n'est pas mis en cache: un noeud en retard peut ne pas
+        encore voir un déploiement récent, l'adresse sera relue au prochain appel.
+        """
+        key = token_address.lower()
+        with self._lock:
+            if key in self._code_cache:
+                return self._code_cache[key]
+        try:
+            code = bytes(self.w3.eth.get_code(Web3.to_checksum_address(token_address)))
+        except Exception as e:
+            print(f"Erreur eth_getCode {token_address}: {e}")
+            return None
+        if code:
+            with self._lock:
+                self._code_cache[key] = code
+        return code
+
+    def screen(self, token_address: str) -> Optional[Dict]:
+        """Vecteur de risque d'un token (None si le bytecode est inaccessible)"""
+        key = token_address.lower()
+        with self._lock:
+            if key in self._vector_cache:
+                return self._vector_cache[key]
+
+        code = self.fetch_code(token_address)
+        if code is None:
+            return None
+
+        vector = analyze_bytecode(code)
+        if vector['has_code']:
+            with self._lock:
+                self._vector_cache[key] = vector
+        return vector
+
+    def fingerprint(self, token_address: str) -> Optional[str]:
+        """Empreinte du bytecode d'un token (None si inaccessible ou sans code)"""
+        key = token_address.lower()
+        with self._lock:
+            if key in self._fingerprint_cache:
+                return self._fingerprint_cache[key]
+
+        code = self.fetch_code(token_address)
+        if not code:
+            return None
+
+        code_hash = code_fingerprint(code)
+        with self._lock:
+            self._fingerprint_cache[key] = code_hash
+        return code_hash
+
+    def _indexable_fingerprint(self, token_address: str) -> Optional[str]:
+        """Empreinte utilisable pour l'index (jamais pour un proxy)"""
+        vector = self.screen(token_address)
+        # Tous les proxys d'un même modèle partagent le code mais pas l'implémentation
+        if not vector or vector['proxy']:
+            return None
+        return self.fingerprint(token_address)
+
+    def lookup_verdict(self, token_address: str) -> Optional[Dict]:
+        """Verdict d'un clone déjà vérifié (même empreinte), sinon None"""
+        if not self.index:
+            return None
+        code_hash = self._indexable_fingerprint(token_address)
+        return self.index.lookup(code_hash) if code_hash else None
+
+    def record_verdict(self, token_address: str, result: Dict):
+        """Indexe un verdict sous l'empreinte du bytecode du token"""
+        if not self.index or result.get('source') == 'bytecode_index':
+            return
+        code_hash = self._indexable_fingerprint(token_address)
+        if code_hash:
+            self.index.record(code_hash, token_address, result)
+
+    def screen_many(self, token_addresses: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Analyse un lot de tokens (process pool pour les rafales)
+
+        Returns:
+            {adresse_minuscule: vecteur} pour les tokens dont le code est accessible
+        """
+        results = {}
+        pending = []
+        for address in token_addresses:
+            key = address.lower()
+            with self._lock:
+                cached = self._vector_cache.get(key)
+            if cached is not None:
+                results[key] = cached
+                continue
+            code = self.fetch_code(address)
+            if code is not None:
+                pending.append((key, code))
+
+        if not pending:
+            return results
+
+        codes = [code for _, code in pending]
+        if len(pending) >= self.pool_threshold:
+            vectors = list(self._get_executor().map(analyze_bytecode, codes, chunksize=4))
+        else:
+            vectors = [analyze_bytecode(code) for code in codes]
+
+        with self._lock:
+            for (key, _), vector in zip(pending, vectors):
+                if vector['has_code']:
+                    self._vector_cache[key] = vector
+                results[key] = vector
+        return results
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self):
+        """Arrête le process pool"""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def bytecode_verdict(vector: Dict) -> Dict:
+    """Verdict au format HoneypotChecker pour un token rejeté par le bytecode"""
+    return {
+        'is_honeypot': True,
+        'is_safe': False,
+        'buy_tax': 0,
+        'sell_tax': 0,
+        'transfer_tax': 0,
+        'can_buy': False,
+        'can_sell': False,
+        'liquidity_amount': 0,
+        'flags': list(vector['flags']),
+        'risk_level': 'CRITICAL',
+        'error': None,
+        'source': 'bytecode'
+    }
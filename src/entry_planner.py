@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Plans d'entrée: taille de position plafonnée par l'impact de prix, calculée
+à l'avance depuis la profondeur réelle de la pool
+
+Pour chaque candidat approuvé, la pool V3 la plus liquide (PoolRegistry) est
+simulée localement (V3LocalQuoter): la taille retenue est la plus grande part
+du budget dont l'impact reste sous MAX_PRICE_IMPACT_PERCENT, et le
+amountOutMinimum découle de la sortie simulée. Au moment de l'achat, le plan
+en cache donne directement taille, fee tier et min-out: aucune cotation.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from web3 import Web3
+
+from pool_registry import WETH_ADDRESS, PoolRegistry
+from v3_quoter import V3LocalQuoter
+
+# Itérations de la recherche dichotomique de la taille (précision budget / 2^n)
+SIZE_SEARCH_STEPS = 16
+
+
+class EntryPlanner:
+    """Calcule et garde en cache les plans d'entrée des candidats"""
+
+    def __init__(self, registry: PoolRegistry, quoter: V3LocalQuoter, weth: str = WETH_ADDRESS):
+        self.registry = registry
+        self.quoter = quoter
+        self.weth = Web3.to_checksum_address(weth)
+
+        self.max_price_impact = float(os.getenv('MAX_PRICE_IMPACT_PERCENT', 2)) / 100
+        self.slippage = float(os.getenv('MAX_SLIPPAGE_PERCENT', 3)) / 100
+        self.min_size_wei = Web3.to_wei(float(os.getenv('MIN_POSITION_SIZE_ETH', 0.05)), 'ether')
+        self.max_age = float(os.getenv('ENTRY_PLAN_MAX_AGE_SECONDS', 30))
+
+        self.plans: Dict[str, Dict] = {}  # {token (minuscules): plan}
+
+    def _quote(self, pool: str, amount_in: int) -> Optional[Dict]:
+        return self.quoter.quote_exact_input(pool, self.weth, amount_in, max_age=None)
+
+    def _within_cap(self, quote: Optional[Dict]) -> bool:
+        return bool(quote and quote['complete'] and quote['amount_out'] > 0
+                    and quote['price_impact'] <= self.max_price_impact)
+
+    def plan(self, token: str, budget_wei: int) -> Optional[Dict]:
+        """
+        Plan d'entrée d'un token pour un budget donné
+
+        Returns:
+            {'token', 'pool', 'fee', 'amount_in', 'amount_out', 'min_amount_out',
+             'price_impact', 'budget', 'viable', 'reason', 'created_at'}
+            ou None si aucune pool V3 n'est cotable
+        """
+        best = self.registry.best_pool(token)
+        if not best:
+            return None
+        pool = best['pool']
+        if self.quoter.get_state(pool) is None:
+            return None
+
+        size, quote = budget_wei, self._quote(pool, budget_wei)
+        if not self._within_cap(quote):
+            # Impact croissant avec la taille: dichotomie sur (0, budget)
+            low, high, quote = 0, budget_wei, None
+            for _ in range(SIZE_SEARCH_STEPS):
+                mid = (low + high) // 2
+                candidate = self._quote(pool, mid)
+                if self._within_cap(candidate):
+                    low, quote = mid, candidate
+                else:
+                    high = mid
+            size = low
+
+        viable = quote is not None and size >= self.min_size_wei
+        plan = {
+            'token': token.lower(),
+            'pool': pool,
+            'fee': best['fee'],
+            'amount_in': size if viable else 0,
+            'amount_out': quote['amount_out'] if viable else 0,
+            'min_amount_out': int(quote['amount_out'] * (1 - self.slippage)) if viable else 0,
+            'price_impact': quote['price_impact'] if quote else None,
+            'budget': budget_wei,
+            'viable': viable,
+            'reason': None if viable else (
+                f"Pool trop peu profonde: {size / 10**18:.4f} ETH max pour "
+                f"{self.max_price_impact * 100:.1f}% d'impact"
+            ),
+            'created_at': time.time()
+        }
+        self.plans[token.lower()] = plan
+        return plan
+
+    def plan_many(self, tokens: Iterable[str], budget_wei: int) -> Dict[str, Optional[Dict]]:
+        """Plans de plusieurs candidats (registre relevé en un multicall)"""
+        tokens = list(tokens)
+        now = time.time()
+        stale = []
+        for token in tokens:
+            pools = self.registry.get_pools(token)
+            if not pools or now - min(p['last_seen'] for p in pools) >= self.registry.max_age:
+                stale.append(token)
+        if stale:
+            self.registry.refresh(stale)
+
+        plans = {}
+        for token in tokens:
+            try:
+                plans[token.lower()] = self.plan(token, budget_wei)
+            except Exception as e:
+                print(f"Erreur plan d'entrée {token}: {e}")
+                plans[token.lower()] = None
+        return plans
+
+    def get_plan(self, token: str) -> Optional[Dict]:
+        """Plan en cache s'il a moins de ENTRY_PLAN_MAX_AGE_SECONDS"""
+        plan = self.plans.get(token.lower())
+        if not plan or time.time() - plan['created_at'] >= self.max_age:
+            return None
+        return plan
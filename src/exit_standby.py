@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Sorties pré-signées: une transaction de vente prête pour chaque position
+
+Pour chaque position ouverte (allowance déjà accordée), le swap de sortie est
+construit et signé à l'avance avec le prochain nonce du wallet. Son
+amountOutMinimum est calculé au prix plancher: le prix du stop moins
+EXIT_STANDBY_HEADROOM_PERCENT. Un stop se déclenche une fois le prix passé
+sous le stop: la transaction signée reste valable tant que le prix courant
+est au-dessus du plancher, et la sortie se réduit à un send_raw_transaction.
+
+La sortie est re-signée quand le stop monte (trailing), quand le gas price, la
+quantité ou le nonce changent, ou à l'approche de l'échéance du swap. Hors
+urgence (rug), elle ne sert que si le prix est au niveau du stop: plus haut,
+le plancher laisserait trop de marge à un sandwich.
+
+Le prochain nonce est commun à toutes les positions: la première sortie le
+réclame (NonceManager.claim), les autres sont re-signées au cycle suivant.
+Une sortie dont la transaction n'est plus valable repasse par le chemin normal.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from tx_manager import NonceManager
+
+# build_txn(token, nonce, fees, prix plancher) -> (transaction, {'amount_in', 'min_out', ...})
+# fees: {'maxFeePerGas', 'maxPriorityFeePerGas'}; min_out calculé au prix plancher
+TxBuilder = Callable[[str, int, Dict, float], Tuple[Dict, Dict]]
+
+
+class ExitStandby:
+    """Transactions de sortie signées à l'avance, par position"""
+
+    def __init__(self, account, nonce_manager: NonceManager, build_txn: TxBuilder):
+        self.account = account
+        self.nonce_manager = nonce_manager
+        self.build_txn = build_txn
+
+        # Plancher du amountOutMinimum signé, sous le prix du stop
+        self.headroom = float(os.getenv('EXIT_STANDBY_HEADROOM_PERCENT', 5)) / 100
+        # Re-signature si le stop bouge de plus que ça; marge au-dessus du stop à l'envoi
+        self.price_tolerance = float(os.getenv('EXIT_STANDBY_PRICE_TOLERANCE_PERCENT', 1)) / 100
+        self.gas_tolerance = float(os.getenv('EXIT_STANDBY_GAS_TOLERANCE_PERCENT', 10)) / 100
+        # Le swap expire après 300s (deadline): re-signature bien avant
+        self.max_age = float(os.getenv('EXIT_STANDBY_MAX_AGE_SECONDS', 120))
+
+        self._lock = threading.Lock()
+        self.standby: Dict[str, Dict] = {}  # {token (minuscules): sortie signée}
+        self.latencies = deque(maxlen=500)  # déclenchement -> transaction prête (ms)
+        self.stats = {'signed': 0, 'taken': 0, 'stale': 0}
+
+    def _deviates(self, signed: float, current: float, tolerance: float) -> bool:
+        if not signed:
+            return True
+        return abs(current - signed) / signed > tolerance
+
+    def is_fresh(self, entry: Dict, stop_price: Optional[float], amount: int, fees: Optional[Dict],
+                 nonce: Optional[int]) -> bool:
+        """Vrai si la transaction signée correspond encore au stop, gas et nonce courants"""
+        return (
+            entry['amount_in'] == amount
+            and (nonce is None or entry['nonce'] == nonce)
+            and time.time() - entry['signed_at'] < self.max_age
+            and (stop_price is None or not self._deviates(entry['stop_price'], stop_price,
+                                                          self.price_tolerance))
+            and (fees is None or not self._deviates(entry['fees']['maxFeePerGas'],
+                                                    fees['maxFeePerGas'], self.gas_tolerance))
+        )
+
+    def covers(self, entry: Dict, price: float, urgent: bool = False) -> bool:
+        """
+        Vrai si la transaction signée peut partir au prix courant
+
+        Au-dessus du plancher, amountOutMinimum est atteignable. Hors urgence,
+        le prix doit aussi être au niveau du stop (pas de marge excessive).
+        """
+        if price < entry['floor_price']:
+            return False
+        return urgent or price <= entry['stop_price'] * (1 + self.price_tolerance)
+
+    def prepare(self, token: str, stop_price: float, amount: int, fees: Dict) -> Dict:
+        """Signe (ou garde) la sortie d'une position"""
+        nonce = self.nonce_manager.peek()
+        entry = self.standby.get(token.lower())
+        if entry and self.is_fresh(entry, stop_price, amount, fees, nonce):
+            return entry
+
+        floor_price = stop_price * (1 - self.headroom)
+        txn, meta = self.build_txn(token, nonce, fees, floor_price)
+        signed = self.account.sign_transaction(txn)
+        entry = dict(meta)
+        entry.update({
+            'token': token.lower(),
+            'stop_price': stop_price,
+            'floor_price': floor_price,
+            'nonce': nonce,
+            'fees': fees,
+            'txn': txn,
+            'raw': signed.rawTransaction,
+            'tx_hash': signed.hash.hex(),
+            'signed_at': time.time()
+        })
+        with self._lock:
+            self.standby[token.lower()] = entry
+            self.stats['signed'] += 1
+        return entry
+
+    def refresh(self, positions: Iterable[Tuple[str, float, int]], fees: Dict) -> int:
+        """
+        Re-signe les sorties périmées
+
+        Args:
+            positions: [(token, prix du stop, quantité à vendre)]
+
+        Returns:
+            Nombre de sorties prêtes
+        """
+        positions = list(positions)
+        held = {token.lower() for token, _, _ in positions}
+        with self._lock:
+            for token in [t for t in self.standby if t not in held]:
+                del self.standby[token]
+
+        ready = 0
+        for token, stop_price, amount in positions:
+            try:
+                self.prepare(token, stop_price, amount, fees)
+                ready += 1
+            except Exception as e:
+                print(f"Erreur signature sortie {token}: {e}")
+                self.discard(token)
+        return ready
+
+    def take(self, token: str, price: float, amount: int, started_at: float = None,
+             urgent: bool = False) -> Optional[Dict]:
+        """
+        Sortie signée prête à diffuser, None si absente, périmée ou hors plancher
+
+        Le nonce de la transaction est réclamé auprès du NonceManager: si une
+        autre transaction l'a pris entre-temps, la sortie est abandonnée.
+
+        Args:
+            urgent: sortie d'urgence (rug): seul le plancher compte
+        """
+        started_at = started_at if started_at is not None else time.perf_counter()
+        with self._lock:
+            entry = self.standby.pop(token.lower(), None)
+        if entry is None:
+            return None
+        if (not self.is_fresh(entry, None, amount, None, None)
+                or not self.covers(entry, price, urgent)
+                or not self.nonce_manager.claim(entry['nonce'])):
+            self.stats['stale'] += 1
+            return None
+
+        self.stats['taken'] += 1
+        self.latencies.append((time.perf_counter() - started_at) * 1000)
+        return entry
+
+    def discard(self, token: str):
+        with self._lock:
+            self.standby.pop(token.lower(), None)
+
+    def latency_stats(self) -> Optional[Dict]:
+        """Latence déclenchement -> transaction prête (ms)"""
+        if not self.latencies:
+            return None
+        samples = sorted(self.latencies)
+        return {
+            'count': len(samples),
+            'median_ms': samples[len(samples) // 2],
+            'max_ms': samples[-1]
+        }
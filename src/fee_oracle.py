@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Oracle de frais EIP-1559 rafraîchi une fois par bloc (eth_feeHistory)
+
+Un seul appel eth_feeHistory par bloc donne le base fee du prochain bloc et
+les percentiles de tip des derniers blocs. Les paramètres de frais sont
+ensuite servis depuis le cache, sans appel RPC au moment d'envoyer: achat,
+vente, approve et remplacements lisent tous l'oracle.
+
+Deux niveaux d'urgence: 'normal' (percentile médian) pour les achats et les
+sorties ordinaires, 'urgent' (percentile haut) pour les stops et les sorties
+d'urgence, qui doivent passer dans le prochain bloc.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from web3 import Web3
+
+
+class FeeOracle:
+    """Base fee et percentiles de tip en cache, relevés à chaque bloc"""
+
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+        self.history_blocks = int(os.getenv('FEE_HISTORY_BLOCKS', 10))
+        self.percentiles = {
+            'normal': int(os.getenv('FEE_PERCENTILE_NORMAL', 50)),
+            'urgent': int(os.getenv('FEE_PERCENTILE_URGENT', 90))
+        }
+        # maxFeePerGas = base fee x multiplicateur + tip (marge si le base fee monte)
+        self.base_fee_multiplier = float(os.getenv('FEE_BASE_MULTIPLIER', 2))
+        self.min_tip = int(float(os.getenv('FEE_MIN_PRIORITY_GWEI', 0.001)) * 10**9)
+        # Au-delà, le cache est considéré périmé (l'appelant relit le noeud)
+        self.max_age = float(os.getenv('FEE_ORACLE_MAX_AGE_SECONDS', 30))
+
+        self._lock = threading.Lock()
+        self.base_fee: Optional[int] = None
+        self.tips: Dict[int, int] = {}  # {percentile: tip médian des derniers blocs}
+        self.block: Optional[int] = None
+        self.updated_at = 0.0
+
+    def refresh(self) -> bool:
+        """Relit eth_feeHistory; vrai si un nouveau bloc a été pris en compte"""
+        percentiles = sorted(set(self.percentiles.values()))
+        history = self.w3.eth.fee_history(self.history_blocks, 'latest', percentiles)
+        block = history['oldestBlock'] + len(history['baseFeePerGas']) - 2
+        if block == self.block:
+            with self._lock:
+                self.updated_at = time.time()
+            return False
+
+        tips = {}
+        for i, percentile in enumerate(percentiles):
+            samples = sorted(rewards[i] for rewards in history['reward'] if rewards)
+            tips[percentile] = samples[len(samples) // 2] if samples else 0
+
+        with self._lock:
+            # Dernier élément: base fee du prochain bloc
+            self.base_fee = history['baseFeePerGas'][-1]
+            self.tips = tips
+            self.block = block
+            self.updated_at = time.time()
+        return True
+
+    def is_fresh(self) -> bool:
+        return self.base_fee is not None and time.time() - self.updated_at < self.max_age
+
+    def _ensure_fresh(self):
+        if not self.is_fresh():
+            self.refresh()
+
+    def tip(self, urgency: str = 'normal') -> int:
+        self._ensure_fresh()
+        with self._lock:
+            return max(self.tips.get(self.percentiles[urgency], 0), self.min_tip)
+
+    def fee_params(self, urgency: str = 'normal') -> Dict:
+        """Champs de frais EIP-1559 d'une transaction (cache, sans RPC si frais)"""
+        tip = self.tip(urgency)
+        with self._lock:
+            max_fee = int(self.base_fee * self.base_fee_multiplier) + tip
+        return {'maxFeePerGas': max_fee, 'maxPriorityFeePerGas': tip}
+
+    def gas_price(self, urgency: str = 'normal') -> int:
+        """Prix effectif attendu par unité de gas (base fee + tip)"""
+        tip = self.tip(urgency)
+        with self._lock:
+            return self.base_fee + tip
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Gas limits appris par token, sens (buy / sell / approve) et fee tier
+
+Chaque reçu (gasUsed) et chaque estimation faite hors du chemin critique
+(estimate_gas pendant la planification d'entrée, puis après l'approve d'une
+position) alimente les derniers échantillons de la route. Le gas limit d'une
+transaction est le plus haut échantillon récent plus GAS_LIMIT_MARGIN_PERCENT:
+assez pour les tokens à taxe de transfert, sans réserver les valeurs fixes
+GAS_LIMIT_BUY / GAS_LIMIT_SELL, qui ne servent plus que pour une route
+inconnue.
+
+Une transaction revertée à court de gas compte comme un échantillon majoré
+de GAS_OOG_BUMP_PERCENT: la tentative suivante part avec plus de marge. Les
+autres reverts ne sont pas des échantillons (leur gasUsed s'arrête au revert).
+
+Les échantillons sont gardés en mémoire (lecture instantanée à l'envoi) et
+persistés dans SQLite (table gas_estimates).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_DIR = Path(__file__).parent.parent
+DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+
+# Échantillons conservés par route
+MAX_SAMPLES = 10
+
+
+class GasEstimator:
+    """Échantillons de gas par route et gas limits dérivés"""
+
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path) if db_path else DB_PATH
+        self.margin = float(os.getenv('GAS_LIMIT_MARGIN_PERCENT', 20)) / 100
+        self.oog_bump = float(os.getenv('GAS_OOG_BUMP_PERCENT', 50)) / 100
+
+        self._lock = threading.Lock()
+        self.samples: Dict[Tuple[str, str, int], List[int]] = {}  # {(token, sens, fee): [gas]}
+        self._init_table()
+        self.load()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_table(self):
+        """Crée la table des estimations si nécessaire"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gas_estimates (
+                    token_address TEXT NOT NULL,
+                    direction TEXT NOT NULL,
+                    fee INTEGER NOT NULL,
+                    samples TEXT NOT NULL,
+                    source TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (token_address, direction, fee)
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self) -> int:
+        """Charge les échantillons persistés"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT token_address, direction, fee, samples FROM gas_estimates'
+            ).fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            for token, direction, fee, samples in rows:
+                self.samples[(token, direction, fee)] = json.loads(samples)
+        return len(rows)
+
+    def record(self, token: str, direction: str, fee: int, gas_used: int,
+               source: str = 'receipt', gas_limit: Optional[int] = None, success: bool = True):
+        """
+        Ajoute un échantillon de gas
+
+        Args:
+            gas_limit: gas limit de la transaction; revert avec gasUsed proche
+                du limit = à court de gas, échantillon majoré. Tout autre revert
+                (slippage, honeypot...) s'arrête tôt: ignoré
+        """
+        if not success:
+            if not gas_limit or gas_used < gas_limit * 0.97:
+                return
+            gas_used = int(gas_used * (1 + self.oog_bump))
+        key = (token.lower(), direction, fee)
+        with self._lock:
+            samples = (self.samples.get(key, []) + [int(gas_used)])[-MAX_SAMPLES:]
+            self.samples[key] = samples
+
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO gas_estimates
+                    (token_address, direction, fee, samples, source, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key[0], direction, fee, json.dumps(samples), source, time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def known(self, token: str, direction: str, fee: int) -> bool:
+        with self._lock:
+            return (token.lower(), direction, fee) in self.samples
+
+    def gas_limit(self, token: str, direction: str, fee: int, default: int) -> int:
+        """Gas limit de la route (plus haut échantillon + marge), default si inconnue"""
+        with self._lock:
+            samples = self.samples.get((token.lower(), direction, fee))
+        if not samples:
+            return default
+        return int(max(samples) * (1 + self.margin))
@@ -4,18 +4,166 @@ Module de vérification honeypot pour tokens ERC20
 Utilise l'API Honeypot.is pour détecter les tokens malveillants
 """
 
+import json
+import os
+import sqlite3
+import threading
+import time
 import requests
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from bytecode_analyzer import BytecodeScreener, bytecode_verdict
+
+PROJECT_DIR = Path(__file__).parent.parent
+DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+
+
+class HoneypotVerdictCache:
+    """
+    Cache des verdicts honeypot persisté dans SQLite
+
+    Partagé entre tous les services (Filter, Trader...) via la table
+    honeypot_cache. Chaque issue (safe / unsafe / error) a son propre TTL.
+    Après expiration, un verdict safe/unsafe reste servi pendant la fenêtre
+    "stale" le temps qu'une revalidation tourne en arrière-plan.
+    """
+
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path) if db_path else DB_PATH
+        self.ttl_seconds = {
+            'safe': float(os.getenv('HONEYPOT_CACHE_TTL_SAFE_MINUTES', 30)) * 60,
+            'unsafe': float(os.getenv('HONEYPOT_CACHE_TTL_UNSAFE_MINUTES', 1440)) * 60,
+            'error': float(os.getenv('HONEYPOT_CACHE_TTL_ERROR_MINUTES', 2)) * 60
+        }
+        self.stale_seconds = float(os.getenv('HONEYPOT_CACHE_STALE_MINUTES', 30)) * 60
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_table(self):
+        """Crée la table du cache si nécessaire"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS honeypot_cache (
+                    token_address TEXT NOT NULL,
+                    chain_id INTEGER NOT NULL,
+                    outcome TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (token_address, chain_id)
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def outcome_of(result: Dict) -> str:
+        """Classe un résultat: 'error', 'safe' ou 'unsafe'"""
+        if result.get('error'):
+            return 'error'
+        return 'safe' if result.get('is_safe') else 'unsafe'
+
+    def get(self, token_address: str, chain_id: int = 8453) -> Optional[Dict]:
+        """
+        Lit un verdict en cache
+
+        Returns:
+            {'result': dict, 'outcome': str, 'age': float, 'status': 'fresh' | 'stale'}
+            ou None si absent / expiré
+        """
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute('''
+                    SELECT outcome, result, checked_at FROM honeypot_cache
+                    WHERE token_address = ? AND chain_id = ?
+                ''', (token_address.lower(), chain_id)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+        if not row:
+            return None
+
+        outcome, result_json, checked_at = row
+        age = time.time() - checked_at
+        ttl = self.ttl_seconds.get(outcome, 0)
+
+        if age < ttl:
+            status = 'fresh'
+        elif outcome != 'error' and age < ttl + self.stale_seconds:
+            status = 'stale'
+        else:
+            return None
+
+        return {
+            'result': json.loads(result_json),
+            'outcome': outcome,
+            'age': age,
+            'status': status
+        }
+
+    def put(self, token_address: str, chain_id: int, result: Dict):
+        """Enregistre (ou remplace) un verdict"""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO honeypot_cache
+                    (token_address, chain_id, outcome, result, checked_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (token_address.lower(), chain_id, self.outcome_of(result),
+                      json.dumps(result), time.time()))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Erreur écriture cache honeypot: {e}")
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées au-delà de leur fenêtre stale"""
+        now = time.time()
+        deleted = 0
+        try:
+            conn = self._connect()
+            try:
+                for outcome, ttl in self.ttl_seconds.items():
+                    max_age = ttl if outcome == 'error' else ttl + self.stale_seconds
+                    cursor = conn.execute(
+                        "DELETE FROM honeypot_cache WHERE outcome = ? AND checked_at < ?",
+                        (outcome, now - max_age)
+                    )
+                    deleted += cursor.rowcount
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Erreur purge cache honeypot: {e}")
+        return deleted
 
 
 class HoneypotChecker:
     """Vérification honeypot via API Honeypot.is"""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[HoneypotVerdictCache] = None,
+                 screener: Optional[BytecodeScreener] = None):
         self.api_url = "https://api.honeypot.is/v2/IsHoneypot"
         self.session = self._create_session()
+        self.cache = cache
+        # Pré-filtrage bytecode local: évite l'appel API pour les tokens manifestement malveillants
+        self.screener = screener
+
+        # Revalidations en arrière-plan en cours (stale-while-revalidate)
+        self._revalidating = set()
+        self._revalidate_lock = threading.Lock()
 
     def _create_session(self) -> requests.Session:
         """Crée une session avec retry automatique"""
@@ -30,13 +178,14 @@ class HoneypotChecker:
         session.mount("https://", adapter)
         return session
 
-    def check_token(self, token_address: str, chain_id: int = 8453) -> Dict:
+    def check_token(self, token_address: str, chain_id: int = 8453, use_cache: bool = True) -> Dict:
         """
         Vérifie si un token est un honeypot
 
         Args:
             token_address: Adresse du token à vérifier
             chain_id: ID de la blockchain (8453 = Base)
+            use_cache: Consulter le cache partagé avant d'appeler l'API
 
         Returns:
             {
@@ -50,9 +199,66 @@ class HoneypotChecker:
                 'liquidity_amount': float,
                 'flags': list,
                 'risk_level': str,  # 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL'
-                'error': str or None
+                'error': str or None,
+                'from_cache': bool
             }
         """
+        if self.cache and use_cache:
+            entry = self.cache.get(token_address, chain_id)
+            if entry:
+                if entry['status'] == 'stale':
+                    # Servir le verdict périmé, rafraîchir en arrière-plan
+                    self._revalidate_async(token_address, chain_id)
+                return dict(entry['result'], from_cache=True)
+
+        return self._check_and_store(token_address, chain_id)
+
+    def _check_and_store(self, token_address: str, chain_id: int) -> Dict:
+        """Appelle l'API et enregistre le verdict dans le cache"""
+        result = self._prescreen(token_address)
+        if result is None:
+            result = self._fetch_verdict(token_address, chain_id)
+            if self.screener:
+                # Les clones de ce bytecode hériteront du verdict
+                self.screener.record_verdict(token_address, result)
+        # Pas de code à l'adresse: peut-être un noeud en retard, verdict non persisté
+        if self.cache and 'NO_CODE' not in result.get('flags', []):
+            self.cache.put(token_address, chain_id, result)
+        return dict(result, from_cache=False)
+
+    def _prescreen(self, token_address: str) -> Optional[Dict]:
+        """
+        Verdict local sans appel API, sinon None
+
+        1. Bytecode manifestement malveillant
+        2. Clone d'un contrat déjà vérifié (même empreinte de bytecode)
+        """
+        if not self.screener:
+            return None
+        vector = self.screener.screen(token_address)
+        if vector and vector['is_malicious']:
+            return bytecode_verdict(vector)
+        return self.screener.lookup_verdict(token_address)
+
+    def _revalidate_async(self, token_address: str, chain_id: int):
+        """Lance une revalidation en arrière-plan (une seule par token)"""
+        key = (token_address.lower(), chain_id)
+        with self._revalidate_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def _worker():
+            try:
+                self._check_and_store(token_address, chain_id)
+            finally:
+                with self._revalidate_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _fetch_verdict(self, token_address: str, chain_id: int) -> Dict:
+        """Interroge l'API Honeypot.is (sans cache)"""
         try:
             # Appel API
             params = {
@@ -193,6 +399,98 @@ class HoneypotChecker:
             self.session.close()
 
 
+class HoneypotPrefetcher:
+    """
+    Préchauffe le cache honeypot pour les meilleurs candidats du Trader
+
+    Tourne dans un thread de fond: à chaque cycle, récupère le top N des
+    tokens approuvés (même ordre que get_next_token) et vérifie en parallèle
+    ceux dont le verdict est absent, périmé ou proche de l'expiration.
+    La validation avant achat tombe alors presque toujours sur le cache.
+    """
+
+    def __init__(self, cache: HoneypotVerdictCache,
+                 candidates_provider: Callable[[int], List[str]],
+                 chain_id: int = 8453, logger=None,
+                 screener: Optional[BytecodeScreener] = None):
+        self.cache = cache
+        self.candidates_provider = candidates_provider
+        self.chain_id = chain_id
+        self.logger = logger
+
+        self.top_n = int(os.getenv('HONEYPOT_PREFETCH_TOP_N', 5))
+        self.interval = float(os.getenv('HONEYPOT_PREFETCH_INTERVAL_SECONDS', 60))
+        self.max_workers = int(os.getenv('HONEYPOT_PREFETCH_WORKERS', 4))
+        # Rafraîchir un verdict safe quand 80% de son TTL est écoulé
+        self.refresh_ratio = 0.8
+
+        # Checker dédié: session HTTP séparée de celle du Trader
+        self.checker = HoneypotChecker(cache=cache, screener=screener)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.stats = {'cycles': 0, 'checked': 0}
+
+    def _log(self, level: str, message: str):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def needs_refresh(self, token_address: str) -> bool:
+        """Vrai si le verdict en cache est absent, périmé ou bientôt expiré"""
+        entry = self.cache.get(token_address, self.chain_id)
+        if not entry or entry['status'] == 'stale':
+            return True
+        ttl = self.cache.ttl_seconds.get(entry['outcome'], 0)
+        return entry['age'] >= ttl * self.refresh_ratio
+
+    def prefetch_once(self) -> int:
+        """Exécute un cycle de préchargement, retourne le nombre de tokens vérifiés"""
+        try:
+            candidates = self.candidates_provider(self.top_n)
+        except Exception as e:
+            self._log('warning', f"Prefetch honeypot: erreur récupération candidats: {e}")
+            return 0
+
+        to_check = [addr for addr in candidates if self.needs_refresh(addr)]
+        if not to_check:
+            return 0
+
+        if self.checker.screener:
+            # Analyse bytecode du lot en une passe (process pool si rafale)
+            self.checker.screener.screen_many(to_check)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda addr: self.checker._check_and_store(addr, self.chain_id),
+                to_check
+            ))
+
+        unsafe = sum(1 for r in results if not r.get('is_safe'))
+        self.stats['checked'] += len(to_check)
+        self._log('info', f"🍯 Prefetch honeypot: {len(to_check)} verdicts rafraîchis ({unsafe} non sûrs)")
+        return len(to_check)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.prefetch_once()
+            self.stats['cycles'] += 1
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Démarre le thread de préchargement"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='honeypot-prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le thread et ferme la session HTTP"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        self.checker.close()
+
+
 # Fonction standalone pour usage rapide
 def check_honeypot(token_address: str, chain_id: int = 8453) -> Dict:
     """
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Simulation honeypot on-chain: achat puis vente réels via le router Uniswap V3,
+exécutés dans un eth_call (rien n'est diffusé, aucun gaz dépensé).
+
+Déroulement pour un lot de tokens:
+    1. Un multicall de cotations QuoterV2 (WETH -> token) sur tous les fee tiers
+       choisit la meilleure pool de chaque token.
+    2. Un seul eth_call exécute, pour tous les tokens du lot:
+           balanceOf -> achat (ETH -> token) -> balanceOf -> approve
+           -> cotation de la vente -> vente (token -> WETH) -> balanceOf
+       depuis un portefeuille synthétique: le code Multicall3 est placé à une
+       adresse fictive et l'expéditeur est crédité en ETH (state overrides).
+
+Les taxes sont déduites des montants réellement obtenus:
+    - taxe achat = 1 - tokens reçus / tokens envoyés par la pool
+    - taxe vente = 1 - WETH obtenus / WETH cotés (et tokens débités en trop)
+
+Le résultat a le même format que HoneypotChecker (honeypot.is).
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from multicall import MULTICALL3_ADDRESS, Multicall3, encode_call
+
+WETH_ADDRESS = "0x4200000000000000000000000000000000000006"
+SWAP_ROUTER02_ADDRESS = "0x2626664c2603336E57B271c5C0b26F421741e481"
+QUOTER_V2_ADDRESS = "0x3d4e44Eb1374240CE5F1B871ab261CD16335B76a"
+FEE_TIERS = [3000, 500, 10000, 100]
+
+# Adresses fictives (aucun historique on-chain, aucune blacklist possible)
+SIM_WALLET = Web3.to_checksum_address("0x5151515151515151515151515151515151515151")
+SIM_SENDER = Web3.to_checksum_address("0x5252525252525252525252525252525252525252")
+
+MAX_UINT256 = 2 ** 256 - 1
+
+# SwapRouter02: struct ExactInputSingleParams sans deadline
+EXACT_INPUT_SINGLE = 'exactInputSingle((address,address,uint24,address,uint256,uint256,uint160))'
+EXACT_INPUT_SINGLE_TYPES = ['(address,address,uint24,address,uint256,uint256,uint160)']
+# QuoterV2: struct QuoteExactInputSingleParams
+QUOTE_EXACT_INPUT_SINGLE = 'quoteExactInputSingle((address,address,uint256,uint24,uint160))'
+QUOTE_EXACT_INPUT_SINGLE_TYPES = ['(address,address,uint256,uint24,uint160)']
+QUOTE_OUTPUT_TYPES = ['uint256', 'uint160', 'uint32', 'uint256']
+
+# Nombre d'appels par token dans le lot de simulation
+STEPS_PER_TOKEN = 7
+
+
+def _encode_balance_of(owner: str) -> bytes:
+    return encode_call('balanceOf(address)', ['address'], [owner])
+
+
+def _encode_approve(spender: str, amount: int) -> bytes:
+    return encode_call('approve(address,uint256)', ['address', 'uint256'], [spender, amount])
+
+
+def _encode_quote(token_in: str, token_out: str, amount_in: int, fee: int) -> bytes:
+    return encode_call(QUOTE_EXACT_INPUT_SINGLE, QUOTE_EXACT_INPUT_SINGLE_TYPES,
+                       [(token_in, token_out, amount_in, fee, 0)])
+
+
+def _encode_swap(token_in: str, token_out: str, fee: int, recipient: str, amount_in: int) -> bytes:
+    return encode_call(EXACT_INPUT_SINGLE, EXACT_INPUT_SINGLE_TYPES,
+                       [(token_in, token_out, fee, recipient, amount_in, 0, 0)])
+
+
+def _decode_uint(success: bool, data: bytes) -> Optional[int]:
+    """Premier uint256 d'un retour d'appel, None si échec ou retour vide"""
+    if not success or len(data) < 32:
+        return None
+    return decode(['uint256'], data[:32])[0]
+
+
+class HoneypotSimulator:
+    """Simule achat + vente de plusieurs tokens en un seul eth_call"""
+
+    def __init__(self, w3: Web3, router: str = SWAP_ROUTER02_ADDRESS,
+                 quoter: str = QUOTER_V2_ADDRESS, weth: str = WETH_ADDRESS):
+        self.w3 = w3
+        self.router = Web3.to_checksum_address(router)
+        self.quoter = Web3.to_checksum_address(quoter)
+        self.weth = Web3.to_checksum_address(weth)
+
+        self.amount_in = Web3.to_wei(float(os.getenv('HONEYPOT_SIM_AMOUNT_ETH', '0.01')), 'ether')
+        # Part des tokens cotés revendue (marge pour la taxe d'achat)
+        self.sell_ratio = float(os.getenv('HONEYPOT_SIM_SELL_RATIO', '0.5'))
+        self.batch_size = int(os.getenv('HONEYPOT_SIM_BATCH_SIZE', '20'))
+
+        self.multicall = Multicall3(w3)
+        self.wallet = Multicall3(w3, SIM_WALLET)
+        self._wallet_code = None
+
+    def _state_override(self, total_value: int) -> Dict:
+        """Code Multicall3 au portefeuille synthétique + ETH pour l'expéditeur"""
+        if self._wallet_code is None:
+            self._wallet_code = bytes(self.w3.eth.get_code(MULTICALL3_ADDRESS))
+            if not self._wallet_code:
+                raise RuntimeError("Multicall3 absent de cette chaîne")
+        return {
+            SIM_WALLET: {'code': self._wallet_code, 'balance': 0},
+            SIM_SENDER: {'balance': total_value + Web3.to_wei(1, 'ether')}
+        }
+
+    def select_fee_tiers(self, tokens: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        Meilleure pool WETH/token de chaque token (une seule requête)
+
+        Returns:
+            {token: (fee, tokens_attendus)} pour les tokens qui ont une pool
+        """
+        calls = [
+            (self.quoter, _encode_quote(self.weth, token, self.amount_in, fee))
+            for token in tokens for fee in FEE_TIERS
+        ]
+        results = self.multicall.aggregate3(calls)
+
+        best = {}
+        for i, token in enumerate(tokens):
+            for j, fee in enumerate(FEE_TIERS):
+                success, data = results[i * len(FEE_TIERS) + j]
+                if not success or len(data) < 128:
+                    continue
+                amount_out = decode(QUOTE_OUTPUT_TYPES, data)[0]
+                if amount_out > best.get(token, (0, 0))[1]:
+                    best[token] = (fee, amount_out)
+        return best
+
+    def _build_calls(self, token: str, fee: int, expected_out: int) -> Tuple[List[Tuple[str, int, bytes]], int]:
+        """Séquence achat/vente d'un token, retourne (appels, quantité revendue)"""
+        sell_amount = int(expected_out * self.sell_ratio)
+        calls = [
+            (token, 0, _encode_balance_of(SIM_WALLET)),
+            (self.router, self.amount_in, _encode_swap(self.weth, token, fee, SIM_WALLET, self.amount_in)),
+            (token, 0, _encode_balance_of(SIM_WALLET)),
+            (token, 0, _encode_approve(self.router, MAX_UINT256)),
+            (self.quoter, 0, _encode_quote(token, self.weth, sell_amount, fee)),
+            (self.router, 0, _encode_swap(token, self.weth, fee, SIM_WALLET, sell_amount)),
+            (token, 0, _encode_balance_of(SIM_WALLET)),
+        ]
+        return calls, sell_amount
+
+    def simulate_many(self, token_addresses: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Simule achat et vente de chaque token
+
+        Returns:
+            {adresse_checksum: verdict au format HoneypotChecker}
+        """
+        tokens = list(dict.fromkeys(Web3.to_checksum_address(t) for t in token_addresses))
+        verdicts = {}
+
+        for start in range(0, len(tokens), self.batch_size):
+            chunk = tokens[start:start + self.batch_size]
+            try:
+                verdicts.update(self._simulate_chunk(chunk))
+            except Exception as e:
+                print(f"Erreur simulation honeypot ({len(chunk)} tokens): {e}")
+                for token in chunk:
+                    verdicts[token] = self._error_response(str(e))
+
+        return verdicts
+
+    def simulate(self, token_address: str) -> Dict:
+        """Simule un seul token"""
+        token = Web3.to_checksum_address(token_address)
+        return self.simulate_many([token])[token]
+
+    def _simulate_chunk(self, tokens: List[str]) -> Dict[str, Dict]:
+        verdicts = {}
+        tiers = self.select_fee_tiers(tokens)
+
+        planned = []
+        calls = []
+        for token in tokens:
+            if token not in tiers:
+                verdicts[token] = self._error_response('No Uniswap V3 pool', flags=['NO_V3_POOL'])
+                continue
+            fee, expected_out = tiers[token]
+            token_calls, sell_amount = self._build_calls(token, fee, expected_out)
+            planned.append((token, fee, sell_amount))
+            calls.extend(token_calls)
+
+        if not planned:
+            return verdicts
+
+        total_value = sum(value for _, value, _ in calls)
+        results = self.wallet.aggregate3_value(
+            calls, sender=SIM_SENDER, state_override=self._state_override(total_value)
+        )
+
+        for i, (token, fee, sell_amount) in enumerate(planned):
+            steps = results[i * STEPS_PER_TOKEN:(i + 1) * STEPS_PER_TOKEN]
+            verdicts[token] = self._interpret(steps, fee, sell_amount)
+
+        return verdicts
+
+    def _interpret(self, steps: List[Tuple[bool, bytes]], fee: int, sell_amount: int) -> Dict:
+        """Convertit les retours d'une séquence achat/vente en verdict"""
+        balance_before = _decode_uint(*steps[0]) or 0
+        pool_out = _decode_uint(*steps[1])
+        balance_bought = _decode_uint(*steps[2])
+        approved = steps[3][0]
+        quoted_out = _decode_uint(*steps[4])
+        sell_out = _decode_uint(*steps[5])
+        balance_sold = _decode_uint(*steps[6])
+
+        can_buy = pool_out is not None and pool_out > 0 and balance_bought is not None
+        if not can_buy:
+            return self._verdict(can_buy=False, can_sell=False, buy_tax=0.0, sell_tax=0.0,
+                                 fee=fee, extra_flags=['BUY_FAILED'])
+
+        received = balance_bought - balance_before
+        buy_tax = max(0.0, (1 - received / pool_out) * 100)
+
+        can_sell = approved and sell_out is not None and sell_out > 0
+        sell_tax = 0.0
+        if can_sell:
+            # Tokens débités au-delà du montant vendu = taxe prélevée sur le vendeur
+            spent = balance_bought - balance_sold if balance_sold is not None else sell_amount
+            spent_ratio = sell_amount / spent if spent > 0 else 1.0
+            quote_ratio = sell_out / quoted_out if quoted_out else 1.0
+            sell_tax = max(0.0, (1 - min(quote_ratio, 1.0) * min(spent_ratio, 1.0)) * 100)
+
+        return self._verdict(can_buy=True, can_sell=can_sell, buy_tax=buy_tax, sell_tax=sell_tax, fee=fee)
+
+    @staticmethod
+    def _verdict(can_buy: bool, can_sell: bool, buy_tax: float, sell_tax: float,
+                 fee: int, extra_flags: List[str] = None) -> Dict:
+        """Verdict au format HoneypotChecker (mêmes seuils de risque)"""
+        flags = list(extra_flags or [])
+        risk_level = 'LOW'
+
+        if not can_sell:
+            flags.append('CANNOT_SELL')
+            risk_level = 'CRITICAL'
+
+        if sell_tax >= 50:
+            flags.append('EXTREME_SELL_TAX')
+            risk_level = 'CRITICAL'
+        elif sell_tax >= 20:
+            flags.append('VERY_HIGH_SELL_TAX')
+            risk_level = 'HIGH' if risk_level != 'CRITICAL' else risk_level
+        elif sell_tax >= 10:
+            flags.append('HIGH_SELL_TAX')
+            risk_level = 'MEDIUM' if risk_level == 'LOW' else risk_level
+
+        if buy_tax >= 20:
+            flags.append('VERY_HIGH_BUY_TAX')
+            risk_level = 'HIGH' if risk_level == 'LOW' else risk_level
+        elif buy_tax >= 10:
+            flags.append('HIGH_BUY_TAX')
+            risk_level = 'MEDIUM' if risk_level == 'LOW' else risk_level
+
+        is_honeypot = not can_sell or sell_tax >= 50
+        is_safe = (
+            not is_honeypot and
+            sell_tax < 10 and
+            buy_tax < 10 and
+            risk_level in ['LOW', 'MEDIUM']
+        )
+
+        return {
+            'is_honeypot': is_honeypot,
+            'is_safe': is_safe,
+            'buy_tax': round(buy_tax, 2),
+            'sell_tax': round(sell_tax, 2),
+            'transfer_tax': 0,
+            'can_buy': can_buy,
+            'can_sell': can_sell,
+            'liquidity_amount': 0,
+            'flags': flags,
+            'risk_level': risk_level,
+            'fee_tier': fee,
+            'error': None,
+            'source': 'simulation'
+        }
+
+    @staticmethod
+    def _error_response(error_msg: str, flags: List[str] = None) -> Dict:
+        """Simulation impossible: rejeter par sécurité"""
+        return {
+            'is_honeypot': True,
+            'is_safe': False,
+            'buy_tax': 0,
+            'sell_tax': 0,
+            'transfer_tax': 0,
+            'can_buy': False,
+            'can_sell': False,
+            'liquidity_amount': 0,
+            'flags': flags or ['SIMULATION_ERROR'],
+            'risk_level': 'CRITICAL',
+            'error': error_msg,
+            'source': 'simulation'
+        }
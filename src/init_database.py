@@ -84,6 +84,16 @@ def init_database():
         )
     ''')
     
+    # Table analysis_dictionaries (dictionnaires zstd pour analysis_data compact)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_dictionaries (
+            dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            sample_count INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
     # Table trade_history (schéma aligné avec trader.py)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS trade_history (
@@ -192,7 +202,7 @@ def init_database():
     conn.close()
     
     print(f"✅ Base de données initialisée: {DB_PATH}")
-    print(f"📊 Tables créées: 8")
+    print(f"📊 Tables créées: 9")
     print(f"📈 Stratégie: Trailing 4 niveaux (12%, 30%, 100%, 300%)")
     print(f"⚙️ Configuration: 15% position, max 2 positions, 3 trades/jour")
 
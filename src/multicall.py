@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Client Multicall3: plusieurs appels de contrats en un seul eth_call
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+# Meme adresse sur toutes les chaines EVM (dont Base)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+
+def function_selector(signature: str) -> bytes:
+    """Selecteur 4 octets d'une signature ('balanceOf(address)')"""
+    return Web3.keccak(text=signature)[:4]
+
+
+def encode_call(signature: str, arg_types: Sequence[str] = (), args: Sequence = ()) -> bytes:
+    """Calldata complet: selecteur + arguments ABI-encodes"""
+    return function_selector(signature) + (encode(list(arg_types), list(args)) if arg_types else b'')
+
+
+def decode_word(success: bool, data: bytes, abi_type: str):
+    """Premier mot d'un retour d'appel, None si echec ou retour vide"""
+    if not success or len(data) < 32:
+        return None
+    return decode([abi_type], data[:32])[0]
+
+
+AGGREGATE3 = 'aggregate3((address,bool,bytes)[])'
+AGGREGATE3_VALUE = 'aggregate3Value((address,bool,uint256,bytes)[])'
+RESULT_TYPES = ['(bool,bytes)[]']
+
+
+class Multicall3:
+    """Regroupe des appels en lecture (ou simules) dans un seul eth_call"""
+
+    def __init__(self, w3: Web3, address: str = MULTICALL3_ADDRESS):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+
+    def aggregate3(self, calls: List[Tuple[str, bytes]], allow_failure: bool = True,
+                   block_identifier='latest', state_override: Optional[dict] = None,
+                   sender: Optional[str] = None) -> List[Tuple[bool, bytes]]:
+        """
+        Execute des appels sans valeur
+
+        Args:
+            calls: Liste de (adresse_cible, calldata)
+            allow_failure: Un appel en echec ne fait pas echouer le lot
+
+        Returns:
+            Liste de (succes, donnees_retour) dans l'ordre des appels
+        """
+        if not calls:
+            return []
+        payload = encode_call(AGGREGATE3, ['(address,bool,bytes)[]'], [[
+            (Web3.to_checksum_address(target), allow_failure, bytes(data))
+            for target, data in calls
+        ]])
+        tx = {'to': self.address, 'data': payload}
+        if sender:
+            tx['from'] = Web3.to_checksum_address(sender)
+        return self._call(tx, block_identifier, state_override)
+
+    def aggregate3_value(self, calls: List[Tuple[str, int, bytes]], sender: str,
+                         allow_failure: bool = True, block_identifier='latest',
+                         state_override: Optional[dict] = None) -> List[Tuple[bool, bytes]]:
+        """
+        Execute des appels avec valeur ETH (la somme est envoyee par sender)
+
+        Args:
+            calls: Liste de (adresse_cible, valeur_wei, calldata)
+            sender: Adresse qui paie msg.value (solde a surcharger si fictive)
+        """
+        if not calls:
+            return []
+        total_value = sum(value for _, value, _ in calls)
+        payload = encode_call(AGGREGATE3_VALUE, ['(address,bool,uint256,bytes)[]'], [[
+            (Web3.to_checksum_address(target), allow_failure, value, bytes(data))
+            for target, value, data in calls
+        ]])
+        tx = {
+            'from': Web3.to_checksum_address(sender),
+            'to': self.address,
+            'data': payload,
+            'value': total_value
+        }
+        return self._call(tx, block_identifier, state_override)
+
+    def _call(self, tx: dict, block_identifier, state_override: Optional[dict]) -> List[Tuple[bool, bytes]]:
+        if state_override:
+            raw = self.w3.eth.call(tx, block_identifier, state_override)
+        else:
+            raw = self.w3.eth.call(tx, block_identifier)
+        return [(success, bytes(data)) for success, data in decode(RESULT_TYPES, bytes(raw))[0]]
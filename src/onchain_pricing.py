@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Prix on-chain des positions: slot0() des pools Uniswap V3 lus en un seul multicall
+
+Pour chaque token détenu, la pool WETH/token la plus liquide est résolue une
+fois (adresses CREATE2 des fee tiers, puis liquidity/token0/decimals),
+puis chaque lecture ne coûte qu'un eth_call: slot0() de toutes les pools +
+slot0() de la pool de référence ETH/USD (WETH/USDC). Le prix USD est:
+
+    prix_token_en_WETH(sqrtPriceX96, ordre des tokens, décimales) * prix_WETH_en_USD
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from web3 import Web3
+
+from multicall import Multicall3, decode_word, encode_call
+from pool_registry import compute_pool_address
+
+UNISWAP_V3_FACTORY = "0x33128a8fC17869897dcE68Ed026d694621f6FDfD"
+WETH_ADDRESS = "0x4200000000000000000000000000000000000006"
+# Pool WETH/USDC 0.05% Uniswap V3 sur Base (référence ETH/USD)
+ETH_USD_POOL = "0xd0b53D9277642d899DF5C87A3966A349A798F224"
+FEE_TIERS = [100, 500, 3000, 10000]
+Q96 = 2 ** 96
+
+
+def token0_price_in_token1(sqrt_price_x96: int, decimals0: int, decimals1: int) -> float:
+    """Prix d'une unité de token0 exprimé en token1 (décimales appliquées)"""
+    ratio = (sqrt_price_x96 / Q96) ** 2
+    return ratio * 10 ** (decimals0 - decimals1)
+
+
+class OnchainPricer:
+    """Prix USD des tokens détenus via slot0() des pools Uniswap V3"""
+
+    def __init__(self, w3: Web3, eth_usd_pool: str = None):
+        self.w3 = w3
+        self.multicall = Multicall3(w3)
+        self.factory = Web3.to_checksum_address(UNISWAP_V3_FACTORY)
+        self.weth = Web3.to_checksum_address(WETH_ADDRESS)
+        self.eth_usd_pool = Web3.to_checksum_address(
+            eth_usd_pool or os.getenv('ETH_USD_POOL_ADDRESS', ETH_USD_POOL)
+        )
+
+        # Un appel par bloc au plus (Base: ~2s)
+        self.min_interval = float(os.getenv('ONCHAIN_PRICE_MIN_INTERVAL_SECONDS', '2'))
+        self.no_pool_retry = float(os.getenv('ONCHAIN_NO_POOL_RETRY_SECONDS', '600'))
+
+        # {token: {'pool', 'token_is_token0', 'token_decimals', 'fee'}}
+        self.pools: Dict[str, Dict] = {}
+        self._no_pool: Dict[str, float] = {}  # {token: timestamp du dernier échec}
+        self._eth_usd_meta: Optional[Dict] = None
+        self.eth_usd: Optional[float] = None
+        self.eth_usd_at = 0.0  # time.time() de la dernière mise à jour
+
+        self._last_read = 0.0
+        self._last_prices: Dict[str, Dict] = {}
+        self.last_block = None
+
+    # --- Résolution des pools (une fois par token) ---
+
+    def resolve_pools(self, tokens: List[str]):
+        """Trouve la pool WETH la plus liquide de chaque token (un multicall)"""
+        now = time.time()
+        tokens = [
+            t for t in tokens
+            if t not in self.pools and now - self._no_pool.get(t, 0) >= self.no_pool_retry
+        ]
+        if not tokens:
+            return
+
+        # Adresses dérivées hors ligne: une pool jamais créée renvoie un retour vide
+        candidates = [
+            (token, fee, compute_pool_address(token, self.weth, fee, self.factory))
+            for token in tokens for fee in FEE_TIERS
+        ]
+
+        # liquidity() + token0() de chaque pool, decimals() de chaque token
+        calls = []
+        for _, _, pool in candidates:
+            calls.append((pool, encode_call('liquidity()')))
+            calls.append((pool, encode_call('token0()')))
+        for token in tokens:
+            calls.append((token, encode_call('decimals()')))
+        results = self.multicall.aggregate3(calls)
+
+        decimals = {
+            token: decode_word(*results[2 * len(candidates) + k], 'uint8')
+            for k, token in enumerate(tokens)
+        }
+
+        best = {}
+        for k, (token, fee, pool) in enumerate(candidates):
+            liquidity = decode_word(*results[2 * k], 'uint128') or 0
+            token0 = decode_word(*results[2 * k + 1], 'address')
+            if liquidity == 0 or token0 is None or decimals.get(token) is None:
+                continue
+            if liquidity > best.get(token, {}).get('liquidity', 0):
+                best[token] = {
+                    'pool': pool,
+                    'fee': fee,
+                    'liquidity': liquidity,
+                    'token_is_token0': token0.lower() == token.lower(),
+                    'token_decimals': decimals[token]
+                }
+
+        for token in tokens:
+            if token in best:
+                self.pools[token] = best[token]
+                self._no_pool.pop(token, None)
+            else:
+                self._no_pool[token] = now
+
+    def _resolve_eth_usd(self):
+        """Ordre et décimales de la pool de référence ETH/USD"""
+        if self._eth_usd_meta is not None:
+            return
+        token0_result, token1_result = self.multicall.aggregate3([
+            (self.eth_usd_pool, encode_call('token0()')),
+            (self.eth_usd_pool, encode_call('token1()')),
+        ])
+        token0 = Web3.to_checksum_address(decode_word(*token0_result, 'address'))
+        token1 = Web3.to_checksum_address(decode_word(*token1_result, 'address'))
+        dec0_result, dec1_result = self.multicall.aggregate3([
+            (token0, encode_call('decimals()')),
+            (token1, encode_call('decimals()')),
+        ])
+        self._eth_usd_meta = {
+            'weth_is_token0': token0 == self.weth,
+            'decimals0': decode_word(*dec0_result, 'uint8'),
+            'decimals1': decode_word(*dec1_result, 'uint8')
+        }
+
+    # --- Conversion sqrtPriceX96 -> prix ---
+
+    def native_price(self, token: str, sqrt_price_x96: int) -> float:
+        """Prix d'un token en WETH depuis le sqrtPriceX96 de sa pool résolue"""
+        pool = self.pools[token]
+        if pool['token_is_token0']:
+            return token0_price_in_token1(sqrt_price_x96, pool['token_decimals'], 18)
+        return 1 / token0_price_in_token1(sqrt_price_x96, 18, pool['token_decimals'])
+
+    def update_eth_usd(self, sqrt_price_x96: int) -> float:
+        """Prix WETH en USD depuis le sqrtPriceX96 de la pool de référence"""
+        self._resolve_eth_usd()
+        meta = self._eth_usd_meta
+        eth_price = token0_price_in_token1(sqrt_price_x96, meta['decimals0'], meta['decimals1'])
+        self.eth_usd = eth_price if meta['weth_is_token0'] else 1 / eth_price
+        self.eth_usd_at = time.time()
+        return self.eth_usd
+
+    def get_eth_usd(self, max_age: float = 60) -> float:
+        """Prix WETH en USD: dernière valeur (multicall, flux de swaps) ou slot0() relu"""
+        if self.eth_usd and time.time() - self.eth_usd_at < max_age:
+            return self.eth_usd
+        self._resolve_eth_usd()
+        result, = self.multicall.aggregate3([(self.eth_usd_pool, encode_call('slot0()'))])
+        sqrt_price = decode_word(*result, 'uint160')
+        if not sqrt_price:
+            raise RuntimeError("slot0() ETH/USD illisible")
+        return self.update_eth_usd(sqrt_price)
+
+    # --- Lecture des prix (un multicall par bloc) ---
+
+    def get_prices(self, token_addresses: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Prix USD on-chain des tokens
+
+        Returns:
+            {token (minuscules): {'price_usd', 'price_native', 'pool', 'block', 'source'}}
+            Les tokens sans pool V3 sont absents du résultat.
+        """
+        tokens = list(dict.fromkeys(Web3.to_checksum_address(t) for t in token_addresses))
+        if not tokens:
+            return {}
+
+        if time.time() - self._last_read < self.min_interval:
+            if all(t.lower() in self._last_prices or t in self._no_pool for t in tokens):
+                return {t.lower(): self._last_prices[t.lower()] for t in tokens if t.lower() in self._last_prices}
+
+        self._resolve_eth_usd()
+        self.resolve_pools(tokens)
+        priced = [t for t in tokens if t in self.pools]
+
+        calls = [(self.multicall.address, encode_call('getBlockNumber()')),
+                 (self.eth_usd_pool, encode_call('slot0()'))]
+        calls += [(self.pools[t]['pool'], encode_call('slot0()')) for t in priced]
+        results = self.multicall.aggregate3(calls)
+
+        block = decode_word(*results[0], 'uint256')
+        eth_sqrt = decode_word(*results[1], 'uint160')
+        if not eth_sqrt:
+            raise RuntimeError("slot0() ETH/USD illisible")
+
+        eth_usd = self.update_eth_usd(eth_sqrt)
+
+        prices = {}
+        for k, token in enumerate(priced):
+            sqrt_price = decode_word(*results[2 + k], 'uint160')
+            if not sqrt_price:
+                continue
+            pool = self.pools[token]
+            price_native = self.native_price(token, sqrt_price)
+            prices[token.lower()] = {
+                'price_usd': price_native * eth_usd,
+                'price_native': price_native,
+                'pool': pool['pool'],
+                'block': block,
+                'source': 'onchain'
+            }
+
+        self._last_read = time.time()
+        self._last_prices = prices
+        self.last_block = block
+        return prices
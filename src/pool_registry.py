@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Registre persistant des pools Uniswap V3 (adresses dérivées hors ligne)
+
+L'adresse d'une pool V3 est déterministe (CREATE2 par la factory):
+
+    salt = keccak256(abi.encode(token0, token1, fee))
+    pool = keccak256(0xff ++ factory ++ salt ++ POOL_INIT_CODE_HASH)[12:]
+
+Aucun getPool() n'est donc nécessaire pour trouver une pool. Le registre
+relève en un multicall la liquidité des pools des quatre fee tiers et la
+stocke dans SQLite (table v3_pools) avec l'heure de relevé; le Trader y lit le
+fee tier à utiliser pour ses swaps.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from eth_abi import encode
+from web3 import Web3
+
+from multicall import Multicall3, decode_word, encode_call
+
+PROJECT_DIR = Path(__file__).parent.parent
+DB_PATH = PROJECT_DIR / 'data' / 'trading.db'
+
+UNISWAP_V3_FACTORY = "0x33128a8fC17869897dcE68Ed026d694621f6FDfD"
+POOL_INIT_CODE_HASH = "0xe34f199b19b2b4f47f68442619d555527d244f78a3297ea89325f843f87b8b54"
+WETH_ADDRESS = "0x4200000000000000000000000000000000000006"
+FEE_TIERS = [100, 500, 3000, 10000]
+DEFAULT_FEE = 3000
+
+
+def compute_pool_address(token_a: str, token_b: str, fee: int,
+                         factory: str = UNISWAP_V3_FACTORY,
+                         init_code_hash: str = POOL_INIT_CODE_HASH) -> str:
+    """Adresse CREATE2 de la pool (token_a, token_b, fee), ordre des tokens indifférent"""
+    token0, token1 = sorted([Web3.to_checksum_address(token_a), Web3.to_checksum_address(token_b)],
+                            key=lambda a: a.lower())
+    salt = Web3.keccak(encode(['address', 'address', 'uint24'], [token0, token1, fee]))
+    digest = Web3.keccak(
+        b'\xff' + bytes.fromhex(factory[2:]) + salt + bytes.fromhex(init_code_hash[2:])
+    )
+    return Web3.to_checksum_address(digest[12:])
+
+
+class PoolRegistry:
+    """Pools V3 token/WETH connues, leur liquidité et leur dernier relevé"""
+
+    def __init__(self, w3: Web3, db_path: Path = None, quote_token: str = WETH_ADDRESS):
+        self.w3 = w3
+        self.db_path = Path(db_path) if db_path else DB_PATH
+        self.quote_token = Web3.to_checksum_address(quote_token)
+        self.multicall = Multicall3(w3)
+
+        # Âge maximal d'un relevé de liquidité avant nouveau relevé (achats)
+        self.max_age = float(os.getenv('POOL_REGISTRY_MAX_AGE_SECONDS', '300'))
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_table(self):
+        """Crée la table du registre si nécessaire"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS v3_pools (
+                    token_address TEXT NOT NULL,
+                    quote_address TEXT NOT NULL,
+                    fee INTEGER NOT NULL,
+                    pool_address TEXT NOT NULL,
+                    liquidity TEXT NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (token_address, quote_address, fee)
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def pool_address(self, token: str, fee: int) -> str:
+        """Adresse de la pool token/quote pour un fee tier (sans RPC)"""
+        return compute_pool_address(token, self.quote_token, fee)
+
+    def refresh(self, tokens: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Relève la liquidité des pools de tous les fee tiers (un seul eth_call)
+
+        Une adresse sans contrat (pool jamais créée) renvoie un retour vide et
+        est enregistrée avec une liquidité nulle.
+
+        Returns:
+            {token (minuscules): meilleure pool ou None}
+        """
+        tokens = list(dict.fromkeys(Web3.to_checksum_address(t) for t in tokens))
+        if not tokens:
+            return {}
+
+        pools = [(token, fee, self.pool_address(token, fee)) for token in tokens for fee in FEE_TIERS]
+        results = self.multicall.aggregate3([(pool, encode_call('liquidity()')) for _, _, pool in pools])
+
+        now = time.time()
+        rows = [
+            (token.lower(), self.quote_token.lower(), fee, pool,
+             str(decode_word(*result, 'uint128') or 0), now)
+            for (token, fee, pool), result in zip(pools, results)
+        ]
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO v3_pools
+                    (token_address, quote_address, fee, pool_address, liquidity, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Erreur écriture registre de pools: {e}")
+
+        return {token.lower(): self._best_of(self._rows_to_pools(
+            [row for row in rows if row[0] == token.lower()]
+        )) for token in tokens}
+
+    def get_pools(self, token: str) -> List[Dict]:
+        """Pools enregistrées d'un token (tous fee tiers)"""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute('''
+                    SELECT token_address, quote_address, fee, pool_address, liquidity, last_seen
+                    FROM v3_pools WHERE token_address = ? AND quote_address = ?
+                ''', (token.lower(), self.quote_token.lower())).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return []
+        return self._rows_to_pools(rows)
+
+    @staticmethod
+    def _rows_to_pools(rows) -> List[Dict]:
+        return [
+            {'fee': fee, 'pool': pool, 'liquidity': int(liquidity), 'last_seen': last_seen}
+            for _, _, fee, pool, liquidity, last_seen in rows
+        ]
+
+    @staticmethod
+    def _best_of(pools: List[Dict]) -> Optional[Dict]:
+        live = [p for p in pools if p['liquidity'] > 0]
+        return max(live, key=lambda p: p['liquidity']) if live else None
+
+    def best_pool(self, token: str, max_age: Optional[float] = -1) -> Optional[Dict]:
+        """
+        Pool la plus liquide du token
+
+        Args:
+            max_age: Âge maximal du relevé en secondes (-1: POOL_REGISTRY_MAX_AGE_SECONDS,
+                None: tout relevé existant convient, relevé seulement si token inconnu)
+
+        Returns:
+            {'fee', 'pool', 'liquidity', 'last_seen'} ou None si aucune pool liquide
+        """
+        if max_age == -1:
+            max_age = self.max_age
+        pools = self.get_pools(token)
+        if pools and (max_age is None or time.time() - min(p['last_seen'] for p in pools) < max_age):
+            return self._best_of(pools)
+        try:
+            return self.refresh([token]).get(token.lower())
+        except Exception as e:
+            print(f"Erreur relevé des pools {token}: {e}")
+            return self._best_of(pools)
+
+    def best_fee_tier(self, token: str, max_age: Optional[float] = -1) -> int:
+        """Fee tier de la pool la plus liquide (DEFAULT_FEE si inconnue)"""
+        pool = self.best_pool(token, max_age)
+        return pool['fee'] if pool else DEFAULT_FEE
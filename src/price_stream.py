@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Flux de prix piloté par les événements Swap des pools détenues
+
+Au lieu de demander un prix à intervalle fixe, le flux lit à chaque nouveau
+bloc les logs Swap(sender, recipient, amount0, amount1, sqrtPriceX96,
+liquidity, tick) des pools des positions ouvertes (un seul eth_getLogs pour
+toutes les pools + la pool de référence ETH/USD). Chaque swap donne un prix
+exact: les mises à jour sont rendues dans l'ordre des trades pour que le
+stop soit évalué sur le swap précis qui l'a franchi.
+
+Le même eth_getLogs remonte les Burn/Collect de ces pools. La réserve WETH de
+chaque pool (balanceOf, lue une fois) est suivie log par log: + / - les
+montants de chaque Swap, - les montants de chaque Collect. Une alerte de rug
+(sortie d'urgence) part quand les Burn des RUG_WINDOW_BLOCKS derniers blocs
+retirent plus de RUG_LIQUIDITY_DROP_PERCENT de la réserve WETH d'avant le
+retrait. La liquidité active (in-range) n'est pas utilisée: elle baisse dès
+que le prix sort d'une position concentrée, sans aucun retrait. Un Collect
+seul (frais) ne déclenche rien.
+
+Les pools sont celles résolues par OnchainPricer (pool WETH la plus liquide).
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_abi import decode
+from web3 import Web3
+
+from multicall import decode_word, encode_call
+from onchain_pricing import OnchainPricer
+
+SWAP_TOPIC = Web3.keccak(text='Swap(address,address,int256,int256,uint160,uint128,int24)')
+SWAP_DATA_TYPES = ['int256', 'int256', 'uint160', 'uint128', 'int24']
+BURN_TOPIC = Web3.keccak(text='Burn(address,int24,int24,uint128,uint256,uint256)')
+BURN_DATA_TYPES = ['uint128', 'uint256', 'uint256']
+COLLECT_TOPIC = Web3.keccak(text='Collect(address,address,int24,int24,uint128,uint128)')
+COLLECT_DATA_TYPES = ['address', 'uint128', 'uint128']
+
+
+def decode_swap(log: Dict) -> Dict:
+    """Champs non indexés d'un log Swap Uniswap V3"""
+    amount0, amount1, sqrt_price_x96, liquidity, tick = decode(SWAP_DATA_TYPES, bytes(log['data']))
+    return {
+        'amount0': amount0,
+        'amount1': amount1,
+        'sqrt_price_x96': sqrt_price_x96,
+        'liquidity': liquidity,
+        'tick': tick
+    }
+
+
+class PriceStream:
+    """Prix des positions à chaque swap, lus bloc par bloc via eth_getLogs"""
+
+    def __init__(self, w3: Web3, pricer: OnchainPricer):
+        self.w3 = w3
+        self.pricer = pricer
+
+        # Attente entre deux vérifications du bloc courant (Base: bloc ~2s)
+        self.poll_interval = float(os.getenv('PRICE_STREAM_POLL_SECONDS', '0.5'))
+        # Fenêtre maximale d'un eth_getLogs après une interruption
+        self.max_block_range = int(os.getenv('PRICE_STREAM_MAX_BLOCK_RANGE', '100'))
+
+        # Part de la réserve WETH retirée par des Burn déclenchant une alerte de rug
+        self.rug_drop_percent = float(os.getenv('RUG_LIQUIDITY_DROP_PERCENT', '50'))
+        # Retraits cumulés sur cette fenêtre (rug découpé en plusieurs Burn)
+        self.rug_window_blocks = int(os.getenv('RUG_WINDOW_BLOCKS', '5'))
+
+        self.pool_tokens: Dict[str, str] = {}  # {pool (minuscules): token}
+        self.reserves: Dict[str, int] = {}  # {pool: WETH détenus par la pool (suivi log par log)}
+        self.burns: Dict[str, List[Tuple[int, int, int]]] = {}  # {pool: [(bloc, WETH retirés, réserve avant)]}
+        self._stale_reserves: set = set()  # pools à relire (après Burn/Collect)
+        self.rug_alerted: set = set()
+        self.last_block: Optional[int] = None
+
+    def watch(self, token_addresses: Iterable[str]):
+        """Met à jour l'ensemble des pools suivies (positions ouvertes)"""
+        tokens = [Web3.to_checksum_address(t) for t in token_addresses]
+        self.pricer.resolve_pools(tokens)
+        self.pool_tokens = {
+            self.pricer.pools[t]['pool'].lower(): t
+            for t in tokens if t in self.pricer.pools
+        }
+        for pool in set(self.reserves) - set(self.pool_tokens):
+            del self.reserves[pool]
+            self.burns.pop(pool, None)
+        self._stale_reserves &= set(self.pool_tokens)
+        self.rug_alerted &= set(self.pool_tokens)
+
+        # Réserves des nouvelles pools et de celles touchées par un retrait (recalage)
+        to_read = [p for p in self.pool_tokens if p not in self.reserves] + list(self._stale_reserves)
+        if to_read:
+            self.read_reserves(to_read)
+
+    def read_reserves(self, pools: List[str]):
+        """Relit la réserve WETH de plusieurs pools (un multicall)"""
+        pools = list(dict.fromkeys(pools))
+        results = self.pricer.multicall.aggregate3([
+            (self.pricer.weth, encode_call('balanceOf(address)', ['address'], [Web3.to_checksum_address(pool)]))
+            for pool in pools
+        ])
+        for pool, result in zip(pools, results):
+            reserve = decode_word(*result, 'uint256')
+            if reserve is not None:
+                self.reserves[pool] = reserve
+                self._stale_reserves.discard(pool)
+
+    def _weth_amount(self, pool: str, amount0: int, amount1: int) -> int:
+        """Montant côté WETH d'un couple (amount0, amount1) de la pool"""
+        token = self.pool_tokens[pool]
+        return amount1 if self.pricer.pools[token]['token_is_token0'] else amount0
+
+    def poll(self) -> List[Dict]:
+        """
+        Lit les swaps des blocs apparus depuis le dernier appel (bloquant)
+
+        Returns:
+            Liste ordonnée (bloc, index de log) de
+            {'kind': 'swap', 'token', 'price_usd', 'price_native', 'pool', 'block', 'tx_hash',
+             'sqrt_price_x96', 'liquidity', 'tick', 'source'}
+            suivie des alertes
+            {'kind': 'liquidity_drop', 'token', 'pool', 'drop_percent', 'withdrawn_weth',
+             'reserve_weth', 'block', 'tx_hash', 'detected_at' (time.monotonic)}
+        """
+        if not self.pool_tokens:
+            self.last_block = None
+            return []
+
+        head = self.w3.eth.block_number
+        if self.last_block is None:
+            # Premier passage: prix de départ via slot0, le flux prend la suite
+            self.pricer.get_prices(self.pool_tokens.values())
+            self.last_block = head
+            return []
+        if head <= self.last_block:
+            return []
+
+        from_block = max(self.last_block + 1, head - self.max_block_range + 1)
+        logs = self.w3.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': head,
+            'address': [Web3.to_checksum_address(p) for p in self.pool_tokens] + [self.pricer.eth_usd_pool],
+            'topics': [[SWAP_TOPIC, BURN_TOPIC, COLLECT_TOPIC]]
+        })
+        detected_at = time.monotonic()
+        self.last_block = head
+
+        updates = []
+        eth_usd_pool = self.pricer.eth_usd_pool.lower()
+        burned = {}  # {pool: dernier log Burn}
+        for log in sorted(logs, key=lambda l: (l['blockNumber'], l['logIndex'])):
+            pool = log['address'].lower()
+            topic = bytes(log['topics'][0])
+            if topic != bytes(SWAP_TOPIC):
+                if pool in self.pool_tokens and self._apply_withdrawal(pool, topic, log):
+                    burned[pool] = log
+                continue
+            try:
+                swap = decode_swap(log)
+            except Exception as e:
+                print(f"Log Swap illisible ({pool}): {e}")
+                continue
+
+            if pool == eth_usd_pool:
+                self.pricer.update_eth_usd(swap['sqrt_price_x96'])
+                continue
+
+            token = self.pool_tokens.get(pool)
+            if token is None:
+                continue
+            if pool in self.reserves:
+                # Montants du point de vue de la pool: positif = reçu
+                self.reserves[pool] += self._weth_amount(pool, swap['amount0'], swap['amount1'])
+            if not self.pricer.eth_usd:
+                continue
+            price_native = self.pricer.native_price(token, swap['sqrt_price_x96'])
+            updates.append({
+                'kind': 'swap',
+                'token': token.lower(),
+                'price_usd': price_native * self.pricer.eth_usd,
+                'price_native': price_native,
+                'pool': log['address'],
+                'block': log['blockNumber'],
+                'tx_hash': Web3.to_hex(log['transactionHash']),
+                'sqrt_price_x96': swap['sqrt_price_x96'],
+                'liquidity': swap['liquidity'],
+                'tick': swap['tick'],
+                'source': 'swap'
+            })
+
+        if burned:
+            updates.extend(self._check_burns(burned, head, detected_at))
+        return updates
+
+    def _apply_withdrawal(self, pool: str, topic: bytes, log: Dict) -> bool:
+        """
+        Suit un Burn / Collect dans la réserve WETH de la pool
+
+        Burn: la liquidité est retirée mais les tokens restent dans la pool
+        jusqu'au Collect (enregistré avec la réserve d'avant le retrait).
+        Collect: les tokens (retrait ou frais) quittent la pool.
+
+        Returns:
+            Vrai pour un Burn retirant du WETH
+        """
+        try:
+            if topic == bytes(BURN_TOPIC):
+                _, amount0, amount1 = decode(BURN_DATA_TYPES, bytes(log['data']))
+            else:
+                _, amount0, amount1 = decode(COLLECT_DATA_TYPES, bytes(log['data']))
+        except Exception as e:
+            print(f"Log Burn/Collect illisible ({pool}): {e}")
+            return False
+
+        # Réserve recalée par un balanceOf au prochain watch()
+        self._stale_reserves.add(pool)
+        weth = self._weth_amount(pool, amount0, amount1)
+        if pool not in self.reserves:
+            return False
+        if topic != bytes(BURN_TOPIC):
+            self.reserves[pool] = max(0, self.reserves[pool] - weth)
+            return False
+        if weth == 0:
+            return False
+        self.burns.setdefault(pool, []).append((log['blockNumber'], weth, self.reserves[pool]))
+        return True
+
+    def _check_burns(self, burned: Dict[str, Dict], head: int, detected_at: float) -> List[Dict]:
+        """Part de la réserve WETH retirée par les Burn récents de chaque pool"""
+        alerts = []
+        for pool, log in burned.items():
+            window = [b for b in self.burns.get(pool, []) if b[0] > head - self.rug_window_blocks]
+            self.burns[pool] = window
+            if not window or pool in self.rug_alerted:
+                continue
+
+            withdrawn = sum(weth for _, weth, _ in window)
+            reserve_before = window[0][2]
+            if reserve_before == 0:
+                continue
+            drop_percent = min(100.0, withdrawn / reserve_before * 100)
+            if drop_percent >= self.rug_drop_percent:
+                self.rug_alerted.add(pool)
+                alerts.append({
+                    'kind': 'liquidity_drop',
+                    'token': self.pool_tokens[pool].lower(),
+                    'pool': log['address'],
+                    'drop_percent': drop_percent,
+                    'withdrawn_weth': withdrawn,
+                    'reserve_weth': reserve_before,
+                    'block': log['blockNumber'],
+                    'tx_hash': Web3.to_hex(log['transactionHash']),
+                    'detected_at': detected_at
+                })
+        return alerts
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Gestion locale des nonces et des allowances du wallet de trading
+
+Les nonces sont lus on-chain une fois (démarrage, puis après une erreur ou
+une transaction perdue) et distribués localement ensuite: approve et swap
+d'une vente reçoivent n et n+1 sans aucun appel RPC et partent dans le même
+bloc. Plusieurs threads (achats, ventes, sorties d'urgence) peuvent signer en
+parallèle sans se marcher dessus.
+
+Les allowances accordées au router sont suivies localement: l'approve part
+juste après la confirmation de l'achat, et la vente n'est plus qu'un swap.
+
+Une transaction bloquée (frais trop bas) est remplacée par une transaction de
+même nonce aux frais EIP-1559 relevés (replacement_fees).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from web3 import Web3
+
+from multicall import Multicall3, decode_word, encode_call
+
+MAX_UINT256 = 2 ** 256 - 1
+
+# Hausse minimale exigée par les noeuds pour remplacer une transaction en attente
+MIN_REPLACEMENT_BUMP = 1.1
+
+
+def replacement_fees(txn: Dict, base_fee: int, priority_fee: int, multiplier: float = 1.25) -> Dict:
+    """
+    Frais EIP-1559 d'une transaction de remplacement (même nonce)
+
+    Tip et plafond sont relevés d'au moins multiplier (>= 10%, règle des
+    noeuds) par rapport à la transaction remplacée, et au moins au niveau du
+    marché: tip courant, plafond couvrant deux fois le base fee.
+    Une transaction legacy (gasPrice) compte gasPrice comme tip et plafond.
+    """
+    multiplier = max(multiplier, MIN_REPLACEMENT_BUMP)
+    if 'gasPrice' in txn:
+        old_tip = old_max = txn['gasPrice']
+    else:
+        old_tip, old_max = txn['maxPriorityFeePerGas'], txn['maxFeePerGas']
+    tip = max(int(old_tip * multiplier) + 1, priority_fee)
+    max_fee = max(int(old_max * multiplier) + 1, 2 * base_fee + tip)
+    return {'maxPriorityFeePerGas': tip, 'maxFeePerGas': max_fee}
+
+
+def replacement_txn(txn: Dict, fees: Dict) -> Dict:
+    """Copie de txn (même nonce) avec les frais EIP-1559 donnés"""
+    replacement = {k: v for k, v in txn.items() if k not in ('gasPrice', 'type')}
+    replacement.update(fees)
+    return replacement
+
+
+class NonceManager:
+    """Distribue les nonces d'une adresse sans interroger le noeud à chaque envoi"""
+
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+        self._lock = threading.Lock()
+        self._next_nonce: Optional[int] = None
+        self.in_flight: Dict[int, str] = {}  # {nonce: tx_hash} envoyés, non confirmés
+        self.last_sync = 0.0
+        self.stats = {'syncs': 0, 'allocated': 0, 'recoveries': 0}
+
+    def _sync_locked(self):
+        # 'pending' inclut nos transactions encore dans le mempool du noeud
+        self._next_nonce = self.w3.eth.get_transaction_count(self.address, 'pending')
+        self.last_sync = time.time()
+        self.stats['syncs'] += 1
+
+    def sync(self) -> int:
+        """Relit le prochain nonce on-chain (démarrage, après erreur)"""
+        with self._lock:
+            self._sync_locked()
+            return self._next_nonce
+
+    def invalidate(self):
+        """Force une resynchronisation à la prochaine allocation"""
+        with self._lock:
+            self._next_nonce = None
+
+    @contextmanager
+    def allocate(self, count: int = 1) -> Iterator[List[int]]:
+        """
+        Réserve count nonces consécutifs
+
+        Si le bloc lève une exception (signature, envoi refusé...), des nonces
+        réservés peuvent ne jamais avoir été utilisés: la prochaine allocation
+        resynchronise depuis la chaîne pour ne pas laisser de trou.
+        """
+        with self._lock:
+            if self._next_nonce is None:
+                self._sync_locked()
+            first = self._next_nonce
+            self._next_nonce += count
+            self.stats['allocated'] += count
+        try:
+            yield list(range(first, first + count))
+        except Exception:
+            self.invalidate()
+            raise
+
+    def peek(self) -> int:
+        """Prochain nonce, sans le réserver (transactions signées à l'avance)"""
+        with self._lock:
+            if self._next_nonce is None:
+                self._sync_locked()
+            return self._next_nonce
+
+    def claim(self, nonce: int) -> bool:
+        """
+        Réserve un nonce obtenu par peek(), s'il est toujours le prochain
+
+        Faux si une autre transaction l'a pris entre-temps: la transaction
+        signée avec ce nonce doit alors être abandonnée.
+        """
+        with self._lock:
+            if self._next_nonce != nonce:
+                return False
+            self._next_nonce += 1
+            self.stats['allocated'] += 1
+            return True
+
+    def track(self, nonce: int, tx_hash: str):
+        """Enregistre une transaction envoyée"""
+        with self._lock:
+            self.in_flight[nonce] = tx_hash
+
+    def settle(self, nonce: Optional[int]):
+        """Transaction minée (succès ou revert): le nonce est consommé"""
+        if nonce is None:
+            return
+        with self._lock:
+            self.in_flight.pop(nonce, None)
+
+    def recover(self):
+        """
+        Rattrapage après une transaction perdue (jamais minée)
+
+        Les nonces déjà consommés on-chain sont oubliés et le compteur repart
+        du nonce 'pending' du noeud: la prochaine transaction comble le trou
+        laissé par celle qui a été abandonnée.
+        """
+        with self._lock:
+            latest = self.w3.eth.get_transaction_count(self.address, 'latest')
+            self.in_flight = {n: h for n, h in self.in_flight.items() if n >= latest}
+            self._sync_locked()
+            self.stats['recoveries'] += 1
+            return latest
+
+
+class AllowanceCache:
+    """Allowances du wallet envers le router, connues sans appel RPC"""
+
+    def __init__(self, w3: Web3, owner: str, spender: str):
+        self.w3 = w3
+        self.owner = Web3.to_checksum_address(owner)
+        self.spender = Web3.to_checksum_address(spender)
+        self.multicall = Multicall3(w3)
+        self._lock = threading.Lock()
+        self.allowances: Dict[str, int] = {}  # {token (minuscules): allowance}
+
+    def get(self, token: str) -> Optional[int]:
+        with self._lock:
+            return self.allowances.get(token.lower())
+
+    def set(self, token: str, amount: int):
+        with self._lock:
+            self.allowances[token.lower()] = amount
+
+    def forget(self, token: str):
+        with self._lock:
+            self.allowances.pop(token.lower(), None)
+
+    def sufficient(self, token: str, amount: int) -> bool:
+        """Vrai si l'allowance connue couvre amount"""
+        allowance = self.get(token)
+        return allowance is not None and allowance >= amount
+
+    def consume(self, token: str, amount: int):
+        """Swap effectué: l'allowance baisse (sauf allowance illimitée)"""
+        with self._lock:
+            allowance = self.allowances.get(token.lower())
+            if allowance is not None and allowance != MAX_UINT256:
+                self.allowances[token.lower()] = max(0, allowance - amount)
+
+    def refresh(self, tokens: Iterable[str]) -> Dict[str, int]:
+        """Relit on-chain les allowances de plusieurs tokens (un multicall)"""
+        tokens = [Web3.to_checksum_address(t) for t in tokens]
+        results = self.multicall.aggregate3([
+            (token, encode_call('allowance(address,address)', ['address', 'address'],
+                                [self.owner, self.spender]))
+            for token in tokens
+        ])
+        refreshed = {}
+        for token, result in zip(tokens, results):
+            allowance = decode_word(*result, 'uint256')
+            if allowance is not None:
+                self.set(token, allowance)
+                refreshed[token.lower()] = allowance
+        return refreshed
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Mathématiques Uniswap V3 en entiers Python (portage de TickMath, SqrtPriceMath
+et SwapMath du contrat core)
+
+Les arrondis sont ceux du contrat: un swap simulé sur un état de pool exact
+donne le même montant que le QuoterV2, sans aucun appel réseau. Les entiers
+Python étant non bornés, les débordements 256 bits ne sont reproduits que là où
+ils changent la formule (getNextSqrtPriceFromAmount0RoundingUp).
+"""
+
+from bisect import bisect_right
+from typing import Dict, Optional
+
+Q96 = 2 ** 96
+MAX_UINT256 = 2 ** 256 - 1
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+FEE_DENOMINATOR = 1_000_000
+
+# Facteurs de TickMath.getSqrtRatioAtTick (sqrt(1.0001)^-(2^i) en Q128.128)
+_TICK_FACTORS = [
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+]
+
+
+# --- FullMath ---
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-a * b // denominator)
+
+
+def div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+# --- TickMath ---
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrt(1.0001^tick) * 2^96, arrondi comme TickMath"""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"tick hors bornes: {tick}")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Plus grand tick dont le sqrt ratio est <= sqrt_price_x96"""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError(f"sqrtPriceX96 hors bornes: {sqrt_price_x96}")
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        mid = (low + high + 1) // 2
+        if get_sqrt_ratio_at_tick(mid) <= sqrt_price_x96:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+# --- SqrtPriceMath ---
+
+def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price: int, liquidity: int,
+                                                  amount: int, add: bool) -> int:
+    if amount == 0:
+        return sqrt_price
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price
+
+    if add:
+        if product <= MAX_UINT256 and numerator1 + product <= MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price, numerator1 + product)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price + amount)
+
+    if numerator1 <= product:
+        raise ValueError("liquidité insuffisante pour ce montant de token0")
+    return mul_div_rounding_up(numerator1, sqrt_price, numerator1 - product)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price: int, liquidity: int,
+                                                    amount: int, add: bool) -> int:
+    if add:
+        return sqrt_price + (amount << 96) // liquidity
+
+    quotient = div_rounding_up(amount << 96, liquidity)
+    if sqrt_price <= quotient:
+        raise ValueError("liquidité insuffisante pour ce montant de token1")
+    return sqrt_price - quotient
+
+
+def get_next_sqrt_price_from_input(sqrt_price: int, liquidity: int, amount_in: int,
+                                   zero_for_one: bool) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price, liquidity, amount_in, True)
+    return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price, liquidity, amount_in, True)
+
+
+def get_next_sqrt_price_from_output(sqrt_price: int, liquidity: int, amount_out: int,
+                                    zero_for_one: bool) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price, liquidity, amount_out, False)
+    return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price, liquidity, amount_out, False)
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+# --- SwapMath ---
+
+def compute_swap_step(sqrt_current: int, sqrt_target: int, liquidity: int,
+                      amount_remaining: int, fee_pips: int):
+    """
+    Une étape de swap dans un intervalle de liquidité constante
+
+    Args:
+        amount_remaining: > 0 entrée exacte, < 0 sortie exacte
+
+    Returns:
+        (sqrt_next, amount_in, amount_out, fee_amount)
+    """
+    zero_for_one = sqrt_current >= sqrt_target
+    exact_in = amount_remaining >= 0
+    amount_in = amount_out = 0
+
+    if exact_in:
+        remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+        amount_in = (get_amount0_delta(sqrt_target, sqrt_current, liquidity, True) if zero_for_one
+                     else get_amount1_delta(sqrt_current, sqrt_target, liquidity, True))
+        if remaining_less_fee >= amount_in:
+            sqrt_next = sqrt_target
+        else:
+            sqrt_next = get_next_sqrt_price_from_input(sqrt_current, liquidity, remaining_less_fee, zero_for_one)
+    else:
+        amount_out = (get_amount1_delta(sqrt_target, sqrt_current, liquidity, False) if zero_for_one
+                      else get_amount0_delta(sqrt_current, sqrt_target, liquidity, False))
+        if -amount_remaining >= amount_out:
+            sqrt_next = sqrt_target
+        else:
+            sqrt_next = get_next_sqrt_price_from_output(sqrt_current, liquidity, -amount_remaining, zero_for_one)
+
+    reached = sqrt_target == sqrt_next
+    if zero_for_one:
+        if not (reached and exact_in):
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        if not (reached and not exact_in):
+            amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not (reached and exact_in):
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        if not (reached and not exact_in):
+            amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+
+    if exact_in and sqrt_next != sqrt_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+# --- Swap complet sur un état de pool ---
+
+def simulate_exact_input(state: Dict, amount_in: int, zero_for_one: bool,
+                         sqrt_price_limit_x96: Optional[int] = None) -> Dict:
+    """
+    Simule Pool.swap (entrée exacte) sur un état de pool en cache
+
+    Args:
+        state: {'sqrt_price_x96', 'tick', 'liquidity', 'fee',
+                'ticks': {tick initialisé: liquidityNet},
+                'tick_lower_bound', 'tick_upper_bound'} (fenêtre des ticks chargés)
+        zero_for_one: True pour token0 -> token1
+
+    Returns:
+        {'amount_in', 'amount_out', 'fee_paid', 'sqrt_price_x96_after', 'tick_after',
+         'price_impact', 'complete'}
+        complete=False si le swap sort de la fenêtre de ticks chargée (ou de la
+        limite de prix): les montants ne couvrent alors que la partie simulée.
+    """
+    if sqrt_price_limit_x96 is None:
+        sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+    sqrt_price = state['sqrt_price_x96']
+    tick = state['tick']
+    liquidity = state['liquidity']
+    fee = state['fee']
+    initialized = sorted(state['ticks'])
+
+    remaining = amount_in
+    amount_out = 0
+    fee_paid = 0
+    complete = True
+
+    while remaining > 0 and sqrt_price != sqrt_price_limit_x96:
+        if zero_for_one:
+            index = bisect_right(initialized, tick) - 1
+            next_tick = initialized[index] if index >= 0 else None
+            bound = state['tick_lower_bound']
+        else:
+            index = bisect_right(initialized, tick)
+            next_tick = initialized[index] if index < len(initialized) else None
+            bound = state['tick_upper_bound']
+
+        # Au-delà de la fenêtre chargée, la liquidité est inconnue
+        at_bound = next_tick is None
+        if at_bound:
+            next_tick = max(MIN_TICK, min(MAX_TICK, bound))
+
+        sqrt_next_tick = get_sqrt_ratio_at_tick(next_tick)
+        if zero_for_one:
+            sqrt_target = max(sqrt_next_tick, sqrt_price_limit_x96)
+        else:
+            sqrt_target = min(sqrt_next_tick, sqrt_price_limit_x96)
+
+        if liquidity == 0:
+            step_in = step_out = step_fee = 0
+            sqrt_price = sqrt_target
+        else:
+            sqrt_price, step_in, step_out, step_fee = compute_swap_step(
+                sqrt_price, sqrt_target, liquidity, remaining, fee
+            )
+        remaining -= step_in + step_fee
+        amount_out += step_out
+        fee_paid += step_fee
+
+        if sqrt_price == sqrt_next_tick:
+            if at_bound:
+                tick = get_tick_at_sqrt_ratio(sqrt_price)
+                complete = remaining == 0
+                break
+            net = state['ticks'][next_tick]
+            liquidity += -net if zero_for_one else net
+            tick = next_tick - 1 if zero_for_one else next_tick
+        else:
+            tick = get_tick_at_sqrt_ratio(sqrt_price)
+
+    if remaining > 0:
+        complete = False
+
+    filled = amount_in - remaining
+    spot = (state['sqrt_price_x96'] / Q96) ** 2
+    spot_out_per_in = spot if zero_for_one else 1 / spot
+    net_in = filled - fee_paid
+    price_impact = 1 - amount_out / (net_in * spot_out_per_in) if net_in > 0 else 0.0
+
+    return {
+        'amount_in': filled,
+        'amount_out': amount_out,
+        'fee_paid': fee_paid,
+        'sqrt_price_x96_after': sqrt_price,
+        'tick_after': tick,
+        'price_impact': price_impact,
+        'complete': complete
+    }
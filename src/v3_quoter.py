@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Cotations Uniswap V3 locales: état des pools en cache + simulation v3_math
+
+L'état d'une pool (slot0, liquidité, fee, tickSpacing, ticks initialisés
+autour du prix courant) est chargé en trois multicalls:
+    1. slot0 / liquidity / fee / tickSpacing / token0 / token1
+    2. tickBitmap des mots voisins du tick courant (V3_TICK_WORDS de chaque côté)
+    3. ticks(i).liquidityNet de chaque tick initialisé trouvé
+
+Il est ensuite tenu à jour par les logs Swap (apply_swap) et rechargé après
+V3_STATE_MAX_AGE_SECONDS. Une cotation, quelle que soit la taille demandée,
+ne coûte alors plus aucun appel réseau.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from eth_abi import decode
+from web3 import Web3
+
+from multicall import Multicall3, decode_word, encode_call
+from v3_math import MAX_TICK, MIN_TICK, simulate_exact_input
+
+
+class V3LocalQuoter:
+    """Cache d'états de pools V3 et cotations par simulation locale"""
+
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+        self.multicall = Multicall3(w3)
+
+        self.max_age = float(os.getenv('V3_STATE_MAX_AGE_SECONDS', '30'))
+        # Mots de tickBitmap (256 ticks espacés chacun) chargés de part et d'autre
+        self.tick_words = int(os.getenv('V3_TICK_WORDS', '2'))
+
+        self.states: Dict[str, Dict] = {}  # {pool (minuscules): état}
+
+    # --- Chargement de l'état ---
+
+    def load_state(self, pool: str) -> Optional[Dict]:
+        """Charge l'état complet d'une pool (None si la pool n'existe pas)"""
+        pool = Web3.to_checksum_address(pool)
+        results = self.multicall.aggregate3([
+            (pool, encode_call('slot0()')),
+            (pool, encode_call('liquidity()')),
+            (pool, encode_call('fee()')),
+            (pool, encode_call('tickSpacing()')),
+            (pool, encode_call('token0()')),
+            (pool, encode_call('token1()')),
+        ])
+        (slot0_ok, slot0), liquidity, fee, spacing, token0, token1 = results
+        if not slot0_ok or len(slot0) < 64:
+            return None
+        sqrt_price_x96, tick = decode(['uint160', 'int24'], slot0[:64])
+        spacing = decode_word(*spacing, 'int24')
+
+        # Mots du bitmap autour du tick courant (tick compressé = tick // spacing)
+        word = (tick // spacing) >> 8
+        words = list(range(word - self.tick_words, word + self.tick_words + 1))
+        bitmaps = self.multicall.aggregate3([
+            (pool, encode_call('tickBitmap(int16)', ['int16'], [w])) for w in words
+        ])
+        initialized = []
+        for w, result in zip(words, bitmaps):
+            bitmap = decode_word(*result, 'uint256') or 0
+            for bit in range(256):
+                if bitmap >> bit & 1:
+                    initialized.append((w * 256 + bit) * spacing)
+
+        ticks = {}
+        if initialized:
+            results = self.multicall.aggregate3([
+                (pool, encode_call('ticks(int24)', ['int24'], [t])) for t in initialized
+            ])
+            for t, (success, data) in zip(initialized, results):
+                if success and len(data) >= 64:
+                    ticks[t] = decode(['uint128', 'int128'], data[:64])[1]
+
+        state = {
+            'pool': pool,
+            'token0': Web3.to_checksum_address(decode_word(*token0, 'address')),
+            'token1': Web3.to_checksum_address(decode_word(*token1, 'address')),
+            'fee': decode_word(*fee, 'uint24'),
+            'tick_spacing': spacing,
+            'sqrt_price_x96': sqrt_price_x96,
+            'tick': tick,
+            'liquidity': decode_word(*liquidity, 'uint128') or 0,
+            'ticks': ticks,
+            'tick_lower_bound': max(MIN_TICK, words[0] * 256 * spacing),
+            'tick_upper_bound': min(MAX_TICK, (words[-1] * 256 + 255) * spacing),
+            'loaded_at': time.time()
+        }
+        self.states[pool.lower()] = state
+        return state
+
+    def get_state(self, pool: str, max_age: Optional[float] = -1) -> Optional[Dict]:
+        """
+        État en cache, rechargé s'il est plus vieux que max_age
+
+        Args:
+            max_age: -1: V3_STATE_MAX_AGE_SECONDS, None: tout état en cache convient
+        """
+        if max_age == -1:
+            max_age = self.max_age
+        state = self.states.get(pool.lower())
+        if state and (max_age is None or time.time() - state['loaded_at'] < max_age):
+            return state
+        try:
+            return self.load_state(pool)
+        except Exception as e:
+            print(f"Erreur chargement état pool {pool}: {e}")
+            return state
+
+    def apply_swap(self, pool: str, sqrt_price_x96: int, liquidity: int, tick: int):
+        """Met à jour le prix et la liquidité active depuis un log Swap"""
+        state = self.states.get(pool.lower())
+        if state is None:
+            return
+        state['sqrt_price_x96'] = sqrt_price_x96
+        state['liquidity'] = liquidity
+        state['tick'] = tick
+
+    def invalidate(self, pool: str):
+        """Oublie l'état d'une pool (Mint/Burn: ticks modifiés)"""
+        self.states.pop(pool.lower(), None)
+
+    # --- Cotations ---
+
+    def quote_exact_input(self, pool: str, token_in: str, amount_in: int,
+                          max_age: Optional[float] = -1) -> Optional[Dict]:
+        """
+        Simule un swap à entrée exacte sur l'état en cache de la pool
+
+        Returns:
+            Résultat de v3_math.simulate_exact_input, None si état indisponible
+        """
+        state = self.get_state(pool, max_age)
+        if state is None or token_in.lower() not in (state['token0'].lower(), state['token1'].lower()):
+            return None
+        zero_for_one = token_in.lower() == state['token0'].lower()
+        return simulate_exact_input(state, amount_in, zero_for_one)
+
+    def quote_sizes(self, pool: str, token_in: str, amounts: Iterable[int],
+                    max_age: Optional[float] = -1) -> List[Optional[Dict]]:
+        """Cotations de plusieurs tailles sur le même état (un chargement au plus)"""
+        state = self.get_state(pool, max_age)
+        if state is None:
+            return [None for _ in amounts]
+        return [self.quote_exact_input(pool, token_in, amount, max_age=None) for amount in amounts]
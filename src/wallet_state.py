@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+État du wallet de trading en mémoire: solde ETH et soldes des tokens
+
+Les soldes sont relevés on-chain en un multicall (getEthBalance + balanceOf
+de chaque token suivi + numéro de bloc, donc cohérents entre eux), puis tenus
+à jour par deltas:
+    - reçus de nos propres transactions: gas payé (L2 + frais L1 de Base),
+      valeur envoyée, logs Transfer
+    - logs Transfer touchant le wallet, lus bloc par bloc (eth_getLogs)
+Un relevé complet est refait toutes les WALLET_RECONCILE_SECONDS (ETH reçu
+d'un tiers, tokens à rebase...). Un log déjà appliqué (reçu puis eth_getLogs)
+ne l'est jamais deux fois. Sans relevé depuis WALLET_MAX_AGE_SECONDS (suivi
+arrêté, mode paper), les soldes en mémoire ne sont plus servis: lecture RPC.
+
+Chaque mise à jour réécrit un instantané JSON (data/wallet_state.json) que les
+scripts d'exploitation lisent sans appel RPC:
+
+    python src/wallet_state.py [--refresh] [token ...]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from web3 import Web3
+
+from multicall import MULTICALL3_ADDRESS, Multicall3, decode_word, encode_call
+
+PROJECT_DIR = Path(__file__).parent.parent
+SNAPSHOT_PATH = PROJECT_DIR / 'data' / 'wallet_state.json'
+
+TRANSFER_TOPIC = Web3.keccak(text='Transfer(address,address,uint256)')
+
+
+def _topic_address(topic) -> str:
+    return ('0x' + bytes(topic)[-20:].hex()).lower()
+
+
+def _to_int(value) -> int:
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value or 0)
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Dict]:
+    """Dernier instantané écrit par le Trader (None s'il n'existe pas)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class WalletState:
+    """Soldes ETH et tokens du wallet, tenus en mémoire"""
+
+    def __init__(self, w3: Web3, address: str, snapshot_path: Path = SNAPSHOT_PATH):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+        self.snapshot_path = Path(snapshot_path)
+        self.multicall = Multicall3(w3)
+
+        self.reconcile_interval = float(os.getenv('WALLET_RECONCILE_SECONDS', 60))
+        self.max_block_range = int(os.getenv('WALLET_MAX_BLOCK_RANGE', 500))
+        self.max_age = float(os.getenv('WALLET_MAX_AGE_SECONDS', self.reconcile_interval * 3))
+
+        self._lock = threading.Lock()
+        self.eth_balance: Optional[int] = None  # wei
+        self.tokens: Dict[str, int] = {}  # {token (minuscules): solde}
+        self.block: Optional[int] = None  # bloc du dernier relevé complet
+        self.last_log_block: Optional[int] = None
+        self.reconciled_at = 0.0
+        self.updated_at = 0.0
+        # Deltas appliqués depuis le relevé: {(tx_hash, log_index): (bloc, token, delta)}
+        self._applied: Dict[tuple, tuple] = {}
+        self._applied_receipts: Dict[str, tuple] = {}  # {tx_hash: (bloc, ETH débité)}
+
+    # --- Lectures (mémoire) ---
+
+    def is_stale(self) -> bool:
+        """Vrai si le dernier relevé complet est trop ancien pour être servi"""
+        return time.time() - self.reconciled_at > self.max_age
+
+    def get_eth_balance(self) -> Optional[int]:
+        """Solde ETH en wei, None sans relevé récent"""
+        if self.is_stale():
+            return None
+        with self._lock:
+            return self.eth_balance
+
+    def get_token_balance(self, token: str) -> Optional[int]:
+        """Solde d'un token suivi, None s'il n'est pas connu ou sans relevé récent"""
+        if self.is_stale():
+            return None
+        with self._lock:
+            return self.tokens.get(token.lower())
+
+    def track(self, tokens: Iterable[str]):
+        """Ajoute des tokens au suivi (soldes lus au prochain relevé)"""
+        with self._lock:
+            for token in tokens:
+                self.tokens.setdefault(token.lower(), None)
+
+    def untrack(self, token: str):
+        with self._lock:
+            self.tokens.pop(token.lower(), None)
+        self.write_snapshot()
+
+    def needs_reconcile(self) -> bool:
+        with self._lock:
+            unknown = any(balance is None for balance in self.tokens.values())
+        return unknown or time.time() - self.reconciled_at >= self.reconcile_interval
+
+    # --- Relevé complet ---
+
+    def reconcile(self, tokens: Iterable[str] = ()) -> Dict:
+        """Relit ETH + soldes des tokens suivis au même bloc (un multicall)"""
+        self.track(tokens)
+        with self._lock:
+            tracked = list(self.tokens)
+
+        results = self.multicall.aggregate3(
+            [(MULTICALL3_ADDRESS, encode_call('getBlockNumber()')),
+             (MULTICALL3_ADDRESS, encode_call('getEthBalance(address)', ['address'], [self.address]))]
+            + [(Web3.to_checksum_address(token),
+                encode_call('balanceOf(address)', ['address'], [self.address]))
+               for token in tracked]
+        )
+        block = decode_word(*results[0], 'uint256')
+        eth_balance = decode_word(*results[1], 'uint256')
+
+        with self._lock:
+            self.block = block
+            if eth_balance is not None:
+                self.eth_balance = eth_balance
+            for token, result in zip(tracked, results[2:]):
+                balance = decode_word(*result, 'uint256')
+                if balance is not None and token in self.tokens:
+                    self.tokens[token] = balance
+            if self.last_log_block is None or self.last_log_block < block:
+                self.last_log_block = block
+            # Deltas déjà inclus dans ce relevé oubliés, les plus récents (appliqués
+            # pendant le multicall) rejoués par-dessus
+            self._applied = {k: d for k, d in self._applied.items() if d[0] > block}
+            self._applied_receipts = {h: d for h, d in self._applied_receipts.items() if d[0] > block}
+            for _, token, delta in self._applied.values():
+                if self.tokens.get(token) is not None:
+                    self.tokens[token] = max(0, self.tokens[token] + delta)
+            if self.eth_balance is not None:
+                cost = sum(c for _, c in self._applied_receipts.values())
+                self.eth_balance = max(0, self.eth_balance - cost)
+            self.reconciled_at = self.updated_at = time.time()
+        self.write_snapshot()
+        return self.snapshot()
+
+    # --- Deltas ---
+
+    def _apply_transfer(self, log: Dict, create: bool = False) -> bool:
+        """
+        Applique un log Transfer touchant le wallet (verrou tenu)
+
+        Seuls les tokens suivis au solde connu bougent, sauf create (nos propres
+        transactions: un token acheté part de zéro, le relevé suivant corrige)
+        """
+        topics = log['topics']
+        if len(topics) < 3 or bytes(topics[0]) != bytes(TRANSFER_TOPIC):
+            return False
+        block = _to_int(log['blockNumber'])
+        key = (Web3.to_hex(log['transactionHash']), _to_int(log['logIndex']))
+        if (self.block is not None and block <= self.block) or key in self._applied:
+            return False
+
+        wallet = self.address.lower()
+        sender, recipient = _topic_address(topics[1]), _topic_address(topics[2])
+        if wallet not in (sender, recipient):
+            return False
+        token = log['address'].lower()
+        balance = self.tokens.get(token)
+        if balance is None:
+            if not create:
+                return False
+            balance = 0
+        amount = int.from_bytes(bytes(log['data'])[:32], 'big')
+        delta = (amount if recipient == wallet else 0) - (amount if sender == wallet else 0)
+        self.tokens[token] = max(0, balance + delta)
+        self._applied[key] = (block, token, delta)
+        return True
+
+    def apply_receipt(self, receipt: Dict, value: int = 0):
+        """
+        Reçu d'une de nos transactions: gas (L2 + L1), valeur envoyée, Transfers
+
+        Args:
+            value: ETH envoyé avec la transaction (débité si elle a réussi)
+        """
+        block = _to_int(receipt['blockNumber'])
+        tx_hash = Web3.to_hex(receipt['transactionHash'])
+        with self._lock:
+            if self.block is not None and block <= self.block:
+                return
+            if tx_hash not in self._applied_receipts and self.eth_balance is not None:
+                cost = _to_int(receipt['gasUsed']) * _to_int(receipt.get('effectiveGasPrice', 0))
+                cost += _to_int(receipt.get('l1Fee', 0))
+                if receipt['status'] == 1:
+                    cost += value
+                self.eth_balance = max(0, self.eth_balance - cost)
+                self._applied_receipts[tx_hash] = (block, cost)
+            for log in receipt.get('logs', []):
+                self._apply_transfer(log, create=True)
+            self.updated_at = time.time()
+        self.write_snapshot()
+
+    def poll_transfers(self) -> int:
+        """Applique les Transfer touchant le wallet depuis le dernier bloc lu"""
+        if self.last_log_block is None:
+            return 0
+        head = self.w3.eth.block_number
+        if head <= self.last_log_block:
+            return 0
+
+        from_block = max(self.last_log_block + 1, head - self.max_block_range + 1)
+        wallet_topic = '0x' + bytes(12).hex() + self.address[2:].lower()
+        logs = []
+        for topics in ([TRANSFER_TOPIC, wallet_topic], [TRANSFER_TOPIC, None, wallet_topic]):
+            logs.extend(self.w3.eth.get_logs({'fromBlock': from_block, 'toBlock': head, 'topics': topics}))
+
+        applied = 0
+        with self._lock:
+            for log in sorted(logs, key=lambda l: (_to_int(l['blockNumber']), _to_int(l['logIndex']))):
+                applied += self._apply_transfer(log)
+            self.last_log_block = head
+            if applied:
+                self.updated_at = time.time()
+        if applied:
+            self.write_snapshot()
+        return applied
+
+    # --- Instantané ---
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'address': self.address,
+                'block': self.block,
+                'last_log_block': self.last_log_block,
+                'eth_balance': self.eth_balance,
+                'tokens': {t: b for t, b in self.tokens.items() if b is not None},
+                'reconciled_at': self.reconciled_at,
+                'updated_at': self.updated_at
+            }
+
+    def write_snapshot(self):
+        """Écrit l'instantané JSON (remplacement atomique)"""
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Erreur écriture instantané wallet: {e}")
+
+
+def main():
+    """Affiche l'instantané du wallet (--refresh: nouveau relevé on-chain)"""
+    args = sys.argv[1:]
+    snapshot = load_snapshot()
+
+    if '--refresh' in args:
+        from dotenv import load_dotenv
+        from eth_account import Account
+
+        load_dotenv(PROJECT_DIR / 'config' / '.env')
+        w3 = Web3(Web3.HTTPProvider(os.getenv('RPC_URL', 'https://mainnet.base.org')))
+        address = (snapshot or {}).get('address') or Account.from_key(os.getenv('PRIVATE_KEY')).address
+        state = WalletState(w3, address)
+        tokens = [a for a in args if a != '--refresh'] or list((snapshot or {}).get('tokens', {}))
+        snapshot = state.reconcile(tokens)
+
+    if not snapshot:
+        print("Aucun instantané du wallet (Trader jamais lancé?) - utiliser --refresh")
+        sys.exit(1)
+
+    age = time.time() - (snapshot['updated_at'] or 0)
+    print(f"Wallet {snapshot['address']} | bloc {snapshot['block']} | mis à jour il y a {age:.0f}s")
+    eth_balance = snapshot['eth_balance'] or 0
+    print(f"  ETH: {eth_balance / 10**18:.6f}")
+    for token, balance in sorted(snapshot['tokens'].items()):
+        print(f"  {token}: {balance}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,24 @@ Utilitaires Web3 pour interactions blockchain reelles
 """
 
 import json
+import os
 import time
 import threading
 from typing import Dict, Optional
 from web3 import Web3
+from eth_abi import decode
 from eth_account import Account
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from broadcaster import TxBroadcaster
+from bytecode_analyzer import BytecodeScreener, BytecodeVerdictIndex
+from honeypot_simulator import (
+    HoneypotSimulator, QUOTE_EXACT_INPUT_SINGLE, QUOTE_EXACT_INPUT_SINGLE_TYPES, QUOTE_OUTPUT_TYPES
+)
+from multicall import Multicall3, encode_call
+from pool_registry import compute_pool_address
+from wallet_state import WalletState
 
 class BaseWeb3Manager:
     """Gestionnaire Web3 pour Base Layer 2"""
@@ -42,6 +52,20 @@ class BaseWeb3Manager:
             
         self.account = Account.from_key(private_key) if private_key else None
         self.chain_id = 8453  # Base Mainnet
+
+        # Diffusion des transactions signees sur tous les endpoints (+ relais prives)
+        private_urls = [u.strip() for u in os.getenv('PRIVATE_RPC_URLS', '').split(',') if u.strip()]
+        self.broadcaster = TxBroadcaster(self.rpc_urls, private_urls)
+
+        # Soldes du wallet tenus en memoire (recus + logs Transfer, releve periodique)
+        self.wallet_state = WalletState(self.w3, self.account.address) if self.account else None
+
+        # Analyse statique du bytecode (pré-filtrage honeypot local)
+        # + index des verdicts par empreinte de bytecode (clones)
+        self.bytecode_screener = BytecodeScreener(self.w3, index=BytecodeVerdictIndex())
+
+        # Simulation achat/vente en eth_call (verification honeypot sans API externe)
+        self.honeypot_simulator = HoneypotSimulator(self.w3)
         
         # ABIs essentiels
         self.erc20_abi = json.loads('''[
@@ -54,6 +78,10 @@ class BaseWeb3Manager:
             {"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"type":"function"}
         ]''')
         
+    def send_raw_transaction(self, raw_transaction: bytes):
+        """Diffuse une transaction signee sur tous les endpoints, retourne son hash"""
+        return self.broadcaster.send_raw_transaction(raw_transaction)
+
     def get_token_info(self, token_address: str) -> Optional[Dict]:
         """Recupere les informations d'un token avec gestion d'erreur"""
         try:
@@ -90,7 +118,13 @@ class BaseWeb3Manager:
                 if not self.account:
                     return 0
                 wallet_address = self.account.address
-                
+
+            # Notre wallet: solde connu en memoire, sans appel RPC
+            if self.wallet_state and Web3.to_checksum_address(wallet_address) == self.wallet_state.address:
+                balance = self.wallet_state.get_token_balance(token_address)
+                if balance is not None:
+                    return balance
+
             token = self.w3.eth.contract(
                 address=Web3.to_checksum_address(token_address),
                 abi=self.erc20_abi
@@ -129,22 +163,14 @@ class BaseWeb3Manager:
 
             token_address = Web3.to_checksum_address(token_address)
 
-            # Methode simplifiee: Essayer de simuler un swap
-            # Pour une vraie verification, il faudrait:
-            # 1. Acheter une petite quantite
-            # 2. Essayer de vendre
-            # 3. Comparer les montants
+            known = self._precheck_honeypot(token_address)
+            if known:
+                return known
 
-            # Pour l'instant, retournons un resultat par defaut safe
-            # TODO: Implementer une vraie verification via Uniswap Router simulation
-
-            return {
-                'is_honeypot': False,  # Assume pas honeypot par defaut
-                'can_sell': True,
-                'buy_tax': 0.0,
-                'sell_tax': 0.0,
-                'error': None
-            }
+            # Simulation reelle achat + vente via le router (eth_call, state overrides)
+            result = self.honeypot_simulator.simulate(token_address)
+            self.bytecode_screener.record_verdict(token_address, result)
+            return result
 
         except Exception as e:
             return {
@@ -155,6 +181,70 @@ class BaseWeb3Manager:
                 'error': str(e)
             }
 
+    def _precheck_honeypot(self, token_address: str) -> Optional[dict]:
+        """Verdict sans simulation (bytecode malveillant ou clone connu), sinon None"""
+        # Pre-filtrage bytecode: rejet immediat des contrats manifestement malveillants
+        vector = self.bytecode_screener.screen(token_address)
+        if vector and vector['is_malicious']:
+            return {
+                'is_honeypot': True,
+                'can_sell': False,
+                'buy_tax': 0,
+                'sell_tax': 0,
+                'flags': vector['flags'],
+                'error': None
+            }
+
+        # Clone d'un contrat deja verifie: verdict de l'index local
+        known = self.bytecode_screener.lookup_verdict(token_address)
+        if known:
+            return {
+                'is_honeypot': not known.get('is_safe', False),
+                'can_sell': known.get('can_sell', False),
+                'buy_tax': known.get('buy_tax', 0),
+                'sell_tax': known.get('sell_tax', 0),
+                'flags': known.get('flags', []),
+                'error': None
+            }
+        return None
+
+    def check_honeypot_batch(self, token_addresses: list) -> Dict[str, dict]:
+        """
+        Verifie un lot de tokens: tous les candidats restants apres pre-filtrage
+        sont simules dans un seul multicall
+
+        Returns:
+            {adresse (minuscules): resultat au format check_honeypot}
+        """
+        results = {}
+        to_simulate = []
+        for address in dict.fromkeys(token_addresses):
+            if not Web3.is_address(address):
+                results[address.lower()] = {
+                    'is_honeypot': True,
+                    'can_sell': False,
+                    'buy_tax': 0,
+                    'sell_tax': 0,
+                    'error': 'Invalid token address'
+                }
+                continue
+            token_address = Web3.to_checksum_address(address)
+            try:
+                known = self._precheck_honeypot(token_address)
+            except Exception as e:
+                print(f"Erreur pre-filtrage honeypot {token_address}: {e}")
+                known = None
+            if known:
+                results[token_address.lower()] = known
+            else:
+                to_simulate.append(token_address)
+
+        for token_address, result in self.honeypot_simulator.simulate_many(to_simulate).items():
+            self.bytecode_screener.record_verdict(token_address, result)
+            results[token_address.lower()] = result
+
+        return results
+
 class UniswapV3Manager:
     """Gestionnaire pour Uniswap V3 sur Base"""
     
@@ -169,133 +259,120 @@ class UniswapV3Manager:
         self.router = "0x2626664c2603336E57B271c5C0b26F421741e481"
         self.quoter = "0x3d4e44Eb1374240CE5F1B871ab261CD16335B76a"
         
-        # ABI Quoter V2 pour obtenir les prix
-        self.quoter_abi = json.loads('''[
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "tokenIn", "type": "address"},
-                    {"internalType": "address", "name": "tokenOut", "type": "address"},
-                    {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                    {"internalType": "uint24", "name": "fee", "type": "uint24"},
-                    {"internalType": "uint160", "name": "sqrtPriceLimitX96", "type": "uint160"}
-                ],
-                "name": "quoteExactInputSingle",
-                "outputs": [
-                    {"internalType": "uint256", "name": "amountOut", "type": "uint256"},
-                    {"internalType": "uint160", "name": "sqrtPriceX96After", "type": "uint160"},
-                    {"internalType": "uint32", "name": "initializedTicksCrossed", "type": "uint32"},
-                    {"internalType": "uint256", "name": "gasEstimate", "type": "uint256"}
-                ],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            }
-        ]''')
-        
-        try:
-            self.quoter_contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(self.quoter),
-                abi=self.quoter_abi
-            )
-        except Exception as e:
-            print(f"Erreur initialisation quoter: {e}")
-            self.quoter_contract = None
-        
+        # Fee tiers cotes en un multicall; le meilleur est memorise par paire
+        self.fee_tiers = [3000, 500, 10000, 100]
+        self.multicall = Multicall3(self.w3)
+        self.best_fee_tiers = {}  # {(token_in, token_out): (fee, timestamp)}
+        self.fee_tier_ttl = float(os.getenv('FEE_TIER_CACHE_SECONDS', 900))
+
     def get_pool_address(self, token0: str, token1: str, fee: int = 3000) -> Optional[str]:
-        """Calcule l'adresse d'une pool Uniswap V3"""
-        try:
-            # Validation des adresses
-            if not Web3.is_address(token0) or not Web3.is_address(token1):
-                return None
-                
-            factory_abi = json.loads('''[
-                {
-                    "inputs": [
-                        {"internalType": "address", "name": "", "type": "address"},
-                        {"internalType": "address", "name": "", "type": "address"},
-                        {"internalType": "uint24", "name": "", "type": "uint24"}
-                    ],
-                    "name": "getPool",
-                    "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]''')
-            
-            factory = self.w3.eth.contract(
-                address=Web3.to_checksum_address(self.factory),
-                abi=factory_abi
-            )
-            
-            # Ordonner les tokens
-            if token0.lower() > token1.lower():
-                token0, token1 = token1, token0
-                
-            pool = factory.functions.getPool(
-                Web3.to_checksum_address(token0),
-                Web3.to_checksum_address(token1),
-                fee
-            ).call()
-            
-            return pool if pool != "0x0000000000000000000000000000000000000000" else None
-        except Exception as e:
-            print(f"Erreur get_pool_address: {e}")
+        """Calcule l'adresse d'une pool Uniswap V3 (CREATE2, sans appel RPC)"""
+        if not Web3.is_address(token0) or not Web3.is_address(token1):
             return None
-        
+        return compute_pool_address(token0, token1, fee, self.factory)
+
+    def _encode_quote(self, token_in: str, token_out: str, amount: int, fee: int) -> bytes:
+        """Calldata QuoterV2.quoteExactInputSingle (struct de parametres)"""
+        return encode_call(QUOTE_EXACT_INPUT_SINGLE, QUOTE_EXACT_INPUT_SINGLE_TYPES,
+                           [(token_in, token_out, amount, fee, 0)])
+
+    def quote_exact_input(self, token_in: str, token_out: str, amount: int) -> Optional[Dict]:
+        """
+        Meilleure cotation token_in -> token_out tous fee tiers confondus
+
+        Le fee tier gagnant est memorise: les cotations suivantes de la paire
+        ne coutent qu'un eth_call sur ce tier (nouveau multicall complet si la
+        cotation echoue ou apres FEE_TIER_CACHE_SECONDS).
+
+        Returns:
+            {'fee', 'amount_out'} ou None si aucune pool ne cote
+        """
+        token_in = Web3.to_checksum_address(token_in)
+        token_out = Web3.to_checksum_address(token_out)
+        key = (token_in.lower(), token_out.lower())
+
+        cached = self.best_fee_tiers.get(key)
+        if cached and time.time() - cached[1] < self.fee_tier_ttl:
+            try:
+                raw = self.w3.eth.call({
+                    'to': Web3.to_checksum_address(self.quoter),
+                    'data': self._encode_quote(token_in, token_out, amount, cached[0])
+                })
+                amount_out = decode(QUOTE_OUTPUT_TYPES, bytes(raw))[0]
+                if amount_out > 0:
+                    return {'fee': cached[0], 'amount_out': amount_out}
+            except Exception:
+                pass
+
+        # Tous les tiers en un seul eth_call
+        results = self.multicall.aggregate3([
+            (self.quoter, self._encode_quote(token_in, token_out, amount, fee))
+            for fee in self.fee_tiers
+        ])
+        best = None
+        for fee, (success, data) in zip(self.fee_tiers, results):
+            if not success or len(data) < 128:
+                continue
+            amount_out = decode(QUOTE_OUTPUT_TYPES, data)[0]
+            if amount_out > 0 and (best is None or amount_out > best['amount_out']):
+                best = {'fee': fee, 'amount_out': amount_out}
+
+        if best:
+            self.best_fee_tiers[key] = (best['fee'], time.time())
+        else:
+            self.best_fee_tiers.pop(key, None)
+        return best
+
+    def best_fee_tier(self, token_in: str, token_out: str) -> Optional[int]:
+        """Fee tier memorise pour la paire (None si jamais cotee)"""
+        cached = self.best_fee_tiers.get((token_in.lower(), token_out.lower()))
+        return cached[0] if cached else None
+
     def get_token_price(self, token_address: str, amount: int = None, is_sell: bool = False) -> float:
         """Recupere le prix d'un token en WETH"""
         try:
-            if not self.quoter_contract:
-                return 0
-                
             if amount is None:
                 amount = 10 ** 18  # 1 token par defaut
             
             # Inverser les tokens si c'est une vente
             if is_sell:
-                token_in = Web3.to_checksum_address(token_address)
-                token_out = Web3.to_checksum_address(self.WETH_ADDRESS)
+                token_in, token_out = token_address, self.WETH_ADDRESS
             else:
-                token_in = Web3.to_checksum_address(self.WETH_ADDRESS)
-                token_out = Web3.to_checksum_address(token_address)
-                
-            # Essayer differents fee tiers
-            for fee in [3000, 500, 10000, 100]:
-                try:
-                    result = self.quoter_contract.functions.quoteExactInputSingle(
-                        token_in,
-                        token_out,
-                        amount,
-                        fee,
-                        0
-                    ).call()
-                    
-                    if result[0] > 0:
-                        # Convertir en prix decimal
-                        if is_sell:
-                            price_in_weth = result[0] / 10**18
-                        else:
-                            price_in_weth = amount / result[0] if result[0] > 0 else 0
-                        return price_in_weth
-                except Exception:
-                    continue
-                    
-            return 0
+                token_in, token_out = self.WETH_ADDRESS, token_address
+
+            quote = self.quote_exact_input(token_in, token_out, amount)
+            if not quote:
+                return 0
+
+            # Convertir en prix decimal
+            if is_sell:
+                return quote['amount_out'] / 10**18
+            return amount / quote['amount_out']
         except Exception as e:
             print(f"Erreur get_token_price: {e}")
             return 0
 
 class DexScreenerAPI:
     """Client pour l'API DexScreener avec retry"""
+
+    MAX_TOKENS_PER_REQUEST = 30  # Limite de l'endpoint /tokens/
     
-    def __init__(self):
+    def __init__(self, max_retries: int = 3, timeout: float = 10):
+        """
+        Args:
+            max_retries: Retries HTTP automatiques (0 = l'appelant gere ses retries)
+            timeout: Timeout des requetes en secondes
+        """
         self.base_url = "https://api.dexscreener.com/latest/dex"
+        self.max_retries = max_retries
+        self.timeout = timeout
         self.session = self._create_session()
         
     def _create_session(self) -> requests.Session:
         """Cree une session avec retry automatique"""
         session = requests.Session()
         retry = Retry(
-            total=3,
+            total=self.max_retries,
             backoff_factor=1,
             status_forcelist=[429, 500, 502, 503, 504]
         )
@@ -313,24 +390,99 @@ class DexScreenerAPI:
         """Recupere les infos d'un token depuis DexScreener"""
         try:
             url = f"{self.base_url}/tokens/{token_address}"
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, timeout=self.timeout)
             
             if response.status_code == 200:
                 data = response.json()
-                if data.get('pairs'):
-                    # Filtrer les paires sur Base
-                    base_pairs = [p for p in data['pairs'] if p.get('chainId') == 'base']
-                    if not base_pairs:
-                        base_pairs = data['pairs']
-                        
-                    # Prendre la paire avec le plus de liquidite
-                    pairs = sorted(base_pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)), reverse=True)
-                    if pairs:
-                        return self._parse_pair_data(pairs[0])
+                # Prix de la paire = prix du baseToken: paires ou le token est quote exclues
+                pairs = [
+                    p for p in data.get('pairs') or []
+                    if p.get('baseToken', {}).get('address', '').lower() == token_address.lower()
+                ]
+                if pairs:
+                    return self._select_best_pair(pairs)
             return None
         except Exception as e:
             print(f"Erreur DexScreener API: {e}")
             return None
+
+    def get_tokens_info(self, token_addresses: list) -> Dict[str, Dict]:
+        """
+        Recupere les infos de plusieurs tokens (30 adresses par requete)
+
+        Returns:
+            {adresse (minuscules): infos de la meilleure paire}, tokens sans paire absents
+        """
+        addresses = list(dict.fromkeys(a.lower() for a in token_addresses))
+        results = {}
+
+        for start in range(0, len(addresses), self.MAX_TOKENS_PER_REQUEST):
+            chunk = addresses[start:start + self.MAX_TOKENS_PER_REQUEST]
+            try:
+                url = f"{self.base_url}/tokens/{','.join(chunk)}"
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code != 200:
+                    continue
+
+                # Regrouper les paires par token demande, en baseToken seulement:
+                # priceUsd est le prix du baseToken, faux pour le token en quote
+                pairs_by_token = {address: [] for address in chunk}
+                for pair in response.json().get('pairs') or []:
+                    address = pair.get('baseToken', {}).get('address', '').lower()
+                    if address in pairs_by_token:
+                        pairs_by_token[address].append(pair)
+
+                for address, pairs in pairs_by_token.items():
+                    if pairs:
+                        results[address] = self._select_best_pair(pairs)
+            except Exception as e:
+                print(f"Erreur DexScreener API (lot de {len(chunk)}): {e}")
+
+        return results
+
+    def get_pairs_info(self, pair_addresses: list, chain_id: str = 'base') -> Dict[str, Dict]:
+        """
+        Recupere des paires connues par adresse (endpoint /pairs, 30 par requete)
+
+        Beaucoup plus leger que /tokens/: seules les paires demandees sont renvoyees.
+
+        Returns:
+            {adresse de paire (minuscules): infos de la paire}
+        """
+        addresses = list(dict.fromkeys(a.lower() for a in pair_addresses))
+        results = {}
+
+        for start in range(0, len(addresses), self.MAX_TOKENS_PER_REQUEST):
+            chunk = addresses[start:start + self.MAX_TOKENS_PER_REQUEST]
+            try:
+                url = f"{self.base_url}/pairs/{chain_id}/{','.join(chunk)}"
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code != 200:
+                    continue
+
+                data = response.json()
+                pairs = data.get('pairs') or ([data['pair']] if data.get('pair') else [])
+                for pair in pairs:
+                    address = (pair.get('pairAddress') or '').lower()
+                    if address in chunk:
+                        results[address] = self._parse_pair_data(pair)
+            except Exception as e:
+                print(f"Erreur DexScreener API (paires): {e}")
+
+        return results
+
+    def _select_best_pair(self, pairs: list) -> Optional[Dict]:
+        """Paire Base avec le plus de liquidite (toutes chaines si aucune sur Base)"""
+        # Filtrer les paires sur Base
+        base_pairs = [p for p in pairs if p.get('chainId') == 'base']
+        if not base_pairs:
+            base_pairs = pairs
+
+        # Prendre la paire avec le plus de liquidite
+        pairs = sorted(base_pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)), reverse=True)
+        if pairs:
+            return self._parse_pair_data(pairs[0])
+        return None
             
     def get_recent_pairs_on_chain(self, chain_id: str = 'base', limit: int = 50) -> list:
         """
@@ -9,6 +9,7 @@ set -e
 
 DB_PATH="/home/basebot/trading-bot/data/trading.db"
 JSON_DIR="/home/basebot/trading-bot/data"
+WALLET_STATE="$JSON_DIR/wallet_state.json"
 
 echo "=========================================="
 echo "🔄 Synchronisation Positions JSON ↔ DB"
@@ -50,6 +51,23 @@ sqlite3 "$DB_PATH" << SQL
 SELECT token_address, symbol FROM trade_history WHERE exit_time IS NULL;
 SQL
 
+# Soldes du wallet (instantané écrit par le Trader, sans appel RPC)
+if [ -f "$WALLET_STATE" ]; then
+    echo ""
+    echo "👛 Wallet (dernier instantané)..."
+    python3 /home/basebot/trading-bot/src/wallet_state.py || true
+    echo ""
+    echo "🔍 Positions orphelines encore détenues..."
+    for addr in $(sqlite3 "$DB_PATH" "SELECT token_address FROM trade_history WHERE exit_time IS NULL;"); do
+        if [ ! -f "$JSON_DIR/position_$addr.json" ]; then
+            held=$(python3 -c "import json, sys; print(json.load(open(sys.argv[1]))['tokens'].get(sys.argv[2].lower(), 0))" "$WALLET_STATE" "$addr")
+            if [ "$held" != "0" ]; then
+                echo "  ⚠️  $addr: $held tokens encore dans le wallet - à vendre manuellement"
+            fi
+        fi
+    done
+fi
+
 echo ""
 echo "🧹 Nettoyage des positions orphelines..."
 
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests des sorties pré-signées (ExitStandby) et mesure de la latence
+déclenchement -> transaction prête à diffuser
+
+Usage:
+    python test_exit_standby.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from eth_account import Account
+from web3 import Web3
+
+from exit_standby import ExitStandby
+from tx_manager import NonceManager
+
+TOKEN = Web3.to_checksum_address("0x" + "ab" * 20)
+FEES = {'maxFeePerGas': 2 * 10 ** 8, 'maxPriorityFeePerGas': 10 ** 6}
+# Objectif de latence (hors diffusion réseau)
+MAX_TAKE_LATENCY_MS = 5
+
+
+class FakeEth:
+    def __init__(self):
+        self.nonce = 7
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.nonce
+
+
+class FakeWeb3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def make_standby():
+    account = Account.create()
+    nonce_manager = NonceManager(FakeWeb3(), account.address)
+    builds = []
+
+    def build_txn(token, nonce, fees, floor_price):
+        builds.append(nonce)
+        txn = {
+            'to': token, 'value': 0, 'data': b'\x04\xe4\x5a\xaf' + bytes(32 * 8),
+            'gas': 300000, 'nonce': nonce, 'chainId': 8453, **fees
+        }
+        return txn, {'amount_in': 1000, 'min_out': int(floor_price * 10 ** 15), 'price': floor_price}
+
+    return ExitStandby(account, nonce_manager, build_txn), nonce_manager, builds
+
+
+def test_signs_once_while_fresh():
+    standby, _, builds = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    standby.refresh([(TOKEN, 0.952, 1000)], {**FEES, 'maxFeePerGas': FEES['maxFeePerGas'] * 105 // 100})
+    assert builds == [7], builds
+
+
+def test_resigns_on_stop_gas_and_amount():
+    standby, _, builds = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    standby.refresh([(TOKEN, 1.1, 1000)], FEES)  # trailing stop remonté
+    standby.refresh([(TOKEN, 1.1, 1000)], {**FEES, 'maxFeePerGas': FEES['maxFeePerGas'] * 2})
+    standby.refresh([(TOKEN, 1.1, 500)], {**FEES, 'maxFeePerGas': FEES['maxFeePerGas'] * 2})
+    assert len(builds) == 4, builds
+
+
+def test_signs_min_out_below_stop():
+    standby, _, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    entry = standby.standby[TOKEN.lower()]
+    assert abs(entry['floor_price'] - 0.95 * (1 - standby.headroom)) < 1e-12, entry
+    assert entry['min_out'] < 0.95 * 10 ** 15
+
+
+def test_take_claims_nonce():
+    standby, nonce_manager, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    entry = standby.take(TOKEN, 0.94, 1000)
+    assert entry is not None and entry['nonce'] == 7
+    assert nonce_manager.peek() == 8
+    assert standby.take(TOKEN, 0.94, 1000) is None
+
+
+def test_take_accepts_price_within_headroom():
+    # Le stop se déclenche sous son prix: la sortie signée doit rester utilisable
+    standby, _, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    floor_price = standby.standby[TOKEN.lower()]['floor_price']
+    assert standby.take(TOKEN, floor_price * 1.001, 1000) is not None
+
+
+def test_take_rejects_stale():
+    standby, nonce_manager, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    assert standby.take(TOKEN, 0.8, 1000) is None  # sous le plancher
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    assert standby.take(TOKEN, 1.0, 1000) is None  # au-dessus du stop, hors urgence
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    assert standby.take(TOKEN, 0.94, 500) is None  # quantité changée
+
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    with nonce_manager.allocate():  # une autre transaction prend le nonce
+        pass
+    assert standby.take(TOKEN, 0.94, 1000) is None
+    assert standby.stats['stale'] == 4
+
+
+def test_urgent_take_above_stop():
+    standby, _, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    assert standby.take(TOKEN, 1.2, 1000, urgent=True) is not None
+
+
+def test_drops_closed_positions():
+    standby, _, _ = make_standby()
+    standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+    standby.refresh([], FEES)
+    assert standby.standby == {}
+
+
+def test_missing_entry():
+    standby, _, _ = make_standby()
+    assert standby.take(TOKEN, 0.94, 1000) is None
+
+
+def test_take_latency():
+    standby, _, _ = make_standby()
+    for _ in range(standby.latencies.maxlen + 100):
+        standby.refresh([(TOKEN, 0.95, 1000)], FEES)
+        assert standby.take(TOKEN, 0.94, 1000) is not None
+    assert len(standby.latencies) == standby.latencies.maxlen  # échantillons bornés
+    stats = standby.latency_stats()
+    print(f"   latence déclenchement -> transaction prête: médiane {stats['median_ms']:.3f}ms, "
+          f"max {stats['max_ms']:.3f}ms sur {stats['count']} sorties")
+    assert stats['median_ms'] < MAX_TAKE_LATENCY_MS, stats
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests des gas limits appris (GasEstimator): échantillons de reçus, majoration
+des reverts à court de gas, reverts ordinaires ignorés
+
+Usage:
+    python test_gas_estimator.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from gas_estimator import MAX_SAMPLES, GasEstimator
+
+TOKEN = "0x" + "ab" * 20
+FEE = 10000
+DEFAULT = 300000
+
+
+def make_estimator():
+    return GasEstimator(Path(tempfile.mkdtemp()) / 'trading.db')
+
+
+def test_unknown_route_uses_default():
+    estimator = make_estimator()
+    assert estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT) == DEFAULT
+
+
+def test_limit_from_highest_sample():
+    estimator = make_estimator()
+    estimator.record(TOKEN, 'sell', FEE, 150000)
+    estimator.record(TOKEN, 'sell', FEE, 120000)
+    expected = int(150000 * (1 + estimator.margin))
+    assert estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT) == expected
+
+
+def test_low_gas_revert_ignored():
+    # Revert de slippage ou de honeypot: gasUsed loin du limit, pas un échantillon
+    estimator = make_estimator()
+    estimator.record(TOKEN, 'sell', FEE, 150000)
+    limit = estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT)
+    for _ in range(MAX_SAMPLES):
+        estimator.record(TOKEN, 'sell', FEE, 40000, gas_limit=limit, success=False)
+    assert estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT) == limit
+    assert estimator.samples[(TOKEN, 'sell', FEE)] == [150000]
+
+
+def test_out_of_gas_revert_bumped():
+    estimator = make_estimator()
+    estimator.record(TOKEN, 'sell', FEE, 150000)
+    limit = estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT)
+    estimator.record(TOKEN, 'sell', FEE, limit - 100, gas_limit=limit, success=False)
+    assert estimator.gas_limit(TOKEN, 'sell', FEE, DEFAULT) > limit
+
+
+def test_samples_persisted():
+    estimator = make_estimator()
+    estimator.record(TOKEN.upper().replace('0X', '0x'), 'buy', FEE, 180000)
+    reloaded = GasEstimator(estimator.db_path)
+    assert reloaded.known(TOKEN, 'buy', FEE)
+    assert reloaded.gas_limit(TOKEN, 'buy', FEE, DEFAULT) == estimator.gas_limit(TOKEN, 'buy', FEE, DEFAULT)
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Tests de la simulation honeypot (HoneypotSimulator) sur une EVM locale simulée
+
+La chaîne factice interprète les appels Multicall3 (aggregate3 / aggregate3Value)
+et reproduit un router Uniswap V3, un QuoterV2 et des tokens ERC20 configurables
+(taxes, vente bloquée). Aucun accès réseau: les calldata encodés par le
+simulateur sont réellement décodés et exécutés, les retours réellement encodés.
+
+Usage:
+    python test_honeypot_simulation.py
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from honeypot_simulator import (
+    EXACT_INPUT_SINGLE, EXACT_INPUT_SINGLE_TYPES, QUOTE_EXACT_INPUT_SINGLE,
+    QUOTE_EXACT_INPUT_SINGLE_TYPES, QUOTER_V2_ADDRESS, SIM_SENDER, SIM_WALLET,
+    SWAP_ROUTER02_ADDRESS, WETH_ADDRESS, HoneypotSimulator
+)
+from multicall import AGGREGATE3, AGGREGATE3_VALUE, MULTICALL3_ADDRESS, function_selector
+
+ROUTER = Web3.to_checksum_address(SWAP_ROUTER02_ADDRESS)
+QUOTER = Web3.to_checksum_address(QUOTER_V2_ADDRESS)
+WETH = Web3.to_checksum_address(WETH_ADDRESS)
+POOL = Web3.to_checksum_address("0x" + "70" * 20)
+
+SELECTORS = {
+    function_selector(AGGREGATE3): 'aggregate3',
+    function_selector(AGGREGATE3_VALUE): 'aggregate3Value',
+    function_selector(EXACT_INPUT_SINGLE): 'exactInputSingle',
+    function_selector(QUOTE_EXACT_INPUT_SINGLE): 'quoteExactInputSingle',
+    function_selector('balanceOf(address)'): 'balanceOf',
+    function_selector('approve(address,uint256)'): 'approve',
+}
+
+
+class Revert(Exception):
+    pass
+
+
+def token_address(n: int) -> str:
+    return Web3.to_checksum_address(f"0x{n:040x}")
+
+
+class FakeToken:
+    """
+    ERC20 avec taxe à l'achat / à la vente et vente éventuellement bloquée
+
+    Taxe de vente 'extra': prélevée en plus sur le solde du vendeur, la pool
+    reçoit le montant complet. 'deduct' (fee-on-transfer): retenue sur le
+    montant transféré, la pool reçoit moins que prévu.
+    """
+
+    def __init__(self, buy_tax=0.0, sell_tax=0.0, sell_blocked=False, sell_tax_mode='extra'):
+        self.buy_tax = buy_tax
+        self.sell_tax = sell_tax
+        self.sell_blocked = sell_blocked
+        self.sell_tax_mode = sell_tax_mode
+        self.balances = {POOL: 10 ** 30}
+        self.allowances = {}
+
+    def transfer(self, sender, recipient, amount) -> int:
+        """Retourne le montant réellement crédité au destinataire"""
+        debited = amount
+        received = amount
+        if sender == POOL:
+            received = int(amount * (1 - self.buy_tax))
+        elif recipient == POOL:
+            if self.sell_blocked:
+                raise Revert('trading disabled')
+            if self.sell_tax_mode == 'deduct':
+                received = int(amount * (1 - self.sell_tax))
+            else:
+                # Taxe = sell_tax du total débité au vendeur
+                debited = int(amount / (1 - self.sell_tax))
+        if self.balances.get(sender, 0) < debited:
+            raise Revert('insufficient balance')
+        self.balances[sender] -= debited
+        self.balances[recipient] = self.balances.get(recipient, 0) + received
+        return received
+
+    def handle(self, name, args, sender, value):
+        if name == 'balanceOf':
+            owner = Web3.to_checksum_address(decode(['address'], args)[0])
+            return encode(['uint256'], [self.balances.get(owner, 0)])
+        if name == 'approve':
+            spender, amount = decode(['address', 'uint256'], args)
+            self.allowances[(sender, Web3.to_checksum_address(spender))] = amount
+            return encode(['bool'], [True])
+        raise Revert('unknown function')
+
+
+class FakeChain:
+    """EVM minimale: Multicall3, router, quoter et tokens en Python"""
+
+    def __init__(self):
+        self.tokens = {}
+        # (token, fee) -> tokens par WETH (prix constant, pas d'impact)
+        self.pools = {}
+        self.calls = {'aggregate3': 0, 'aggregate3Value': 0}
+        self.last_override = None
+
+    def add_token(self, address, fee=3000, price=1000, **kwargs):
+        self.tokens[address] = FakeToken(**kwargs)
+        self.pools[(address, fee)] = price
+
+    # --- API web3 utilisée par le simulateur ---
+    def get_code(self, address):
+        return b'\x60\x80' if Web3.to_checksum_address(address) == MULTICALL3_ADDRESS else b''
+
+    def call(self, tx, block_identifier='latest', state_override=None):
+        target = Web3.to_checksum_address(tx['to'])
+        if target != MULTICALL3_ADDRESS and not (state_override and target in state_override):
+            raise Revert('no code at target')
+        if state_override:
+            self.last_override = state_override
+            balance = state_override.get(Web3.to_checksum_address(tx.get('from', SIM_SENDER)), {}).get('balance', 0)
+            if balance < tx.get('value', 0):
+                raise Revert('insufficient funds for value')
+
+        data = bytes(tx['data'])
+        name = SELECTORS[data[:4]]
+        self.calls[name] += 1
+
+        # Chaque eth_call part de l'état courant et ne le modifie pas
+        snapshot = copy.deepcopy(self.tokens)
+        try:
+            if name == 'aggregate3':
+                calls = [(t, d, 0) for t, _, d in decode(['(address,bool,bytes)[]'], data[4:])[0]]
+            else:
+                calls = [(t, d, v) for t, _, v, d in decode(['(address,bool,uint256,bytes)[]'], data[4:])[0]]
+                if sum(v for _, _, v in calls) != tx.get('value', 0):
+                    raise Revert('Multicall3: value mismatch')
+
+            results = []
+            for call_target, call_data, value in calls:
+                try:
+                    results.append((True, self._dispatch(Web3.to_checksum_address(call_target),
+                                                         bytes(call_data), target, value)))
+                except Revert:
+                    results.append((False, b''))
+            return encode(['(bool,bytes)[]'], [results])
+        finally:
+            self.tokens = snapshot
+
+    # --- Contrats ---
+    def _dispatch(self, target, data, sender, value):
+        name = SELECTORS.get(data[:4])
+        args = data[4:]
+        if target == ROUTER and name == 'exactInputSingle':
+            return self._swap(decode(EXACT_INPUT_SINGLE_TYPES, args)[0], sender, value)
+        if target == QUOTER and name == 'quoteExactInputSingle':
+            return self._quote(decode(QUOTE_EXACT_INPUT_SINGLE_TYPES, args)[0])
+        if target in self.tokens:
+            return self.tokens[target].handle(name, args, sender, value)
+        raise Revert('no code')
+
+    def _price(self, token_in, token_out, fee):
+        token = token_out if token_in == WETH else token_in
+        if (token, fee) not in self.pools:
+            raise Revert('pool does not exist')
+        return token, self.pools[(token, fee)]
+
+    def _quote(self, params):
+        token_in, token_out, amount_in, fee, _ = params
+        token_in, token_out = Web3.to_checksum_address(token_in), Web3.to_checksum_address(token_out)
+        _, price = self._price(token_in, token_out, fee)
+        amount_out = amount_in * price if token_in == WETH else amount_in // price
+        return encode(['uint256', 'uint160', 'uint32', 'uint256'], [amount_out, 0, 1, 100000])
+
+    def _swap(self, params, sender, value):
+        token_in, token_out, fee, recipient, amount_in, _, _ = params
+        token_in, token_out = Web3.to_checksum_address(token_in), Web3.to_checksum_address(token_out)
+        recipient = Web3.to_checksum_address(recipient)
+        token_address, price = self._price(token_in, token_out, fee)
+        token = self.tokens[token_address]
+
+        if token_in == WETH:
+            if value != amount_in:
+                raise Revert('STF')
+            amount_out = amount_in * price
+            token.transfer(POOL, recipient, amount_out)
+        else:
+            if token.allowances.get((sender, ROUTER), 0) < amount_in:
+                raise Revert('STF')
+            received = token.transfer(sender, POOL, amount_in)
+            # Pool V3: le callback doit avoir payé tout amountIn (balance avant + amountIn)
+            if received < amount_in:
+                raise Revert('IIA')
+            amount_out = received // price
+        return encode(['uint256'], [amount_out])
+
+
+class FakeWeb3:
+    def __init__(self, chain):
+        self.eth = chain
+
+
+def make_simulator(chain):
+    return HoneypotSimulator(FakeWeb3(chain))
+
+
+def test_clean_token():
+    chain = FakeChain()
+    token = token_address(1)
+    chain.add_token(token)
+
+    result = make_simulator(chain).simulate(token)
+    assert result['can_buy'] and result['can_sell']
+    assert result['buy_tax'] == 0 and result['sell_tax'] == 0
+    assert result['is_safe'] and not result['is_honeypot']
+    assert result['source'] == 'simulation' and result['error'] is None
+
+
+def test_taxes_measured_from_amounts():
+    chain = FakeChain()
+    token = token_address(2)
+    chain.add_token(token, buy_tax=0.05, sell_tax=0.08)
+
+    result = make_simulator(chain).simulate(token)
+    assert abs(result['buy_tax'] - 5.0) < 0.01, result
+    assert abs(result['sell_tax'] - 8.0) < 0.01, result
+    assert result['is_safe']
+
+
+def test_sell_blocked_is_honeypot():
+    chain = FakeChain()
+    token = token_address(3)
+    chain.add_token(token, sell_blocked=True)
+
+    result = make_simulator(chain).simulate(token)
+    assert result['can_buy'] and not result['can_sell']
+    assert result['is_honeypot'] and not result['is_safe']
+    assert 'CANNOT_SELL' in result['flags']
+    assert result['risk_level'] == 'CRITICAL'
+
+
+def test_fee_on_transfer_sell_is_honeypot():
+    # La pool V3 reçoit moins que amountIn: la vente revert (IIA) on-chain
+    chain = FakeChain()
+    token = token_address(7)
+    chain.add_token(token, sell_tax=0.05, sell_tax_mode='deduct')
+
+    result = make_simulator(chain).simulate(token)
+    assert result['can_buy'] and not result['can_sell'], result
+    assert result['is_honeypot'] and not result['is_safe']
+    assert 'CANNOT_SELL' in result['flags']
+
+
+def test_extreme_sell_tax():
+    chain = FakeChain()
+    token = token_address(4)
+    chain.add_token(token, sell_tax=0.6)
+
+    simulator = make_simulator(chain)
+    # Revente assez petite pour que la taxe prélevée en plus reste couverte par le solde
+    simulator.sell_ratio = 0.3
+    result = simulator.simulate(token)
+    assert result['can_sell'], result
+    assert abs(result['sell_tax'] - 60.0) < 0.01, result
+    assert result['is_honeypot']
+    assert 'EXTREME_SELL_TAX' in result['flags']
+
+
+def test_no_pool():
+    chain = FakeChain()
+    token = token_address(5)
+    chain.tokens[token] = FakeToken()
+
+    result = make_simulator(chain).simulate(token)
+    assert result['is_honeypot'] and result['error']
+    assert result['flags'] == ['NO_V3_POOL']
+    assert chain.calls['aggregate3Value'] == 0
+
+
+def test_best_fee_tier_selected():
+    chain = FakeChain()
+    token = token_address(6)
+    chain.add_token(token, fee=3000, price=1000)
+    chain.pools[(token, 10000)] = 1500
+
+    result = make_simulator(chain).simulate(token)
+    assert result['fee_tier'] == 10000
+    assert result['is_safe']
+
+
+def test_batch_single_eth_call():
+    chain = FakeChain()
+    tokens = [token_address(10 + i) for i in range(6)]
+    chain.add_token(tokens[0])
+    chain.add_token(tokens[1], buy_tax=0.03, sell_tax=0.03)
+    chain.add_token(tokens[2], sell_blocked=True)
+    chain.add_token(tokens[3], sell_tax=0.25)
+    chain.add_token(tokens[4], fee=500)
+    chain.tokens[tokens[5]] = FakeToken()
+
+    results = make_simulator(chain).simulate_many(tokens)
+
+    # Une cotation multicall + une simulation multicall pour tout le lot
+    assert chain.calls == {'aggregate3': 1, 'aggregate3Value': 1}, chain.calls
+    assert results[tokens[0]]['is_safe']
+    assert abs(results[tokens[1]]['sell_tax'] - 3.0) < 0.01
+    assert results[tokens[2]]['is_honeypot']
+    assert 'VERY_HIGH_SELL_TAX' in results[tokens[3]]['flags']
+    assert results[tokens[4]]['fee_tier'] == 500
+    assert results[tokens[5]]['flags'] == ['NO_V3_POOL']
+
+
+def test_state_override_funds_synthetic_wallet():
+    chain = FakeChain()
+    token = token_address(20)
+    chain.add_token(token)
+
+    simulator = make_simulator(chain)
+    simulator.simulate(token)
+    override = chain.last_override
+    assert override[SIM_WALLET]['code'] == b'\x60\x80'
+    assert override[SIM_SENDER]['balance'] >= simulator.amount_in
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests du flux de prix (PriceStream): réserve WETH suivie log par log et
+alertes de rug sur les Burn, avec des logs synthétiques passés à poll()
+
+Usage:
+    python test_price_stream.py
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from eth_abi import encode
+from web3 import Web3
+
+from onchain_pricing import OnchainPricer
+from price_stream import BURN_TOPIC, COLLECT_TOPIC, SWAP_TOPIC, PriceStream
+from v3_math import Q96
+
+TOKEN = Web3.to_checksum_address("0x" + "ab" * 20)
+POOL = Web3.to_checksum_address("0x" + "cd" * 20)
+OWNER = Web3.to_checksum_address("0x" + "ee" * 20)
+ETH = 10 ** 18
+
+
+class FakeMulticall:
+    """balanceOf(pool) WETH: réserves fixées par le test"""
+
+    def __init__(self, balances):
+        self.balances = balances
+        self.calls = 0
+
+    def aggregate3(self, calls):
+        self.calls += 1
+        return [(True, encode(['uint256'], [self.balances[bytes(data)[-20:].hex()]]))
+                for _, data in calls]
+
+
+class FakeEth:
+    def __init__(self):
+        self.block_number = 10
+        self.logs = []
+
+    def get_logs(self, params):
+        return [log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+
+class FakeWeb3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def make_stream(reserve, token_is_token0=True):
+    """Flux sur une pool TOKEN/WETH déjà résolue, réserve WETH donnée"""
+    pricer = OnchainPricer(Web3())
+    pricer.pools[TOKEN] = {'pool': POOL, 'token_is_token0': token_is_token0, 'token_decimals': 18, 'fee': 10000}
+    pricer.eth_usd = 2500.0
+    pricer.multicall = FakeMulticall({POOL[2:].lower(): reserve})
+
+    w3 = FakeWeb3()
+    stream = PriceStream(w3, pricer)
+    stream.watch([TOKEN])
+    stream.last_block = w3.eth.block_number  # prix de départ déjà lus
+    return stream, w3
+
+
+def weth_pair(stream, weth, other=0):
+    """(amount0, amount1) avec le WETH du bon côté de la pool"""
+    token_is_token0 = stream.pricer.pools[TOKEN]['token_is_token0']
+    return (other, weth) if token_is_token0 else (weth, other)
+
+
+def make_log(w3, topic, data, index=0):
+    return {
+        'address': POOL,
+        'topics': [topic],
+        'data': data,
+        'blockNumber': w3.eth.block_number,
+        'logIndex': index,
+        'transactionHash': bytes([w3.eth.block_number, index]) + bytes(30)
+    }
+
+
+def swap_log(stream, w3, weth_in, index=0):
+    amount0, amount1 = weth_pair(stream, weth_in, -weth_in)
+    data = encode(['int256', 'int256', 'uint160', 'uint128', 'int24'], [amount0, amount1, Q96, 10 ** 20, 0])
+    return make_log(w3, SWAP_TOPIC, data, index)
+
+
+def burn_log(stream, w3, weth, other=0, index=0):
+    amount0, amount1 = weth_pair(stream, weth, other)
+    return make_log(w3, BURN_TOPIC, encode(['uint128', 'uint256', 'uint256'], [10 ** 18, amount0, amount1]), index)
+
+
+def collect_log(stream, w3, weth, index=0):
+    amount0, amount1 = weth_pair(stream, weth)
+    return make_log(w3, COLLECT_TOPIC, encode(['address', 'uint128', 'uint128'], [OWNER, amount0, amount1]), index)
+
+
+def next_block(stream, w3, *builders):
+    """Mine un bloc contenant les logs donnés et le passe au flux"""
+    w3.eth.block_number += 1
+    w3.eth.logs = [build(index) for index, build in enumerate(builders)]
+    return stream.poll()
+
+
+def alerts(updates):
+    return [u for u in updates if u['kind'] == 'liquidity_drop']
+
+
+def test_reserve_follows_swaps_and_collects():
+    stream, w3 = make_stream(100 * ETH)
+    updates = next_block(stream, w3, lambda i: swap_log(stream, w3, 5 * ETH, i),
+                         lambda i: swap_log(stream, w3, -2 * ETH, i))
+    assert [u['kind'] for u in updates] == ['swap', 'swap']
+    assert stream.reserves[POOL.lower()] == 103 * ETH
+
+    next_block(stream, w3, lambda i: collect_log(stream, w3, 3 * ETH, i))
+    assert stream.reserves[POOL.lower()] == 100 * ETH
+
+
+def test_single_large_burn_alerts():
+    stream, w3 = make_stream(100 * ETH)
+    found = alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 80 * ETH, index=i)))
+    assert len(found) == 1, found
+    assert found[0]['token'] == TOKEN.lower()
+    assert found[0]['withdrawn_weth'] == 80 * ETH and found[0]['reserve_weth'] == 100 * ETH
+    assert abs(found[0]['drop_percent'] - 80) < 1e-9
+
+    # Une seule alerte par pool
+    assert not alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 10 * ETH, index=i)))
+
+
+def test_burns_accumulate_over_window():
+    stream, w3 = make_stream(100 * ETH)
+    assert not alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 30 * ETH, index=i)))
+    found = alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 30 * ETH, index=i)))
+    assert len(found) == 1, found
+    # Rapporté à la réserve d'avant le premier retrait
+    assert found[0]['withdrawn_weth'] == 60 * ETH and found[0]['reserve_weth'] == 100 * ETH
+
+
+def test_burns_outside_window_ignored():
+    stream, w3 = make_stream(100 * ETH)
+    assert not alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 30 * ETH, index=i)))
+    w3.eth.block_number += stream.rug_window_blocks
+    assert not alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 30 * ETH, index=i)))
+
+
+def test_weth_side_follows_token_order():
+    # Token en token1: le WETH est amount0, le gros montant de token ne compte pas
+    stream, w3 = make_stream(100 * ETH, token_is_token0=False)
+    assert not alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 1 * ETH, 10 ** 30, i)))
+
+    stream, w3 = make_stream(100 * ETH, token_is_token0=False)
+    found = alerts(next_block(stream, w3, lambda i: burn_log(stream, w3, 60 * ETH, index=i)))
+    assert len(found) == 1 and found[0]['withdrawn_weth'] == 60 * ETH, found
+
+
+def test_collect_only_no_alert():
+    # Frais encaissés (Collect sans Burn): la réserve baisse, pas d'alerte
+    stream, w3 = make_stream(100 * ETH)
+    assert not alerts(next_block(stream, w3, lambda i: collect_log(stream, w3, 90 * ETH, i)))
+    assert stream.reserves[POOL.lower()] == 10 * ETH
+
+
+def test_watch_rereads_reserve_after_withdrawal():
+    stream, w3 = make_stream(100 * ETH)
+    next_block(stream, w3, lambda i: collect_log(stream, w3, 10 * ETH, i))
+    stream.pricer.multicall.balances[POOL[2:].lower()] = 95 * ETH
+    calls = stream.pricer.multicall.calls
+    stream.watch([TOKEN])
+    assert stream.pricer.multicall.calls == calls + 1
+    assert stream.reserves[POOL.lower()] == 95 * ETH
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
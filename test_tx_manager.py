@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests de la distribution locale des nonces (NonceManager): allocation sans
+RPC, resynchronisation après erreur, peek/claim des sorties pré-signées et
+rattrapage après une transaction perdue
+
+Usage:
+    python test_tx_manager.py
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from web3 import Web3
+
+from tx_manager import NonceManager
+
+ADDRESS = Web3.to_checksum_address("0x" + "11" * 20)
+
+
+class FakeEth:
+    """get_transaction_count: nonces 'latest' (minés) et 'pending' (mempool inclus)"""
+
+    def __init__(self, latest=5, pending=7):
+        self.counts = {'latest': latest, 'pending': pending}
+        self.calls = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        self.calls += 1
+        return self.counts[block_identifier]
+
+
+class FakeWeb3:
+    def __init__(self, **counts):
+        self.eth = FakeEth(**counts)
+
+
+def make_manager(**counts):
+    w3 = FakeWeb3(**counts)
+    return NonceManager(w3, ADDRESS), w3.eth
+
+
+def test_allocate_without_rpc():
+    manager, eth = make_manager()
+    with manager.allocate(2) as nonces:
+        assert nonces == [7, 8]
+    with manager.allocate() as nonces:
+        assert nonces == [9]
+    assert eth.calls == 1  # une seule lecture ('pending') au premier envoi
+
+
+def test_allocate_invalidates_on_error():
+    manager, eth = make_manager()
+    try:
+        with manager.allocate(2):
+            raise ValueError("envoi refusé")
+    except ValueError:
+        pass
+    # Nonces 7 et 8 jamais utilisés: la chaîne fait foi
+    with manager.allocate() as nonces:
+        assert nonces == [7]
+    assert eth.calls == 2
+
+
+def test_error_keeps_sent_nonce_via_pending():
+    # Approve envoyé (nonce 7, dans le mempool), swap refusé: le nonce 7 n'est pas réutilisé
+    manager, eth = make_manager()
+    try:
+        with manager.allocate(2):
+            eth.counts['pending'] = 8
+            raise ValueError("swap refusé")
+    except ValueError:
+        pass
+    with manager.allocate() as nonces:
+        assert nonces == [8]
+
+
+def test_peek_does_not_reserve():
+    manager, _ = make_manager()
+    assert manager.peek() == 7
+    assert manager.peek() == 7
+    with manager.allocate() as nonces:
+        assert nonces == [7]
+
+
+def test_claim_once():
+    manager, _ = make_manager()
+    nonce = manager.peek()
+    assert manager.claim(nonce)
+    assert not manager.claim(nonce)
+    assert manager.peek() == nonce + 1
+
+
+def test_claim_after_allocate_fails():
+    # Sortie signée avec le nonce 7, puis un achat prend le 7: la sortie est périmée
+    manager, _ = make_manager()
+    nonce = manager.peek()
+    with manager.allocate() as nonces:
+        assert nonces == [nonce]
+    assert not manager.claim(nonce)
+
+
+def test_concurrent_claims_single_winner():
+    manager, _ = make_manager()
+    nonce = manager.peek()
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        results.append(manager.claim(nonce))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1, results
+    assert manager.peek() == nonce + 1
+
+
+def test_concurrent_allocations_distinct():
+    manager, _ = make_manager()
+    allocated = []
+    lock = threading.Lock()
+
+    def allocate():
+        for _ in range(50):
+            with manager.allocate(2) as nonces:
+                with lock:
+                    allocated.extend(nonces)
+
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(allocated) == list(range(7, 7 + 400))
+
+
+def test_recover_after_lost_transaction():
+    manager, eth = make_manager(latest=5, pending=5)
+    with manager.allocate(3) as nonces:
+        for nonce in nonces:
+            manager.track(nonce, f"0x{nonce:064x}")
+    # Nonce 5 miné, 6 et 7 perdus (sortis du mempool sans être minés)
+    eth.counts.update({'latest': 6, 'pending': 6})
+    assert manager.recover() == 6
+    assert sorted(manager.in_flight) == [6, 7]
+    with manager.allocate() as nonces:
+        assert nonces == [6]  # le trou est comblé
+    assert manager.stats['recoveries'] == 1
+
+
+def test_settle():
+    manager, _ = make_manager()
+    with manager.allocate() as nonces:
+        manager.track(nonces[0], "0x" + "aa" * 32)
+    manager.settle(nonces[0])
+    manager.settle(None)
+    assert manager.in_flight == {}
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
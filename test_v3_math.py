@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de cotation Uniswap V3 local (v3_math + V3LocalQuoter)
+
+Les valeurs de référence sont celles du contrat TickMath (MIN/MAX_SQRT_RATIO)
+et les formules fermées d'un swap dans une plage de liquidité constante.
+
+Usage:
+    python test_v3_math.py
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+sys.path.append(str(PROJECT_DIR / 'src'))
+
+from eth_abi import encode
+from web3 import Web3
+
+from multicall import function_selector
+from v3_math import (
+    MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, Q96, compute_swap_step,
+    get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio, simulate_exact_input
+)
+from v3_quoter import V3LocalQuoter
+
+TOKEN0 = Web3.to_checksum_address("0x" + "01" * 20)
+TOKEN1 = Web3.to_checksum_address("0x" + "02" * 20)
+
+
+def make_state(liquidity=10 ** 24, ticks=None, fee=3000):
+    return {
+        'sqrt_price_x96': Q96,
+        'tick': 0,
+        'liquidity': liquidity,
+        'fee': fee,
+        'ticks': ticks or {},
+        'tick_lower_bound': -200000,
+        'tick_upper_bound': 200000
+    }
+
+
+def test_tick_math_bounds():
+    assert get_sqrt_ratio_at_tick(0) == Q96
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+
+
+def test_tick_round_trip():
+    for tick in [-887000, -60000, -1, 0, 1, 600, 123456, 887000]:
+        sqrt_price = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(sqrt_price) == tick, tick
+        assert get_tick_at_sqrt_ratio(sqrt_price + 1) == tick, tick
+
+
+def test_single_range_matches_closed_form():
+    liquidity, amount_in, fee = 10 ** 24, 10 ** 21, 3000
+    result = simulate_exact_input(make_state(liquidity, fee=fee), amount_in, True)
+
+    net = amount_in * (10 ** 6 - fee) // 10 ** 6
+    numerator = liquidity << 96
+    sqrt_next = -(-numerator * Q96 // (numerator + net * Q96))
+    expected_out = liquidity * (Q96 - sqrt_next) // Q96
+
+    assert result['sqrt_price_x96_after'] == sqrt_next
+    assert result['amount_out'] == expected_out
+    assert result['amount_in'] == amount_in and result['complete']
+
+
+def test_impact_grows_with_size():
+    state = make_state()
+    impacts = [simulate_exact_input(state, amount, False)['price_impact']
+               for amount in (10 ** 18, 10 ** 21, 10 ** 23)]
+    assert impacts[0] < impacts[1] < impacts[2]
+    assert impacts[0] < 1e-5
+
+
+def test_crossing_tick_changes_liquidity():
+    # Position [-600, 600] au-dessus d'une liquidité de fond
+    ticks = {-600: 9 * 10 ** 23, 600: -9 * 10 ** 23}
+    deep = simulate_exact_input(make_state(10 ** 24, ticks), 10 ** 23, True)
+    shallow = simulate_exact_input(make_state(10 ** 24, {}), 10 ** 23, True)
+
+    # Sous -600, la liquidité tombe à 1e23: le swap pousse le prix plus loin
+    assert deep['tick_after'] < -600
+    assert shallow['tick_after'] > deep['tick_after']
+
+
+def test_stops_at_loaded_window():
+    state = make_state(10 ** 20)
+    state['tick_lower_bound'] = -1000
+    result = simulate_exact_input(state, 10 ** 24, True)
+    assert not result['complete']
+    assert result['amount_in'] < 10 ** 24
+    assert result['tick_after'] == -1000
+
+
+def test_exact_output_step():
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(
+        Q96, get_sqrt_ratio_at_tick(-1000), 10 ** 24, -10 ** 18, 3000
+    )
+    assert amount_out == 10 ** 18
+    assert amount_in > amount_out and fee > 0
+
+
+class FakeMulticall:
+    """Répond aux lectures d'état d'une pool (tick courant 0, spacing 60)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.bitmaps = {0: (1 << 10) | (1 << 0), -1: 1 << 246}  # ticks 600, 0, -600
+        self.nets = {600: -5, 0: 7, -600: 5}
+
+    def aggregate3(self, calls):
+        self.calls += 1
+        results = []
+        for _, data in calls:
+            selector, args = data[:4], data[4:]
+            if selector == function_selector('slot0()'):
+                out = encode(['uint160', 'int24', 'uint16', 'uint16', 'uint16', 'uint8', 'bool'],
+                             [Q96, 0, 0, 1, 1, 0, True])
+            elif selector == function_selector('liquidity()'):
+                out = encode(['uint128'], [10 ** 20])
+            elif selector == function_selector('fee()'):
+                out = encode(['uint24'], [3000])
+            elif selector == function_selector('tickSpacing()'):
+                out = encode(['int24'], [60])
+            elif selector == function_selector('token0()'):
+                out = encode(['address'], [TOKEN0])
+            elif selector == function_selector('token1()'):
+                out = encode(['address'], [TOKEN1])
+            elif selector == function_selector('tickBitmap(int16)'):
+                word = int.from_bytes(args[:32], 'big', signed=True)
+                out = encode(['uint256'], [self.bitmaps.get(word, 0)])
+            elif selector == function_selector('ticks(int24)'):
+                tick = int.from_bytes(args[:32], 'big', signed=True)
+                out = encode(['uint128', 'int128'], [abs(self.nets[tick]), self.nets[tick]])
+            else:
+                results.append((False, b''))
+                continue
+            results.append((True, out))
+        return results
+
+
+def test_local_quoter_loads_and_caches():
+    quoter = V3LocalQuoter(None)
+    quoter.multicall = FakeMulticall()
+    pool = "0x" + "33" * 20
+
+    quotes = quoter.quote_sizes(pool, TOKEN1, [10 ** 15, 10 ** 16, 10 ** 17])
+    state = quoter.states[pool]
+    assert state['ticks'] == {-600: 5, 0: 7, 600: -5}, state['ticks']
+    assert state['tick_spacing'] == 60 and state['fee'] == 3000
+    # Trois multicalls pour charger l'état, aucune pour les cotations
+    assert quoter.multicall.calls == 3
+    assert quotes[0]['amount_out'] < quotes[1]['amount_out'] < quotes[2]['amount_out']
+
+    quoter.apply_swap(pool, get_sqrt_ratio_at_tick(100), 10 ** 19, 100)
+    assert quoter.states[pool]['tick'] == 100
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items())
+             if name.startswith('test_') and callable(value)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} tests réussis")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()